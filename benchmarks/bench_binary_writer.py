@@ -0,0 +1,56 @@
+"""Binary logging throughput: the old struct.pack-per-sample loop vs. block writes.
+
+Run from the repository root:  python -m benchmarks.bench_binary_writer
+"""
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from src.data_logger import DataLogger
+from src.log_format import open_binary_log
+
+SAMPLES = 2_000_000
+BLOCK = 10_000  # samples per logging tick
+
+
+def per_sample_loop(path, x_data, y_data):
+    # the previous DataLogger.logg_binary inner loop, kept here as the baseline
+    with open(path, 'ab') as binfile:
+        for x, y in zip(x_data, y_data):
+            binfile.write(struct.pack('dd', x, y))
+
+
+def main():
+    t = np.arange(SAMPLES) * 1e-4
+    y = np.sin(2 * np.pi * t) + 0.2 * np.random.randn(SAMPLES)
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        path = os.path.join(directory, "loop.bin")
+        for i in range(0, SAMPLES, BLOCK):
+            per_sample_loop(path, t[i:i + BLOCK], y[i:i + BLOCK])
+        loop = time.perf_counter() - start
+
+        logger = DataLogger("block", directory, 1 << 40, new_file=False, sample_rate=10_000)
+        logger.set_format("bin")
+        start = time.perf_counter()
+        for i in range(0, SAMPLES, BLOCK):
+            logger.write_binary(t[i:i + BLOCK], y[i:i + BLOCK])
+        block = time.perf_counter() - start
+
+        header, records = open_binary_log(logger.file_path)
+        assert len(records) == SAMPLES and records["t"][-1] == t[-1]
+        del records
+
+    megabytes = SAMPLES * 16 / 1e6
+    print(f"{SAMPLES} samples ({megabytes:.0f} MB) in blocks of {BLOCK}")
+    print(f"per-sample loop : {loop:6.2f} s  {megabytes / loop:7.1f} MB/s")
+    print(f"block writer    : {block:6.2f} s  {megabytes / block:7.1f} MB/s")
+    print(f"speedup         : {loop / block:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
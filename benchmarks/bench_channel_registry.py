@@ -0,0 +1,74 @@
+"""Channel lookup (linear scan by name vs. ChannelRegistry) and the cost of a
+time-aligned math input per pushed block.
+
+Run from the repository root:  python -m benchmarks.bench_channel_registry
+"""
+import timeit
+
+import numpy as np
+
+from src.alignment import ASOF, LINEAR
+from src.channel_registry import ChannelRegistry
+from src.expression import compile_expression
+from src.incremental import IncrementalExpression
+
+CHANNELS = (10, 100, 1000)
+BLOCKS = 2000
+
+
+class Graph:
+    def __init__(self, name):
+        self.signal_name = name
+
+
+def scan(graphs, name):
+    # the linear scan name lookups did before the registry
+    for graph in graphs:
+        if graph.signal_name == name:
+            return graph
+    return None
+
+
+def pushes(join):
+    # A at 20 Hz, B at 60 Hz with a phase offset, one block each per push
+    incremental = IncrementalExpression(compile_expression("A * B"), [1, 2], 500, join)
+    blocks = []
+    for i in range(BLOCKS):
+        ta = i * 0.05 + np.arange(1) * 0.05
+        tb = i * 0.05 + 0.013 + np.arange(3) * 0.05 / 3
+        blocks.append((ta, np.sin(ta), tb, np.cos(tb)))
+
+    def run():
+        incremental.clear()
+        produced = 0
+        for ta, ya, tb, yb in blocks:
+            for result in (incremental.push(1, ta, ya), incremental.push(2, tb, yb)):
+                if result is not None:
+                    produced += len(result[0])
+        return produced
+    return run
+
+
+def main():
+    print(f"{'channels':>8} {'scan us':>8} {'registry us':>12}")
+    for count in CHANNELS:
+        graphs = [Graph(f"signal {i}") for i in range(count)]
+        registry = ChannelRegistry()
+        for graph in graphs:
+            registry.register(graph)
+        name = graphs[-1].signal_name
+        number = 20_000
+        scan_time = timeit.timeit(lambda: scan(graphs, name), number=number) / number
+        registry_time = timeit.timeit(lambda: registry.get(registry.resolve(name)), number=number) / number
+        print(f"{count:8d} {scan_time * 1e6:8.2f} {registry_time * 1e6:12.2f}")
+
+    print(f"\nA (20 Hz) * B (60 Hz, offset), {BLOCKS} pushes per input")
+    for join in (LINEAR, ASOF):
+        run = pushes(join)
+        produced = run()
+        elapsed = min(timeit.repeat(run, number=1, repeat=5))
+        print(f"{join:>7}: {produced} results, {elapsed / BLOCKS * 1e6:.1f} us per block pair")
+
+
+if __name__ == "__main__":
+    main()
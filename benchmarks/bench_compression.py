@@ -0,0 +1,53 @@
+"""Compressed binary logs: ratio and CPU cost per codec, level and value encoding.
+
+Run from the repository root:  python -m benchmarks.bench_compression
+"""
+import time
+
+import numpy as np
+
+from src.log_codec import CODECS, VALUE_ENCODINGS, decode_blocks, encode_block
+
+SAMPLES = 1_000_000
+RATE = 1000  # Hz
+BLOCK = 4096  # DataLogger.block_samples default
+LEVELS = {"zlib": (1, 6, 9), "lzma": (0, 6)}
+
+
+def signals():
+    t = 1.7e9 + np.arange(SAMPLES) / RATE  # unix timestamps, like a real log
+    rng = np.random.default_rng(0)
+    yield "smooth sine", t, np.sin(2 * np.pi * 0.5 * t)
+    yield "quantized adc", t, np.round(np.sin(2 * np.pi * 0.5 * t) * 2048) / 2048
+    yield "sine + noise", t, np.sin(2 * np.pi * 0.5 * t) + 0.1 * rng.standard_normal(SAMPLES)
+
+
+def run(t, y, codec, level, values):
+    start = time.process_time()
+    blocks = [encode_block(t[i:i + BLOCK], y[i:i + BLOCK], codec, level, values)
+              for i in range(0, SAMPLES, BLOCK)]
+    encode = time.process_time() - start
+    data = b"".join(blocks)
+    start = time.process_time()
+    t_back, y_back = decode_blocks(data)
+    decode = time.process_time() - start
+    assert np.array_equal(t_back, t) and np.array_equal(y_back, y)
+    return 16 * SAMPLES / len(data), encode, decode
+
+
+def main():
+    megabytes = 16 * SAMPLES / 1e6
+    print(f"{SAMPLES} samples ({megabytes:.0f} MB raw) in blocks of {BLOCK}")
+    for name, t, y in signals():
+        print(f"\n{name}")
+        print(f"{'codec':>6} {'level':>5} {'values':>6} {'ratio':>7} {'enc ms/MB':>10} {'dec ms/MB':>10}")
+        for codec in CODECS:
+            for level in LEVELS[codec]:
+                for values in VALUE_ENCODINGS:
+                    ratio, encode, decode = run(t, y, codec, level, values)
+                    print(f"{codec:>6} {level:>5} {values:>6} {ratio:7.2f} "
+                          f"{1e3 * encode / megabytes:10.1f} {1e3 * decode / megabytes:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""CSV logging throughput: the old per-row csv.writer loop vs. the block encoder.
+
+Run from the repository root:  python -m benchmarks.bench_csv_writer
+"""
+import csv
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.data_logger import DataLogger
+
+SAMPLES = 1_000_000
+BLOCK = 10_000  # samples per logging tick
+
+
+def per_row_loop(path, x_data, y_data, max_file_size):
+    # the previous DataLogger.logg_csv inner loop, kept here as the baseline
+    current_size = os.path.getsize(path) if os.path.exists(path) else 0
+    with open(path, 'a', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        if current_size == 0:
+            writer.writerow(["Time (s)", "Amplitude"])
+        for x, y in zip(x_data, y_data):
+            row = [x, y]
+            row_size = sum(len(str(val)) for val in row) + 2
+            if current_size + row_size > max_file_size:
+                break
+            writer.writerow(row)
+            current_size += row_size
+
+
+def main():
+    t = np.arange(SAMPLES) * 1e-4
+    y = np.sin(2 * np.pi * t) + 0.2 * np.random.randn(SAMPLES)
+    max_file_size = 1 << 40
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        path = os.path.join(directory, "loop.csv")
+        for i in range(0, SAMPLES, BLOCK):
+            per_row_loop(path, t[i:i + BLOCK], y[i:i + BLOCK], max_file_size)
+        loop = time.perf_counter() - start
+
+        logger = DataLogger("block", directory, max_file_size, new_file=False)
+        start = time.perf_counter()
+        for i in range(0, SAMPLES, BLOCK):
+            logger.write_csv(t[i:i + BLOCK], y[i:i + BLOCK])
+        block = time.perf_counter() - start
+        size = os.path.getsize(logger.file_path)
+
+    print(f"{SAMPLES} samples in blocks of {BLOCK}")
+    print(f"per-row loop : {loop:6.2f} s  {SAMPLES / loop / 1e6:6.2f} M samples/s")
+    print(f"block writer : {block:6.2f} s  {SAMPLES / block / 1e6:6.2f} M samples/s  ({size / block / 1e6:.0f} MB/s)")
+    print(f"speedup      : {loop / block:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
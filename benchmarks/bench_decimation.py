@@ -0,0 +1,58 @@
+"""Frame time vs. number of points, with and without M4 decimation.
+
+Run from the repository root:  python -m benchmarks.bench_decimation
+A frame is decimation + curve.setData + an offscreen repaint of a 1000 px wide plot.
+"""
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QApplication
+
+from graph_plotting_functionalities.plotting import random_mixed_signal
+from src.decimation import Decimator
+
+POINTS = [1_000, 10_000, 100_000, 1_000_000]
+FRAMES = 10
+
+
+def frame_time(plot, curve, t, y, decimate):
+    decimator = Decimator()
+    view_box = plot.getViewBox()
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        if decimate:
+            x_range = view_box.viewRange()[0]
+            td, yd = decimator.process(t, y, x_range, view_box.width(), version=frame)
+        else:
+            td, yd = t, y
+        curve.setData(td, yd)
+        plot.grab()  # forces a full repaint
+    return (time.perf_counter() - start) / FRAMES * 1000
+
+
+def main():
+    app = QApplication([])
+    plot = pg.PlotWidget()
+    plot.setAntialiasing(True)
+    plot.resize(1000, 300)
+    plot.show()
+    curve = plot.plot([], [], pen=pg.mkPen("b", width=3))
+
+    print(f"{'points':>10} {'raw ms/frame':>14} {'m4 ms/frame':>14}")
+    for n in POINTS:
+        t = np.arange(n) * 1e-3
+        y = random_mixed_signal(t)
+        plot.setXRange(t[0], t[-1], padding=0)
+        plot.setYRange(-6, 6)
+        app.processEvents()
+        raw = frame_time(plot, curve, t, y, decimate=False)
+        m4 = frame_time(plot, curve, t, y, decimate=True)
+        print(f"{n:>10} {raw:>14.2f} {m4:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
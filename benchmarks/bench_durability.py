@@ -0,0 +1,80 @@
+"""Durability policies: write throughput and fsync count when logging at a high rate.
+
+The logs go to a temporary directory inside the given one (default the current
+directory), fsync costs nothing on a tmpfs so point it at the disk the logs
+would go to. The page cache is flushed before every run, otherwise a run pays
+for the write back of the one before it, and every policy is run REPEATS times
+interleaved with the others, the median is shown.
+
+The throughput differences between the policies are of the order of the run to
+run noise of the encoding, the cost of the policy is the time spent in fsync,
+measured around every call, and its share of the run.
+
+Run from the repository root:  python -m benchmarks.bench_durability [directory]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from src.data_logger import DataLogger
+from src.durability import NO_SYNC, SYNC_BYTES, SYNC_INTERVAL, SYNC_ROTATION, Durability
+
+FLUSHES = 2000
+SAMPLES = 500  # per flush
+REPEATS = 5
+
+
+def run(file_format, durability, blocks, parent):
+    os.sync()
+    with tempfile.TemporaryDirectory(dir=parent) as directory:
+        logger = DataLogger("signal", directory, 1 << 30, new_file=False, durability=durability)
+        start = time.perf_counter()
+        for tick, (t, y) in enumerate(blocks):
+            logger.append(tick, t, y)
+            logger.logg_csv() if file_format == "csv" else logger.logg_binary()
+        logger.close()
+        elapsed = time.perf_counter() - start
+        written = logger.current_size
+    stats = durability.stats()
+    return written / 1e6 / elapsed, stats["sync_seconds"] / elapsed, stats
+
+
+def main():
+    parent = sys.argv[1] if len(sys.argv) > 1 else "."
+    policies = {
+        "no sync": lambda: Durability(NO_SYNC),
+        "every 1 s": lambda: Durability(SYNC_INTERVAL, interval=1.0),
+        "every 0.1 s": lambda: Durability(SYNC_INTERVAL, interval=0.1),
+        "every 1 MB": lambda: Durability(SYNC_BYTES, max_bytes=1 << 20),
+        "on rotation": lambda: Durability(SYNC_ROTATION),
+    }
+    # the samples are made up front, only the logging is timed
+    blocks = []
+    for tick in range(FLUSHES):
+        t = (tick * SAMPLES + np.arange(SAMPLES)) * 1e-3
+        blocks.append((t, np.sin(t)))
+
+    print(f"{FLUSHES} flushes of {SAMPLES} samples into {os.path.abspath(parent)}, median of {REPEATS}")
+    for file_format in ("csv", "bin"):
+        run(file_format, Durability(NO_SYNC), blocks[:100], parent)  # warm up
+        results = {name: [] for name in policies}
+        for _ in range(REPEATS):
+            for name, make in policies.items():
+                results[name].append(run(file_format, make(), blocks, parent))
+
+        print(f"\n{file_format}")
+        print(f"{'policy':>12} {'MB/s':>8} {'syncs':>6} {'sync ms':>8} {'max ms':>8} {'of run':>7}")
+        for name, runs in results.items():
+            rate = np.median([rate for rate, _, _ in runs])
+            share = np.median([share for _, share, _ in runs])
+            total = np.median([stats["sync_seconds"] for _, _, stats in runs])
+            worst = max(stats["max_sync_seconds"] for _, _, stats in runs)
+            print(f"{name:>12} {rate:8.1f} {runs[-1][2]['syncs']:6d} {1e3 * total:8.2f} "
+                  f"{1e3 * worst:8.2f} {share:7.1%}")
+
+
+if __name__ == "__main__":
+    main()
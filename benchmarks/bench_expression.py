@@ -0,0 +1,48 @@
+"""Math graphs: compiled expression plans vs. the hand-coded numpy they replace.
+
+Run from the repository root:  python -m benchmarks.bench_expression
+"""
+import timeit
+
+import numpy as np
+
+from src.expression import compile_expression
+
+SIZES = (1000, 100_000)  # the plot window, a long history
+
+
+def safe_divide(a, b):
+    # what GraphWidget.compute_math_expression used to do for A / B
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.divide(a, b)
+        result[~np.isfinite(result)] = 0
+    return result
+
+
+HAND_CODED = {
+    "A + B": lambda a, b: a + b,
+    "A / B": safe_divide,
+    "sin(A) + 2*B": lambda a, b: np.sin(a) + 2 * b,
+    "(sin(A) + 2*B) * 1.5": lambda a, b: (np.sin(a) + 2 * b) * 1.5,
+    "sqrt(A^2 + B^2) / 2": lambda a, b: np.sqrt(a ** 2 + b ** 2) / 2,
+}
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'expression':>22} {'samples':>8} {'numpy us':>9} {'plan us':>8} {'speedup':>8}")
+    for n in SIZES:
+        a, b = rng.standard_normal(n), rng.standard_normal(n)
+        for text, hand_coded in HAND_CODED.items():
+            expression = compile_expression(text)
+            assert np.allclose(expression.evaluate([a, b]), hand_coded(a, b))
+            number = max(10, 200_000 // n)
+            # best of a few runs, this is about the code, not the noise of the machine
+            numpy_time = min(timeit.repeat(lambda: hand_coded(a, b), number=number, repeat=7)) / number
+            plan_time = min(timeit.repeat(lambda: expression.evaluate([a, b]), number=number, repeat=7)) / number
+            print(f"{text:>22} {n:8d} {numpy_time * 1e6:9.1f} {plan_time * 1e6:8.1f} "
+                  f"{numpy_time / plan_time:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Streaming filters: cost per pushed block, against filtering the whole
+500 sample display window again on every block and against a Python loop
+per sample, and the largest difference to filtering the signal in one go.
+
+Run from the repository root:  python -m benchmarks.bench_filters
+"""
+import timeit
+
+import numpy as np
+
+from src.filters import LOWPASS, Biquad, ExponentialMovingAverage, FIRFilter, MovingAverage, fir_lowpass
+
+RATE = 1000.0
+BLOCKS = (1, 50, 5000)  # samples per block: 20 Hz, 1 kHz and 100 kHz sources at 20 blocks per second
+# uneven splits like the resampler's, with blocks shorter and longer than the filters
+SPLITS = ((1, 7, 30, 49, 50, 51, 63, 64, 65, 99, 130), (37,), (300, 3, 2500))
+WINDOW = 500  # the display buffer
+SAMPLES = 50_000
+
+
+def filters():
+    return {
+        "moving average (50)": lambda: MovingAverage(50),
+        "ema (0.05)": lambda: ExponentialMovingAverage(0.05),
+        "biquad low pass": lambda: Biquad(LOWPASS, 20, RATE),
+        "fir low pass (63)": lambda: FIRFilter(fir_lowpass(20, RATE, 63)),
+    }
+
+
+def stream(stage, x, block):
+    stage.reset()
+    return np.concatenate([stage.process(None, x[i:i + block])[1] for i in range(0, len(x), block)])
+
+
+def split(stage, x, sizes):
+    # blocks cycling through the given sizes
+    out, start, i = [], 0, 0
+    while start < len(x):
+        size = sizes[i % len(sizes)]
+        out.append(stage.process(None, x[start:start + size])[1])
+        start, i = start + size, i + 1
+    return np.concatenate(out)
+
+
+def python_biquad(stage, x):
+    # direct form II transposed, one sample at a time
+    b, a = stage.b, stage.a
+    z1, z2 = stage.steady_state(x[0])
+    out = np.empty(len(x))
+    for i, v in enumerate(x):
+        y = b[0] * v + z1
+        z1 = b[1] * v - a[1] * y + z2
+        z2 = b[2] * v - a[2] * y
+        out[i] = y
+    return out
+
+
+def main():
+    rng = np.random.default_rng(1)
+    t = np.arange(SAMPLES) / RATE
+    x = np.sin(2 * np.pi * 3 * t) + rng.normal(0, 0.3, SAMPLES)
+
+    print(f"{'filter':>20} {'block':>6} {'us/block':>9} {'window us':>10} {'vs one pass':>12}")
+    for name, make in filters().items():
+        whole = make().process(None, x)[1]
+        for block in BLOCKS:
+            stage = make()
+            chunks = [x[i:i + block] for i in range(0, min(len(x), block * 200), block)]
+            number = len(chunks)
+
+            def run():
+                for chunk in chunks:
+                    stage.process(None, chunk)
+            elapsed = min(timeit.repeat(run, number=1, repeat=5)) / number
+
+            # what filtering the display window again costs on every block
+            window = x[:max(WINDOW, block)]
+            again = min(timeit.repeat(lambda: stream(stage, window, len(window)), number=20, repeat=3)) / 20
+
+            error = np.abs(stream(make(), x, block) - whole).max()
+            print(f"{name:>20} {block:6d} {elapsed * 1e6:9.1f} {again * 1e6:10.1f} {error:12.1e}")
+        for sizes in SPLITS:
+            error = np.abs(split(make(), x, sizes) - whole).max()
+            print(f"{name:>20} {'split':>6} {'':>9} {'':>10} {error:12.1e}  blocks of {sizes}")
+
+    stage = Biquad(LOWPASS, 20, RATE)
+    loop = min(timeit.repeat(lambda: python_biquad(stage, x[:5000]), number=1, repeat=3))
+    block = min(timeit.repeat(lambda: stream(stage, x[:5000], 5000), number=1, repeat=3))
+    error = np.abs(python_biquad(stage, x) - stream(stage, x, 50)).max()
+    print(f"\nbiquad, 5000 samples: python loop {loop * 1e3:.2f} ms, sub-block matrices {block * 1e3:.2f} ms, "
+          f"max difference {error:.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Math graphs: recomputing the whole window on a poll timer vs. pushing only the new samples.
+
+Run from the repository root:  python -m benchmarks.bench_incremental_math
+"""
+import time
+
+import numpy as np
+
+from src.alignment import LINEAR
+from src.expression import compile_expression
+from src.incremental import IncrementalExpression
+from src.ring_buffer import RingBuffer
+
+SECONDS = 10  # of simulated acquisition
+BLOCK_RATE = 20  # blocks per second and input, the acquisition emit rate
+POLL_RATE = 20  # the old QTimer.singleShot(50) loop
+WINDOWS = (500, 5000, 50_000)
+SAMPLES = (1, 50)  # per block
+TEXT = "sin(A) + 2*B"
+A_ID, B_ID = 1, 2  # channel ids of the inputs, see src.channel_registry
+
+
+def inputs(window, samples):
+    a, b = RingBuffer(window), RingBuffer(window)
+    t = np.arange(window) * 1e-3
+    a.extend(t, np.sin(t))
+    b.extend(t, np.cos(t))
+    blocks = []
+    for i in range(SECONDS * BLOCK_RATE):
+        t = (window + i * samples + np.arange(samples)) * 1e-3
+        blocks.append((t, np.sin(t), np.cos(t)))
+    return a, b, blocks
+
+
+def polled(window, samples):
+    a, b, blocks = inputs(window, samples)
+    out = RingBuffer(window)
+    expression = compile_expression(TEXT)
+    start = time.process_time()
+    for i, (t, ya, yb) in enumerate(blocks):
+        a.extend(t, ya)
+        b.extend(t, yb)
+        if i % (BLOCK_RATE // POLL_RATE) == 0:
+            (ta, va), (_, vb) = a.view(), b.view()
+            n = min(len(va), len(vb))
+            out.clear()
+            out.extend(ta[:n], expression.evaluate([va[:n], vb[:n]]))
+    return time.process_time() - start, out
+
+
+def pushed(window, samples):
+    a, b, blocks = inputs(window, samples)
+    out = RingBuffer(window)
+    incremental = IncrementalExpression(compile_expression(TEXT), [A_ID, B_ID], window, LINEAR)
+    start = time.process_time()
+    for t, ya, yb in blocks:
+        a.extend(t, ya)
+        b.extend(t, yb)
+        incremental.push(A_ID, t, ya)
+        result = incremental.push(B_ID, t, yb)
+        if result is not None:
+            out.extend(*result)
+    return time.process_time() - start, out
+
+
+def main():
+    print(f"{TEXT}, {SECONDS} s of {BLOCK_RATE} blocks/s per input, CPU ms per simulated second")
+    print(f"{'window':>7} {'samples':>8} {'polled':>8} {'pushed':>8} {'ratio':>7}")
+    for samples in SAMPLES:
+        for window in WINDOWS:
+            (old, old_out), (new, new_out) = polled(window, samples), pushed(window, samples)
+            # the pushed result starts with the first block, past that both have to agree
+            (t_old, y_old), (t_new, y_new) = old_out.view(), new_out.view()
+            n = len(t_new)
+            assert np.array_equal(t_old[-n:], t_new) and np.allclose(y_old[-n:], y_new), "pushed result differs"
+            print(f"{window:7d} {samples:8d} {old * 1e3 / SECONDS:8.2f} {new * 1e3 / SECONDS:8.2f} {old / new:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
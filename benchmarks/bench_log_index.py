@@ -0,0 +1,69 @@
+"""Time range queries over a day of rotated binary logs: full scan vs. the sidecar index.
+
+Run from the repository root:  python -m benchmarks.bench_log_index
+"""
+import tempfile
+import time
+
+import numpy as np
+
+from src.data_logger import DataLogger
+from src.log_format import HEADER_SIZE, RECORD_SIZE, open_binary_log
+from src.log_index import LogReader, find_segments
+
+RATE = 100  # Hz
+SECONDS = 24 * 3600
+BLOCK = 10 * RATE  # samples per logging tick
+SEGMENT = HEADER_SIZE + 3600 * RATE * RECORD_SIZE  # one hour per file
+QUERIES = 20
+
+
+def full_scan(directory, t_start, t_end):
+    # what finding a range took before the index: look into every segment
+    t_parts, y_parts = [], []
+    for path in find_segments(directory, "day", "bin"):
+        _, records = open_binary_log(path)
+        t = np.array(records["t"])
+        keep = (t >= t_start) & (t <= t_end)
+        t_parts.append(t[keep])
+        y_parts.append(np.array(records["y"])[keep])
+    return np.concatenate(t_parts), np.concatenate(y_parts)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        logger = DataLogger("day", directory, SEGMENT, new_file=True, sample_rate=RATE)
+        logger.set_format("bin")
+        for start in range(0, SECONDS * RATE, BLOCK):
+            t = np.arange(start, start + BLOCK) / RATE
+            logger.write_binary(t, np.sin(t))
+        logger.close()
+
+        starts = np.random.default_rng(0).uniform(0, SECONDS - 60, QUERIES)
+
+        begin = time.perf_counter()
+        for t0 in starts:
+            scanned = full_scan(directory, t0, t0 + 60)
+        scan = (time.perf_counter() - begin) / QUERIES
+
+        begin = time.perf_counter()
+        reader = LogReader(directory, "day", "bin")
+        load = time.perf_counter() - begin
+        begin = time.perf_counter()
+        for t0 in starts:
+            indexed = reader.read(t0, t0 + 60)
+        query = (time.perf_counter() - begin) / QUERIES
+
+        assert np.array_equal(scanned[0], indexed[0]) and np.array_equal(scanned[1], indexed[1])
+        segments = len(reader.segments)
+        chunks = len(reader.entries)
+
+    print(f"{SECONDS * RATE} samples in {segments} segments, {chunks} indexed chunks")
+    print(f"index load      : {load * 1e3:8.2f} ms (once)")
+    print(f"full scan       : {scan * 1e3:8.2f} ms per 1 minute query")
+    print(f"indexed query   : {query * 1e3:8.2f} ms per 1 minute query")
+    print(f"speedup         : {scan / query:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Logging many graphs: one DataLogger per graph vs. one MultiChannelLogger.
+
+Run from the repository root:  python -m benchmarks.bench_multi_logger
+"""
+import builtins
+import tempfile
+import time
+
+import numpy as np
+
+from src.data_logger import DataLogger
+from src.multi_logger import MultiChannelLogger
+
+CHANNELS = 32
+FLUSHES = 600  # five minutes of 500 ms logging ticks
+SAMPLES = 10  # per channel and flush, 20 Hz
+
+
+class CountingOpen:
+    """Counts the files opened while logging."""
+
+    def __init__(self):
+        self.count = 0
+        self.open = builtins.open
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self.open(*args, **kwargs)
+
+
+def run(file_format, make_loggers):
+    counter = CountingOpen()
+    with tempfile.TemporaryDirectory() as directory:
+        loggers, flush = make_loggers(directory)
+        builtins.open = counter
+        try:
+            start = time.perf_counter()
+            for tick in range(FLUSHES):
+                t = tick * SAMPLES * 0.05 + np.arange(SAMPLES) * 0.05
+                for logger in loggers:
+                    logger.append(tick, t, np.sin(t))
+                flush(file_format)
+            elapsed = time.perf_counter() - start
+        finally:
+            builtins.open = counter.open
+    return elapsed, counter.count
+
+
+def per_graph(directory):
+    loggers = [DataLogger(f"graph{i}", directory, 1 << 30, new_file=False) for i in range(CHANNELS)]
+
+    def flush(file_format):
+        for logger in loggers:
+            logger.logg_csv() if file_format == "csv" else logger.logg_binary()
+    return loggers, flush
+
+
+def shared(directory):
+    multi = MultiChannelLogger("all", directory, 1 << 30, new_file=False)
+    channels = [multi.add_channel(f"graph{i}", 20) for i in range(CHANNELS)]
+
+    def flush(file_format):
+        multi.logg_csv() if file_format == "csv" else multi.logg_binary()
+    return channels, flush
+
+
+def main():
+    print(f"{CHANNELS} channels, {FLUSHES} flushes of {SAMPLES} samples each")
+    for file_format in ("csv", "bin"):
+        separate, separate_opens = run(file_format, per_graph)
+        single, single_opens = run(file_format, shared)
+        print(f"{file_format}: per graph {separate * 1e3:7.1f} ms, {separate_opens:6d} opens | "
+              f"one file {single * 1e3:7.1f} ms, {single_opens:5d} opens | "
+              f"{separate / single:4.1f}x faster, {separate_opens / single_opens:4.1f}x fewer opens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Resampling a 100 kHz source to 1 kHz: CPU time per second of input and the
+error left by a tone above the new Nyquist frequency, per method.
+
+Run from the repository root:  python -m benchmarks.bench_resample
+"""
+import timeit
+
+import numpy as np
+
+from src.resample import DECIMATE, HOLD, LINEAR, METHODS, Resampler
+
+RATE_IN = 100_000.0
+RATE_OUT = 1000.0
+SECONDS = 2
+BLOCK = 5000  # samples per pushed block, 20 blocks per second
+TONE = 7250.0  # Hz, folds to 250 Hz when nothing filters it out
+
+
+def blocks():
+    t = np.arange(int(RATE_IN * SECONDS)) / RATE_IN
+    y = np.sin(2 * np.pi * 5 * t) + 0.5 * np.sin(2 * np.pi * TONE * t)
+    return [(t[i:i + BLOCK], y[i:i + BLOCK]) for i in range(0, len(t), BLOCK)]
+
+
+def run(method, chunks):
+    resampler = Resampler(RATE_OUT, method, rate_in=RATE_IN)
+    times, values = [], []
+    for t, y in chunks:
+        out_t, out_y = resampler.process(t, y)
+        times.append(out_t)
+        values.append(out_y)
+    return np.concatenate(times), np.concatenate(values)
+
+
+def main():
+    chunks = blocks()
+    print(f"{RATE_IN:.0f} Hz -> {RATE_OUT:.0f} Hz, 5 Hz signal + {TONE:.0f} Hz tone, {len(chunks)} blocks")
+    print(f"{'method':>10} {'ms/s input':>11} {'samples':>8} {'max error':>10}")
+    for method in METHODS:
+        t, y = run(method, chunks)
+        elapsed = min(timeit.repeat(lambda: run(method, chunks), number=1, repeat=5))
+        # error against the signal without the tone, after the filter has settled
+        steady = t > 0.1
+        error = np.abs(y[steady] - np.sin(2 * np.pi * 5 * t[steady])).max()
+        print(f"{method:>10} {elapsed / SECONDS * 1e3:11.2f} {len(t):8d} {error:10.2e}")
+    print(f"\n{DECIMATE}, {HOLD} and {LINEAR} keep the tone (aliased), polyphase filters it out first")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Spectrogram of a 10 kHz channel at 30 FPS: CPU per second for the
+incremental STFT with the in place frame ring, against recomputing the
+STFT of the whole shown window and rebuilding the image every frame.
+Both include turning the image into colours (pyqtgraph's makeARGB), the
+part of setImage that does not depend on the approach.
+
+Run from the repository root:  python -m benchmarks.bench_spectrum
+"""
+import time
+
+import numpy as np
+import pyqtgraph as pg
+
+from src.spectrum import StreamingSTFT
+
+RATE = 10_000.0
+BLOCKS_PER_SECOND = 20  # acquisition emit rate
+FPS = 30
+SIZE = 1024
+ROWS = 200
+SECONDS = 5
+LUT = pg.colormap.get("viridis").getLookupTable(nPts=256)
+
+
+def signal():
+    t = np.arange(int(RATE * SECONDS)) / RATE
+    y = np.sin(2 * np.pi * (200 + 300 * t) * t) + np.random.default_rng(2).normal(0, 0.1, len(t))
+    return t, y
+
+
+def colours(image, top):
+    pg.functions.makeARGB(image, lut=LUT, levels=(top - 80, top))
+
+
+def incremental(t, y):
+    stft = StreamingSTFT(SIZE, RATE)
+    ring = np.full((2 * ROWS, stft.bins), -120.0, dtype=np.float32)
+    pos = 0
+    step = int(RATE / BLOCKS_PER_SECOND)
+    frames_per_block = FPS / BLOCKS_PER_SECOND
+    renders = 0.0
+    for start in range(0, len(y), step):
+        frames = stft.push(t[start:start + step], y[start:start + step])
+        if frames is not None:
+            levels = frames[1][-ROWS:]
+            index = (pos + np.arange(len(levels))) % ROWS
+            ring[index] = levels
+            ring[index + ROWS] = levels
+            pos = (pos + len(levels)) % ROWS
+        # the render clock, about 1.5 frames per block
+        renders += frames_per_block
+        while renders >= 1:
+            renders -= 1
+            colours(ring[pos:pos + ROWS], 0.0)
+
+
+def rebuild(t, y):
+    # the STFT of the last ROWS frames computed again, a new image every frame
+    window = np.hanning(SIZE) * 2 / np.hanning(SIZE).sum()
+    hop = SIZE // 4
+    span = (ROWS - 1) * hop + SIZE
+    for frame in range(int(SECONDS * FPS)):
+        end = int((frame + 1) / FPS * RATE)
+        x = y[max(0, end - span):end]
+        if len(x) < SIZE:
+            continue
+        frames = np.lib.stride_tricks.sliding_window_view(x, SIZE)[::hop]
+        image = (20 * np.log10(np.maximum(np.abs(np.fft.rfft(frames * window, axis=1)), 1e-6))).astype(np.float32)
+        colours(image, 0.0)
+
+
+def main():
+    t, y = signal()
+    print(f"{RATE:.0f} Hz channel, FFT {SIZE}, {ROWS} rows, {FPS} FPS, {SECONDS} s of data")
+    for name, run in (("incremental", incremental), ("rebuild", rebuild)):
+        best = min(_cpu(run, t, y) for _ in range(3))
+        print(f"{name:>12}: {best / SECONDS * 1e3:6.1f} ms CPU per second ({best / SECONDS * 100:.1f}% of a core)")
+
+
+def _cpu(run, t, y):
+    start = time.process_time()
+    run(t, y)
+    return time.process_time() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Streaming statistics of a 10 kHz channel (20 blocks per second): CPU per
+second of StreamingStats, against recomputing them from the whole session
+on every block and against a per sample Python Welford + deque, and the
+rank error of the reservoir percentiles.
+
+Run from the repository root:  python -m benchmarks.bench_stats
+"""
+import time
+from collections import deque
+
+import numpy as np
+
+from src.stats import PERCENTILES, StreamingStats
+
+RATE = 10_000
+BLOCK = RATE // 20
+SECONDS = 60
+WINDOW = 500
+
+
+def streaming(blocks):
+    stats = StreamingStats(window=WINDOW, seed=0)
+    for block in blocks:
+        stats.push(block)
+        stats.window_extremes()
+    stats.percentiles()
+    return stats
+
+
+def recompute(blocks):
+    # what computing them from the kept session would cost, every block
+    session = np.empty(sum(len(block) for block in blocks))
+    filled = 0
+    for block in blocks:
+        session[filled:filled + len(block)] = block
+        filled += len(block)
+        data = session[:filled]
+        data.mean(), data.var(), data.min(), data.max(), data[-WINDOW:].min(), data[-WINDOW:].max()
+        np.percentile(data, PERCENTILES)
+
+
+def per_sample(blocks):
+    count, mean, m2 = 0, 0.0, 0.0
+    lows, highs = deque(), deque()
+    for block in blocks:
+        for value in block.tolist():
+            count += 1
+            delta = value - mean
+            mean += delta / count
+            m2 += delta * (value - mean)
+            while lows and lows[-1][1] >= value:
+                lows.pop()
+            lows.append((count, value))
+            while highs and highs[-1][1] <= value:
+                highs.pop()
+            highs.append((count, value))
+            if lows[0][0] <= count - WINDOW:
+                lows.popleft()
+            if highs[0][0] <= count - WINDOW:
+                highs.popleft()
+
+
+def cpu(run, *args):
+    start = time.process_time()
+    result = run(*args)
+    return time.process_time() - start, result
+
+
+def main():
+    rng = np.random.default_rng(3)
+    x = np.cumsum(rng.normal(size=RATE * SECONDS)) * 0.01
+    blocks = [x[i:i + BLOCK] for i in range(0, len(x), BLOCK)]
+    print(f"{RATE} Hz, {len(blocks)} blocks of {BLOCK} ({SECONDS} s)")
+
+    elapsed, stats = min((cpu(streaming, blocks) for _ in range(3)), key=lambda r: r[0])
+    print(f"{'streaming':>12}: {elapsed / SECONDS * 1e3:8.2f} ms CPU per second")
+    short = blocks[:len(blocks) // 6]  # the others grow or crawl, 10 s is enough to see it
+    for name, run in (("recompute", recompute), ("per sample", per_sample)):
+        elapsed, _ = cpu(run, short)
+        print(f"{name:>12}: {elapsed / (SECONDS / 6) * 1e3:8.2f} ms CPU per second (first {SECONDS // 6} s)")
+
+    print(f"\nmean error {abs(stats.mean - x.mean()):.1e}, std error {abs(stats.std - x.std()):.1e}")
+    for q, value in zip(PERCENTILES, stats.percentiles()):
+        print(f"P{q}: {value:8.4f}, exact rank {np.mean(x < value) * 100:5.2f}%")
+
+
+if __name__ == "__main__":
+    main()
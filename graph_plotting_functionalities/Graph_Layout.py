@@ -4,16 +4,48 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QScrollArea, QLabel,
     QLineEdit, QPushButton, QMessageBox
 )
-from graph_plotting_functionalities.graph_widget import GraphWidget
+import time
+
+from graph_plotting_functionalities.graph_widget import COMPRESSED_FORMATS, DEFAULT_SAMPLE_RATE, GraphWidget
 from graph_plotting_functionalities.plotting import Signal_list
+from graph_plotting_functionalities.spectrum_widget import SpectrumWidget
+from src.alignment import LINEAR
+from src.channel_registry import ChannelRegistry
+from src.data_acquisition import AcquisitionEngine
+from src.log_recovery import recover_log
+from src.log_writer import LogWriter
+from src.multi_logger import MultiChannelLogger
+from src.resample import POLYPHASE
 import numpy as np
 
 
 class Generate_Graph(QWidget):
-    def __init__(self):
+    TARGET_FPS = 30
+
+    def __init__(self, target_fps=TARGET_FPS):
         super().__init__()
         self.setMinimumSize(1000, 800)
         self.graphs = []
+        self.spectra = []  # spectrum views, fed by the graphs they analyse
+        self.channels = ChannelRegistry()  # the graphs by unique channel id
+        self.source_rate = DEFAULT_SAMPLE_RATE  # of the graphs Set creates
+        self.common_rate = None  # every source is resampled to it, None keeps the source rates
+        self.resample_method = POLYPHASE
+        # one acquisition thread drives every graph
+        self.acquisition = AcquisitionEngine(emit_rate=20)
+        # one writer thread does the disk work for every logger
+        self.log_writer = LogWriter()
+        # all graphs log into one multi channel file, flushed together on one timer
+        self.multi_logger = None
+        self.log_format = None
+        self.logging_timer = QTimer(self)
+        self.logging_timer.setInterval(500)
+        self.logging_timer.timeout.connect(self.log_periodically)
+        # single render clock, every graph redraws at most once per frame
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self.render_frame)
+        self.set_target_fps(target_fps)
+        self.render_timer.start()
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
 
@@ -57,63 +89,129 @@ class Generate_Graph(QWidget):
                 QMessageBox.warning(self, "Error", "Please enter a positive number")
                 return
 
-            # Clear old widgets
+            # Release the old channels and clear old widgets
+            for graph in self.graphs + self.spectra:
+                graph.clean_up_worker()
             for i in reversed(range(self.dynamic_graphs_layout.count())):
                 widget = self.dynamic_graphs_layout.itemAt(i).widget()
                 if widget:
                     widget.setParent(None)
 
             self.graphs = []
+            self.spectra = []
+            self.channels.clear()
             signal_names = list(Signal_list.keys())
 
             for i in range(total_graphs):
                 signal_name = signal_names[i % len(signal_names)]
-                graph_widget = GraphWidget(graph_id=i + 1, graph_manager=self, signal1=signal_name, num=total_graphs)
+                graph_widget = GraphWidget(graph_id=i + 1, graph_manager=self, signal1=signal_name, num=total_graphs,
+                                           sample_rate=self.source_rate)
+                graph_widget.set_resampler(self.common_rate, self.resample_method)
+                self.channels.register(graph_widget)
                 self.graphs.append(graph_widget)
                 self.dynamic_graphs_layout.addWidget(graph_widget)
+                self.log_graph(graph_widget)
 
             if self.graphs_updated:
                 self.graphs_updated()
         except ValueError:
             QMessageBox.critical(self, "Error", "Invalid Value")
 
+    def set_common_rate(self, rate, method=POLYPHASE):
+        """Resample every source (not the math graphs, they follow their inputs) to
+        one time base so math, logging and display line up. None turns it off."""
+        self.common_rate = rate
+        self.resample_method = method
+        for graph in self.graphs:
+            if not graph.is_math:
+                graph.set_resampler(rate, method)
+
+    def set_target_fps(self, fps):
+        if fps <= 0:
+            raise ValueError("target fps must be positive")
+        self.target_fps = fps
+        self.render_timer.setInterval(max(1, int(round(1000 / fps))))
+
+    def render_frame(self):
+        for graph in self.graphs:
+            graph.render_frame()
+        for spectrum in self.spectra:
+            spectrum.render_frame()
+
     # === Global Control Methods ===
 
     def start_all(self):
-        for graph in self.graphs:
+        for graph in self.graphs + self.spectra:
             graph.start_plot()
 
     def stop_all(self):
-        for graph in self.graphs:
+        for graph in self.graphs + self.spectra:
             graph.stop_plot()
 
     def reset_all(self):
-        for graph in self.graphs:
+        for graph in self.graphs + self.spectra:
             graph.reset_plot()
 
-    def start_logging_all(self, log_format, destination, max_file_size, create_new_file):
-
+    def start_logging_all(self, log_format, destination, max_file_size, create_new_file, durability=None):
+        if not destination or log_format == "Select format":
+            QMessageBox.warning(self, "Warning", "Please select a destination folder and a log format.")
+            return
+        if self.multi_logger:
+            self.stop_logging_all()
+        # a fresh file per session, named after its start time
+        name = time.strftime("log_%Y%m%d_%H%M%S")
+        # files of this name cut short by a crash or power loss get their torn tails
+        # removed first, on the writer thread ahead of the first write
+        self.log_writer.call(lambda: recover_log(destination, name))
+        self.multi_logger = MultiChannelLogger(name, destination, max_file_size, create_new_file,
+                                               writer=self.log_writer,
+                                               compression=COMPRESSED_FORMATS.get(log_format),
+                                               durability=durability)
+        self.multi_logger.set_format("csv" if log_format == "CSV" else "bin")
+        self.log_format = log_format
         for graph in self.graphs:
-            # graph.size_combo.setCurrentText(size)
-            graph.start_logging(destination, max_file_size, log_format, create_new_file)
+            self.log_graph(graph)
+        self.logging_timer.start()
+
+    def log_graph(self, graph):
+        """Log a graph into the running session, graphs added while logging get their own channel."""
+        if self.multi_logger is None:
+            return
+        channel = self.multi_logger.add_channel(graph.signal_name, graph.output_rate())
+        graph.attach_log_channel(channel, self.log_format)
+
+    def log_periodically(self, force=False):
+        if self.multi_logger:
+            if self.log_format == "CSV":
+                self.multi_logger.logg_csv(force)
+            else:
+                self.multi_logger.logg_binary(force)
 
     def stop_logging_all(self):
+        if not self.multi_logger:
+            return
+        self.logging_timer.stop()
+        self.log_periodically(force=True)  # flush what arrived since the last tick
         for graph in self.graphs:
-            graph.stop_logging()
+            graph.detach_log_channel()
+        self.multi_logger.close()
+        print(f"Log saved in {self.multi_logger.directory} as {self.log_format} "
+              f"({self.multi_logger.signal_name})")
+        if self.multi_logger.compression:
+            self.log_writer.flush()
+            stats = self.multi_logger.compression_stats.report()
+            print(f"compressed {stats['ratio']:.2f}x, {stats['cpu_ms_per_mb']:.1f} ms CPU per MB")
+        self.multi_logger = None
+
+    def get_graph_by_name(self, name):
+        """The graph for a unique name or a label like "Sin #3", None when there is none."""
+        try:
+            return self.channels.get(self.channels.resolve(name))
+        except ValueError:
+            return None
 
-    def get_signal_data_by_name(self, name):
-        for graph in self.graphs:
-            if graph.signal_name == name:
-                if graph.curve is not None:
-                    x_data, y_data = graph.curve.getData()
-                    return x_data, y_data
-                else:
-                    print("Warning: No curve data available for", name)
-                    return None, None
-        print(f"Warning: Signal '{name}' not found in existing graphs.")
-        return None, None
-
-    def add_math_plot(self, input1, input2, operation, constant, expression):
+    def add_math_plot(self, input1, input2, operation, constant, expression, compiled=None, input_ids=None,
+                      join=LINEAR):
 
         """Create a new graph widget for math operation result"""
         try:
@@ -135,7 +233,11 @@ class Generate_Graph(QWidget):
             )
 
             # Configure it as math expression
-            math_graph.set_as_math_expression(input1, input2, operation, constant)
+            math_graph.set_as_math_expression(input1, input2, operation, constant, compiled, input_ids, join)
+
+            # the inputs push their new samples to the math graph, nothing polls them
+            for channel_id in set(math_graph.math_inputs.input_ids):
+                self.channels.get(channel_id).dependents.append(math_graph)
 
             # Update the signal name to reflect the expression
             math_graph.signal_name = expression
@@ -154,8 +256,10 @@ class Generate_Graph(QWidget):
                     legend.addItem(math_graph.curve, expression)  # Add with new name
 
             # Add to graphs list and layout
+            self.channels.register(math_graph)
             self.graphs.append(math_graph)
             self.dynamic_graphs_layout.addWidget(math_graph)
+            self.log_graph(math_graph)
 
             # Start the math plot after a small delay to ensure everything is set up
             QTimer.singleShot(100, math_graph.start_plot)
@@ -166,6 +270,53 @@ class Generate_Graph(QWidget):
             print(f"Traceback: {traceback.format_exc()}")
             QMessageBox.critical(None, "Error", f"Failed to add math plot: {str(e)}")
 
-        except Exception as e:
-            print(f"Error adding math plot: {e}")
-            QMessageBox.critical(None, "Error", f"Failed to add math plot: {str(e)}")
+    def add_spectrum_plot(self, name, size):
+        """Add a live spectrum and spectrogram of the graph with that name or label"""
+        graph = self.get_graph_by_name(name)
+        if graph is None:
+            QMessageBox.critical(None, "Error", f"No signal named '{name}'")
+            return
+        try:
+            spectrum = SpectrumWidget(graph_id=len(self.graphs) + len(self.spectra) + 1, graph_manager=self,
+                                      source=graph, size=size)
+        except ValueError as e:
+            QMessageBox.critical(None, "Error", f"Failed to add spectrum: {str(e)}")
+            return
+        graph.dependents.append(spectrum)
+        self.spectra.append(spectrum)
+        self.dynamic_graphs_layout.addWidget(spectrum)
+        spectrum.start_plot()
+
+    def add_replay_plot(self, path, speed, channel=0):
+        """Create a new graph widget that plays back a channel of a binary log file"""
+        try:
+            new_graph_id = len(self.graphs) + 1
+            signal_names = list(Signal_list.keys())
+            replay_graph = GraphWidget(graph_id=new_graph_id, graph_manager=self, mode="replay",
+                                       signal1=signal_names[0], num=new_graph_id)
+            replay_graph.set_as_replay(path, speed, channel)
+
+            # resampled like the live sources when the log knows its rate
+            if replay_graph.replay.header["sample_rate"] > 0:
+                replay_graph.sample_rate = replay_graph.replay.header["sample_rate"]
+                replay_graph.set_resampler(self.common_rate, self.resample_method)
+
+            name = f"Replay: {replay_graph.replay.header['channel_name']}"
+            replay_graph.signal_name = name
+            replay_graph.graph_template.plot.setTitle(name)
+            legend = replay_graph.graph_template.plot.plotItem.legend
+            if legend:
+                legend.removeItem(replay_graph.curve)
+                legend.addItem(replay_graph.curve, name)
+
+            self.channels.register(replay_graph)
+            self.graphs.append(replay_graph)
+            self.dynamic_graphs_layout.addWidget(replay_graph)
+            self.log_graph(replay_graph)
+            if self.graphs_updated:
+                self.graphs_updated()
+            replay_graph.start_plot()
+
+        except (OSError, ValueError) as e:
+            print(f"Error adding replay plot: {e}")
+            QMessageBox.critical(None, "Error", f"Failed to replay log: {str(e)}")
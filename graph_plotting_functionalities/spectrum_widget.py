@@ -0,0 +1,128 @@
+# === spectrum_widget.py ===
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QRectF
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+
+from graph_plotting_functionalities.Graph_Template import GraphTemplate
+from src.spectrum import FLOOR_DB, StreamingSTFT
+
+SPECTROGRAM_ROWS = 200  # frames the spectrogram shows
+DYNAMIC_RANGE = 80.0  # dB between the loudest level seen and the bottom of the colour scale
+
+
+class SpectrumWidget(QWidget):
+    """Live spectrum (latest frame) and scrolling spectrogram of another graph.
+
+    A dependent of its source graph like the math graphs: every block the
+    source receives is pushed to the STFT. The spectrogram frames live in a
+    ring written twice (at i and i + rows), so the last `rows` frames are
+    always one contiguous slice. The ImageItem keeps one image array for good,
+    a frame with new rows copies the slice into it and calls updateImage().
+    """
+
+    def __init__(self, graph_id, graph_manager, source, size=1024, rows=SPECTROGRAM_ROWS):
+        super().__init__()
+        self.graph_id = graph_id
+        self.graph_manager = graph_manager
+        self.source = source
+        self.source_label = graph_manager.channels.label(source.channel_id)
+        self.signal_name = f"Spectrum: {self.source_label}"
+        self.size = size
+        self.rows = rows
+        self.active = False
+        self.dirty = False
+        self.initUI()
+        self.setup_stft(source.output_rate())
+
+    def initUI(self):
+        layout = QVBoxLayout()
+        layout.setSpacing(5)
+        layout.setContentsMargins(10, 10, 10, 10)
+
+        self.spectrum_template = GraphTemplate(title=self.signal_name, xlabel="Frequency (Hz)",
+                                               ylabel="Level (dB)", height=250)
+        self.curve = self.spectrum_template.plot.plot([], [], pen=pg.mkPen(color="b", width=2))
+        layout.addWidget(self.spectrum_template)
+
+        self.spectrogram_template = GraphTemplate(title=f"Spectrogram: {self.source_label}",
+                                                  xlabel="Time (s)", ylabel="Frequency (Hz)", height=300)
+        self.image_item = pg.ImageItem()
+        self.image_item.setLookupTable(pg.colormap.get("viridis").getLookupTable(nPts=256))
+        self.spectrogram_template.plot.addItem(self.image_item)
+        layout.addWidget(self.spectrogram_template)
+        self.setLayout(layout)
+
+    def setup_stft(self, rate):
+        self.rate = rate
+        self.stft = StreamingSTFT(self.size, rate)
+        self.frame_dt = self.stft.hop / rate
+        # each frame is written at i and i + rows, frames [pos, pos + rows) are the last `rows`
+        self.ring = np.full((2 * self.rows, self.stft.bins), FLOOR_DB, dtype=np.float32)
+        self.pos = 0
+        self.image = np.empty((self.rows, self.stft.bins), dtype=np.float32)  # what the ImageItem shows
+        self.image_set = False  # handed to the ImageItem on the first frame
+        self.last_time = None
+        self.latest = None
+        self.top = None  # loudest level seen, the colour scale hangs from it
+        self.spectrum_template.plot.setXRange(0, rate / 2)
+        self.spectrogram_template.plot.setYRange(0, rate / 2)
+
+    def on_input_samples(self, channel_id, t, y):
+        if not self.active:
+            return
+        if self.source.output_rate() != self.rate:  # resampled to another common rate
+            self.setup_stft(self.source.output_rate())
+        frames = self.stft.push(t, y)
+        if frames is None:
+            return
+        times, levels = frames
+        levels = levels[-self.rows:]  # older frames would be overwritten straight away
+        count = len(levels)
+        index = (self.pos + np.arange(count)) % self.rows
+        self.ring[index] = levels
+        self.ring[index + self.rows] = levels
+        self.pos = (self.pos + count) % self.rows
+        self.last_time = times[-1]
+        self.latest = levels[-1]
+        top = float(levels.max())
+        self.top = top if self.top is None else max(self.top, top)
+        self.dirty = True
+
+    def is_on_screen(self):
+        return self.isVisible() and not self.visibleRegion().isEmpty()
+
+    def render_frame(self):
+        # once per frame at most, like the time domain graphs
+        if not self.dirty or not self.is_on_screen():
+            return
+        self.dirty = False
+        self.curve.setData(self.stft.frequencies, self.latest)
+        np.copyto(self.image, self.ring[self.pos:self.pos + self.rows])
+        levels = (self.top - DYNAMIC_RANGE, self.top)
+        if self.image_set:
+            self.image_item.updateImage(autoLevels=False, levels=levels)
+        else:
+            self.image_item.setImage(self.image, autoLevels=False, levels=levels)
+            self.image_set = True
+        # x is time, the newest frame on the right; y is frequency
+        span = self.rows * self.frame_dt
+        self.image_item.setRect(QRectF(self.last_time - span, 0, span, self.rate / 2))
+
+    def start_plot(self):
+        self.active = True
+
+    def stop_plot(self):
+        self.active = False
+
+    def reset_plot(self):
+        self.stop_plot()
+        self.setup_stft(self.source.output_rate())
+        self.curve.setData([], [])
+        self.image_item.clear()
+        self.dirty = False
+
+    def clean_up_worker(self):
+        # nothing runs on its own, it only has to stop being fed
+        if self in self.source.dependents:
+            self.source.dependents.remove(self)
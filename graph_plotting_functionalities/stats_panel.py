@@ -0,0 +1,45 @@
+# === stats_panel.py ===
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QGroupBox, QFormLayout, QLabel
+
+from src.stats import PERCENTILES
+
+ROWS = ["Count", "Mean", "Std", "RMS", "Min", "Max", "Window min", "Window max"] + \
+       [f"P{q}" for q in PERCENTILES]
+
+
+class StatsPanel(QGroupBox):
+    """Compact read out of a channel's StreamingStats, refreshed by the graph's render_frame."""
+
+    def __init__(self, stats, parent=None):
+        super().__init__("Statistics", parent)
+        self.stats = stats
+        self.shown_version = -1
+        self.setFixedWidth(170)
+        layout = QFormLayout()
+        layout.setContentsMargins(5, 5, 5, 5)
+        layout.setVerticalSpacing(2)
+        self.values = {}
+        for name in ROWS:
+            value = QLabel("-")
+            value.setAlignment(Qt.AlignRight)
+            value.setTextInteractionFlags(Qt.TextSelectableByMouse)
+            layout.addRow(name, value)
+            self.values[name] = value
+        self.setLayout(layout)
+
+    def refresh(self):
+        stats = self.stats
+        if stats.version == self.shown_version:
+            return
+        self.shown_version = stats.version
+        if stats.count == 0:
+            for value in self.values.values():
+                value.setText("-")
+            return
+        window_min, window_max = stats.window_extremes()
+        numbers = [stats.mean, stats.std, stats.rms, stats.minimum, stats.maximum, window_min, window_max]
+        numbers += list(stats.percentiles())
+        self.values["Count"].setText(str(stats.count))
+        for name, number in zip(ROWS[1:], numbers):
+            self.values[name].setText(f"{number:.4g}")
@@ -0,0 +1,133 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QComboBox, QLineEdit,
+    QPushButton, QMessageBox, QCheckBox
+)
+
+from src.filters import (
+    HIGHPASS, LOWPASS, NOTCH, BUTTERWORTH_Q, Biquad, ExponentialMovingAverage, FIRFilter, MovingAverage,
+    fir_lowpass
+)
+
+NO_FILTER = "None (raw signal)"
+# filter choices and the parameters they take
+FILTER_TYPES = {
+    NO_FILTER: (),
+    "Moving average": ("length",),
+    "Exponential moving average": ("alpha",),
+    "Low pass (biquad)": ("cutoff", "q"),
+    "High pass (biquad)": ("cutoff", "q"),
+    "Notch (biquad)": ("cutoff", "q"),
+    "Low pass (FIR)": ("cutoff", "length"),
+}
+
+
+class FilterDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle("Signal Filters")
+        self.setGeometry(300, 300, 300, 300)
+        self.result = None
+        self._init_ui()
+
+    def _init_ui(self):
+        layout = QVBoxLayout()
+
+        self.channels = self.parent.generate_graph_widget.channels
+        self.channel_input = QComboBox()
+        self.channel_input.addItem("Select a Signal")
+        for label in self.channels.labels():
+            self.channel_input.addItem(label)
+        self.channel_input.currentTextChanged.connect(self.on_channel_changed)
+        layout.addWidget(QLabel("Signal"))
+        layout.addWidget(self.channel_input)
+
+        self.type_input = QComboBox()
+        self.type_input.addItems(list(FILTER_TYPES.keys()))
+        self.type_input.currentTextChanged.connect(self.on_type_changed)
+        layout.addWidget(QLabel("Filter"))
+        layout.addWidget(self.type_input)
+
+        self.rate_label = QLabel("Sample rate: -")
+        layout.addWidget(self.rate_label)
+
+        self.parameters = {}
+        for name, label, placeholder in [
+            ("length", "Length (samples)", "e.g. 10"),
+            ("alpha", "Alpha (0 - 1, smaller is smoother)", "e.g. 0.1"),
+            ("cutoff", "Cutoff (Hz)", "e.g. 2"),
+            ("q", "Q", f"{BUTTERWORTH_Q:.3f} (Butterworth)"),
+        ]:
+            field = QLineEdit()
+            field.setPlaceholderText(placeholder)
+            layout.addWidget(QLabel(label))
+            layout.addWidget(field)
+            self.parameters[name] = field
+
+        # a new filter goes after the ones the signal already has, unless they are replaced
+        self.replace_input = QCheckBox("Replace the filters the signal already has")
+        layout.addWidget(self.replace_input)
+
+        apply_btn = QPushButton("Apply")
+        apply_btn.clicked.connect(self.on_apply_clicked)
+        layout.addWidget(apply_btn)
+
+        self.setLayout(layout)
+        self.on_type_changed(self.type_input.currentText())
+
+    def selected_graph(self):
+        try:
+            return self.channels.get(self.channels.resolve(self.channel_input.currentText()))
+        except ValueError:
+            return None
+
+    def on_channel_changed(self, _):
+        graph = self.selected_graph()
+        if graph is None:
+            self.rate_label.setText("Sample rate: -")
+            return
+        names = ", ".join(type(stage).__name__ for stage in graph.filters()) or "none"
+        self.rate_label.setText(f"Sample rate: {graph.output_rate():g} Hz, filters: {names}")
+
+    def on_type_changed(self, text):
+        for name, field in self.parameters.items():
+            field.setEnabled(name in FILTER_TYPES[text])
+
+    def value(self, name, default=None):
+        text = self.parameters[name].text().strip()
+        if not text:
+            if default is None:
+                raise ValueError(f"please enter the {name}")
+            return default
+        return float(text)
+
+    def build_filter(self, kind, rate):
+        if kind == "Moving average":
+            return MovingAverage(int(self.value("length")))
+        if kind == "Exponential moving average":
+            return ExponentialMovingAverage(self.value("alpha"))
+        if kind == "Low pass (FIR)":
+            return FIRFilter(fir_lowpass(self.value("cutoff"), rate, int(self.value("length", 31))))
+        biquads = {"Low pass (biquad)": LOWPASS, "High pass (biquad)": HIGHPASS, "Notch (biquad)": NOTCH}
+        return Biquad(biquads[kind], self.value("cutoff"), rate, self.value("q", BUTTERWORTH_Q))
+
+    def on_apply_clicked(self):
+        graph = self.selected_graph()
+        if graph is None:
+            QMessageBox.critical(self, "Error", "Please select a signal")
+            return
+        kind = self.type_input.currentText()
+        # "None" takes the signal back to raw
+        filters = [] if self.replace_input.isChecked() or kind == NO_FILTER else graph.filters()
+        if kind != NO_FILTER:
+            try:
+                filters.append(self.build_filter(kind, graph.output_rate()))
+            except ValueError as e:
+                QMessageBox.critical(self, "Error", f"Invalid filter: {e}")
+                return
+
+        self.result = {"channel_id": graph.channel_id, "filters": filters}
+        self.accept()
+
+    def get_result(self):
+        return self.result
@@ -4,6 +4,9 @@ from PyQt5.QtWidgets import (
 )
 
 from graph_plotting_functionalities.Graph_Layout import Generate_Graph
+from src.alignment import ASOF, LINEAR
+from src.expression import BINARY_FUNCTIONS, CONSTANTS, FUNCTIONS, compile_expression
+from src.math_functions import PRESET_OPERATIONS, preset_expression
 
 
 class MathDialog(QDialog):
@@ -24,10 +27,11 @@ class MathDialog(QDialog):
         self.user_input1.addItem("Select a Signal")
         self.user_input2.addItem("Select a Signal")
 
-        for graph in self.parent.generate_graph_widget.graphs:
-            signal_name = graph.signal_name
-            self.user_input1.addItem(signal_name)
-            self.user_input2.addItem(signal_name)
+        # labels tell graphs with the same name apart ("Sin #9")
+        self.channels = self.parent.generate_graph_widget.channels
+        for label in self.channels.labels():
+            self.user_input1.addItem(label)
+            self.user_input2.addItem(label)
 
         for label, combo in [("Signal A", self.user_input1), ("Signal B", self.user_input2)]:
             layout.addWidget(QLabel(label))
@@ -35,13 +39,28 @@ class MathDialog(QDialog):
 
         # Operation selection
         self.operations = QComboBox()
-        self.operations.addItems([
-            "Choose an operation", "A + B", "A - B", "A * B", "A / B",
-            "sin(A)", "cos(B)", "sin(A) + 2*B"
-        ])
+        self.operations.addItems(["Choose an operation"] + PRESET_OPERATIONS)
+        self.operations.setToolTip("k is the optional constant below, 1 when it is empty")
         layout.addWidget(QLabel("Math Operation Selection"))
         layout.addWidget(self.operations)
 
+        # Custom expression, used instead of the operation when filled in
+        self.custom_input = QLineEdit()
+        self.custom_input.setPlaceholderText('e.g. sqrt(A^2 + B^2) / 2 or "Graph name" * 3')
+        self.custom_input.setToolTip(
+            "A and B are the selected signals, other signals by name or label (\"Sin #9\", quoted if needed)\n"
+            f"Functions: {', '.join(list(FUNCTIONS) + list(BINARY_FUNCTIONS))}\n"
+            f"Constants: {', '.join(CONSTANTS)}. Division by zero gives 0")
+        layout.addWidget(QLabel("Custom Expression (optional)"))
+        layout.addWidget(self.custom_input)
+
+        # How the inputs are paired, on the time stamps of the first one
+        self.join_input = QComboBox()
+        self.join_input.addItem("Interpolate", LINEAR)
+        self.join_input.addItem("Last value (as-of)", ASOF)
+        layout.addWidget(QLabel("Align Inputs On Time"))
+        layout.addWidget(self.join_input)
+
         # Optional constant
         self.constant_input = QLineEdit()
         self.constant_input.setPlaceholderText("Optional constant (e.g., 2, 1.5)")
@@ -68,32 +87,56 @@ class MathDialog(QDialog):
     def get_user_input(self):
         input1 = self.user_input1.currentText()
         input2 = self.user_input2.currentText()
-        operation = self.operations.currentText()
+        operation = self.custom_input.text().strip() or self.operations.currentText()
         constant = self.constant_input.text().strip()
 
         if operation == "Choose an operation":
-            QMessageBox.critical(self, "Error", "Please choose a math operation")
+            QMessageBox.critical(self, "Error", "Please choose a math operation or enter an expression")
             return None
 
+        if self.custom_input.text().strip():
+            # parsed and checked once here, the graph only evaluates the compiled plan
+            aliases = {alias: name for alias, name in (("A", input1), ("B", input2)) if name != "Select a Signal"}
+            try:
+                compiled = compile_expression(operation, aliases)
+                input_ids = [self.channels.resolve(name) for name in compiled.inputs]
+            except ValueError as e:  # ExpressionError included
+                QMessageBox.critical(self, "Error", f"Invalid expression: {e}")
+                return None
+            if constant:
+                QMessageBox.critical(self, "Error", "Put constants into the custom expression itself")
+                return None
+            return input1, input2, operation, constant, compiled, input_ids
+
         if ("A" in operation and input1 == "Select a Signal") or \
                 ("B" in operation and input2 == "Select a Signal"):
             QMessageBox.critical(self, "Error", "Please select required signal(s)")
             return None
 
-        return input1, input2, operation, constant
-
-    def on_preview_clicked(self):
-        values = self.get_user_input()
-        if not values:
-            return
+        try:
+            compiled = preset_expression(operation, input1, input2, constant)
+        except ValueError:
+            QMessageBox.critical(self, "Error", f"Invalid constant: {constant}")
+            return None
+        return input1, input2, operation, constant, compiled, [self.channels.resolve(name) for name in compiled.inputs]
 
-        input1, input2, operation, constant = values
+    def describe(self, input1, input2, operation):
+        if self.custom_input.text().strip():
+            return operation
         if operation in ["A + B", "A - B", "A * B", "A / B"]:
             symbol = operation[2]
             expression = f"{input1} {symbol} {input2}"
         else:
             expression = operation.replace("A", input1).replace("B", input2)
+        return expression
 
+    def on_preview_clicked(self):
+        values = self.get_user_input()
+        if not values:
+            return
+
+        input1, input2, operation, constant, _, _ = values
+        expression = self.describe(input1, input2, operation)
         if constant:
             expression += f" | Constant: {constant}"
 
@@ -104,13 +147,8 @@ class MathDialog(QDialog):
         if not values:
             return
 
-        input1, input2, operation, constant = values
-        if operation in ["A + B", "A - B", "A * B", "A / B"]:
-            symbol = operation[2]
-            expression = f"{input1} {symbol} {input2}"
-        else:
-            expression = operation.replace("A", input1).replace("B", input2)
-
+        input1, input2, operation, constant, compiled, input_ids = values
+        expression = self.describe(input1, input2, operation)
         if constant:
             expression += f" | Const={constant}"
 
@@ -119,7 +157,10 @@ class MathDialog(QDialog):
             "input2": input2,
             "operation": operation,
             "constant": constant,
-            "expression": expression
+            "expression": expression,
+            "compiled": compiled,
+            "input_ids": input_ids,
+            "join": self.join_input.currentData()
         }
         print("Result:", self.result)
         self.accept()
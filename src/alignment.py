@@ -0,0 +1,52 @@
+import numpy as np
+
+# how a stream is sampled at the time stamps of another one
+ASOF = "asof"  # the last sample at or before the time stamp
+LINEAR = "linear"  # linear interpolation between the samples around it
+JOINS = (ASOF, LINEAR)
+
+
+def sample_at(t, t_ref, y_ref, join=LINEAR):
+    """Values of the stream (t_ref, y_ref) at the time stamps t, both sorted.
+
+    Returns (values, valid): valid is False where t is outside the span of the
+    stream (before its first sample, and after its last for LINEAR), the
+    values there are meaningless.
+    """
+    if join not in JOINS:
+        raise ValueError(f"unknown join '{join}', expected one of {JOINS}")
+    if len(t_ref) == 0:
+        return np.zeros(len(t)), np.zeros(len(t), dtype=bool)
+    # index of the first reference sample after each time stamp
+    right = np.searchsorted(t_ref, t, side="right")
+    left = np.maximum(right - 1, 0)
+    if join == ASOF:
+        return y_ref[left], right > 0
+    right = np.minimum(right, len(t_ref) - 1)
+    t0, t1 = t_ref[left], t_ref[right]
+    span = t1 - t0
+    # exact hits and the last sample have no span, they take the left value
+    weight = np.divide(t - t0, span, out=np.zeros(len(t)), where=span > 0)
+    values = y_ref[left] + weight * (y_ref[right] - y_ref[left])
+    return values, (t >= t_ref[0]) & (t <= t_ref[-1])
+
+
+def overlap(*times):
+    """(start, end) of the time span all the streams cover, None when they do not overlap."""
+    start = max(t[0] for t in times)
+    end = min(t[-1] for t in times)
+    return (start, end) if start <= end else None
+
+
+def align(streams, join=LINEAR):
+    """Join streams [(t, y), ...] on the time stamps of the first one, over the
+    window they all cover. Returns (t, [y of every stream at t])."""
+    if any(len(t) == 0 for t, _ in streams):
+        return np.empty(0), [np.empty(0) for _ in streams]
+    window = overlap(*[t for t, _ in streams])
+    t, y = streams[0]
+    if window is None:
+        return t[:0], [y[:0] for _ in streams]
+    start, end = np.searchsorted(t, window[0], side="left"), np.searchsorted(t, window[1], side="right")
+    t = t[start:end]
+    return t, [y[start:end]] + [sample_at(t, t_ref, y_ref, join)[0] for t_ref, y_ref in streams[1:]]
@@ -0,0 +1,69 @@
+class ChannelRegistry:
+    """Graphs by unique channel id, with O(1) lookup by id and by name.
+
+    Names do not have to be unique (two "Sin" graphs), label() adds the id to
+    the ones that are not so every channel can be told apart by its label.
+    """
+
+    def __init__(self):
+        self.channels = {}  # channel id -> graph, in registration order
+        self.names = {}  # name -> [channel ids]
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.channels)
+
+    def __iter__(self):
+        return iter(self.channels.values())
+
+    def __contains__(self, channel_id):
+        return channel_id in self.channels
+
+    def register(self, graph):
+        """Give the graph a channel id (graph.channel_id) and make it findable by graph.signal_name."""
+        channel_id = self.next_id
+        self.next_id += 1
+        graph.channel_id = channel_id
+        self.channels[channel_id] = graph
+        self.names.setdefault(graph.signal_name, []).append(channel_id)
+        return channel_id
+
+    def unregister(self, channel_id):
+        graph = self.channels.pop(channel_id, None)
+        if graph is None:
+            return
+        ids = self.names[graph.signal_name]
+        ids.remove(channel_id)
+        if not ids:
+            del self.names[graph.signal_name]
+
+    def clear(self):
+        self.channels.clear()
+        self.names.clear()
+
+    def get(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def label(self, channel_id):
+        name = self.channels[channel_id].signal_name
+        return name if len(self.names[name]) == 1 else f"{name} #{channel_id}"
+
+    def labels(self):
+        return [self.label(channel_id) for channel_id in self.channels]
+
+    def resolve(self, reference):
+        """Channel id for an id, a label ("Sin #3") or a name that only one channel has."""
+        if isinstance(reference, int):
+            if reference not in self.channels:
+                raise ValueError(f"no channel #{reference}")
+            return reference
+        ids = self.names.get(reference)
+        if ids and len(ids) == 1:
+            return ids[0]
+        if ids:
+            choices = ", ".join(f"'{reference} #{channel_id}'" for channel_id in ids)
+            raise ValueError(f"'{reference}' is ambiguous, use one of {choices}")
+        name, _, number = reference.rpartition(" #")
+        if number.isdigit() and int(number) in self.channels and self.channels[int(number)].signal_name == name:
+            return int(number)
+        raise ValueError(f"no channel named '{reference}'")
@@ -0,0 +1,153 @@
+import numpy as np
+
+CSV_HEADER = b"Time (s),Amplitude\n"
+MULTI_CSV_HEADER = b"Channel,Time (s),Amplitude\n"  # multi channel logs, see src.multi_logger
+DEFAULT_PRECISION = 6
+
+_ZERO, _MINUS, _DOT, _COMMA, _NEWLINE = (ord(c) for c in "0-.,\n")
+_POWERS = 10 ** np.arange(19, dtype=np.int64)
+
+
+def _product_error(a, b):
+    """a * b - fl(a * b), exactly (Dekker's two product)."""
+    product = a * b
+    split = 134217729.0  # 2 ** 27 + 1
+    a_big, b_big = a * split, b * split
+    a_high, b_high = a_big - (a_big - a), b_big - (b_big - b)
+    a_low, b_low = a - a_high, b - b_high
+    return ((a_high * b_high - product) + a_high * b_low + a_low * b_high) + a_low * b_low
+
+
+def _round_scaled(fraction, scale, whole):
+    """fraction * scale rounded to an integer like printf does: on the exact
+    value, ties to even.
+
+    The product is rounded once already, when it lands on a half the exact
+    value may be just above or below it, the sign of the rounding error says
+    which. whole is the integer part, its last digit is the one a tie rounds
+    to even when scale is 1. Needs fraction * scale below 2 ** 52.
+    """
+    scaled = fraction * scale
+    floor = np.floor(scaled)
+    rest = scaled - floor
+    up = rest > 0.5
+    half = np.flatnonzero(rest == 0.5)
+    if len(half):
+        error = _product_error(fraction[half], scale)
+        last = floor[half] if scale > 1 else whole[half]
+        up[half] = (error > 0) | ((error == 0) & (last % 2 == 1))
+    return floor.astype(np.int64) + up
+
+
+def _split_fixed_point(values, precision):
+    """Sign, integer part, fraction digits and integer digit count of every value."""
+    negative = np.signbit(values)
+    magnitude = np.abs(values)
+    int_part = np.floor(magnitude)
+    # the fraction is exact in float64, so only the last printed digit is rounded
+    frac_part = _round_scaled(magnitude - int_part, float(_POWERS[precision]), int_part)
+    int_part = int_part.astype(np.int64)
+    carry = frac_part == _POWERS[precision]
+    int_part[carry] += 1
+    frac_part[carry] = 0
+    int_digits = np.maximum(np.searchsorted(_POWERS, int_part, side="right"), 1)
+    return negative, int_part, frac_part, int_digits
+
+
+def _fill_fixed_point(chars, used, parts, precision):
+    """Write %.{precision}f of every value into the (n, width) character block.
+
+    All values share the same layout, `used` marks the characters that are really
+    part of the number (no leading zeros, sign only when negative).
+    """
+    negative, int_part, frac_part, int_digits = parts
+    width = chars.shape[1] - 2 - precision
+    chars[:, 0] = _MINUS
+    used[:, 0] = negative
+    for k in range(width):
+        power = width - 1 - k
+        chars[:, 1 + k] = _ZERO + (int_part // _POWERS[power]) % 10
+        used[:, 1 + k] = int_digits > power
+    chars[:, 1 + width] = _DOT
+    used[:, 1 + width] = precision > 0
+    for k in range(precision):
+        chars[:, 2 + width + k] = _ZERO + (frac_part // _POWERS[precision - 1 - k]) % 10
+
+
+def _can_use_fixed_point(values, precision):
+    # integer and fraction parts go through int64, which holds about 9.2e18, and the
+    # scaled fraction has to stay below 2 ** 52 to be rounded exactly
+    return precision <= 15 and np.isfinite(values).all() and np.abs(values).max(initial=0.0) < 9e18
+
+
+def encode_csv_block(t, y, precision=DEFAULT_PRECISION):
+    """Format a whole block as "t,y\\n" rows in one go, byte for byte what
+    "%.{precision}f" gives.
+
+    Returns the encoded bytes and the byte offset where each row ends, so the
+    caller can split the block at a row boundary when a file has to rotate.
+    """
+    t = np.asarray(t, dtype=np.float64).ravel()
+    y = np.asarray(y, dtype=np.float64).ravel()
+    n = len(t)
+    if n == 0:
+        return b"", np.empty(0, dtype=np.int64)
+
+    if _can_use_fixed_point(t, precision) and _can_use_fixed_point(y, precision):
+        t_parts = _split_fixed_point(t, precision)
+        y_parts = _split_fixed_point(y, precision)
+        t_width = 2 + int(t_parts[3].max()) + precision
+        y_width = 2 + int(y_parts[3].max()) + precision
+        # one preallocated character block for the whole block: t , y \n
+        chars = np.empty((n, t_width + 1 + y_width + 1), dtype=np.uint8)
+        used = np.ones(chars.shape, dtype=bool)
+        _fill_fixed_point(chars[:, :t_width], used[:, :t_width], t_parts, precision)
+        chars[:, t_width] = _COMMA
+        _fill_fixed_point(chars[:, t_width + 1:-1], used[:, t_width + 1:-1], y_parts, precision)
+        chars[:, -1] = _NEWLINE
+        data = chars[used].tobytes()
+        row_ends = np.cumsum(used.sum(axis=1))
+        return data, row_ends
+
+    # nan/inf or huge values, fall back to printf formatting of the whole block at once
+    values = np.empty(2 * n)
+    values[0::2] = t
+    values[1::2] = y
+    data = ((f"%.{precision}f,%.{precision}f\n" * n) % tuple(values.tolist())).encode("ascii")
+    row_ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == _NEWLINE) + 1
+    return data, row_ends
+
+
+def prefix_rows(data, row_ends, prefixes, counts):
+    """Put bytes in front of every encoded row, e.g. a channel name column.
+
+    The rows come in runs, counts[k] rows in a row get prefixes[k].
+    """
+    n = len(row_ends)
+    if n == 0:
+        return data, row_ends
+    widths = np.repeat([len(prefix) for prefix in prefixes], counts)
+    shifts = np.cumsum(widths)
+    row_starts = np.r_[0, row_ends[:-1]] + shifts - widths
+    # every prefix byte, in file order, and where it goes
+    prefix_bytes = np.frombuffer(b"".join(prefix * int(count) for prefix, count in zip(prefixes, counts)),
+                                 dtype=np.uint8)
+    positions = np.repeat(row_starts, widths) + np.arange(len(prefix_bytes)) - np.repeat(shifts - widths, widths)
+    out = np.empty(len(data) + len(prefix_bytes), dtype=np.uint8)
+    is_prefix = np.zeros(len(out), dtype=bool)
+    is_prefix[positions] = True
+    out[positions] = prefix_bytes
+    out[~is_prefix] = np.frombuffer(data, dtype=np.uint8)
+    return out.tobytes(), row_ends + shifts
+
+
+def strip_rows(data, width):
+    """Drop the first `width` bytes of every row, the inverse of prefix_rows."""
+    if width == 0 or not data:
+        return data
+    chars = np.frombuffer(data, dtype=np.uint8)
+    row_starts = np.r_[0, np.flatnonzero(chars == _NEWLINE)[:-1] + 1]
+    keep = np.ones(len(chars), dtype=bool)
+    for k in range(width):
+        keep[row_starts + k] = False
+    return chars[keep].tobytes()
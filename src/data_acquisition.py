@@ -0,0 +1,122 @@
+from PyQt5.QtCore import QObject, QThread, QCoreApplication, pyqtSignal, pyqtSlot
+
+from src.data_worker import DataWorker
+from src.scheduler import CATCH_UP, DeadlineScheduler
+
+
+class AcquisitionWorker(QObject):
+    """Drives every registered channel from a single thread.
+
+    On each tick all running channels generate their due samples and the whole
+    batch crosses to the GUI thread as one queued signal.
+    """
+    blocks_ready = pyqtSignal(object)  # {channel_id: (generator, seq, t, y)}
+
+    def __init__(self, emit_rate=20, policy=CATCH_UP):
+        super().__init__()
+        self.running = False
+        # replaced as a whole by the GUI thread (copy on write), never mutated in place
+        self.channels = {}
+        self.scheduler = DeadlineScheduler(1.0 / emit_rate, policy=policy)
+
+    @pyqtSlot()
+    def start_work(self):
+        # running is set by whoever starts the thread, a stop that comes before this slot runs must win
+        self.scheduler.start()
+        period = self.scheduler.period
+
+        while self.running:
+            periods = self.scheduler.wait()
+            skipped = (periods - 1) * period
+
+            blocks = {}
+            for channel_id, generator in self.channels.items():
+                if not generator.running:
+                    continue
+                block = generator.acquire(period, skipped)
+                if block is not None:
+                    blocks[channel_id] = (generator,) + block
+            if not blocks:
+                continue
+            try:
+                self.blocks_ready.emit(blocks)
+            except RuntimeError:
+                break
+
+    def stop_work(self):
+        self.running = False
+
+
+class AcquisitionEngine(QObject):
+    """Owns the acquisition thread shared by all graphs.
+
+    Channels are registered with a callback that receives (seq, t, y) on the GUI
+    thread. The thread count stays at one no matter how many channels exist.
+    """
+
+    def __init__(self, emit_rate=20, policy=CATCH_UP):
+        super().__init__()
+        self.sinks = {}  # channel_id -> (generator, on_samples)
+        self.thread = QThread()
+        self.worker = AcquisitionWorker(emit_rate=emit_rate, policy=policy)
+        self.worker.moveToThread(self.thread)
+        self.worker.blocks_ready.connect(self.dispatch)
+        self.thread.started.connect(self.worker.start_work)
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def register_channel(self, channel_id, signal_func, dt, on_samples):
+        # the DataWorker is only used as a block generator here, it never gets its own thread
+        generator = DataWorker(dt=dt, signal_func=signal_func, delta=True)
+        self.sinks[channel_id] = (generator, on_samples)
+        channels = dict(self.worker.channels)
+        channels[channel_id] = generator
+        self.worker.channels = channels
+        return generator
+
+    def unregister_channel(self, channel_id):
+        self.stop_channel(channel_id)
+        self.sinks.pop(channel_id, None)
+        channels = dict(self.worker.channels)
+        channels.pop(channel_id, None)
+        self.worker.channels = channels
+        self.stop_if_idle()
+
+    def start_channel(self, channel_id):
+        generator = self.worker.channels.get(channel_id)
+        if generator is None:
+            print(f"[WARNING] Channel {channel_id} is not registered")
+            return
+        generator.running = True
+        if not self.thread.isRunning():
+            self.worker.running = True
+            self.thread.start()
+
+    def stop_channel(self, channel_id):
+        generator = self.worker.channels.get(channel_id)
+        if generator is not None:
+            generator.running = False
+        self.stop_if_idle()
+
+    def stop_if_idle(self):
+        if not any(generator.running for generator in self.worker.channels.values()):
+            self.shutdown()
+
+    def shutdown(self):
+        self.worker.stop_work()
+        if self.thread.isRunning():
+            self.thread.quit()
+            self.thread.wait()
+
+    def thread_count(self):
+        return 1 if self.thread.isRunning() else 0
+
+    def dispatch(self, blocks):
+        for channel_id, (generator, seq, t, y) in blocks.items():
+            sink = self.sinks.get(channel_id)
+            # blocks queued before a channel was re-registered belong to the old generator
+            if sink is None or sink[0] is not generator:
+                continue
+            sink[1](seq, t, y)
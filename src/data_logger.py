@@ -1,11 +1,89 @@
-import csv
 import os
-import struct
+import time
 
+import numpy as np
 
-class DataLogger:
-    def __init__(self, curve, signal_name, directory, max_file_size, new_file):
-        self.curve = curve
+from src.csv_encoder import CSV_HEADER, DEFAULT_PRECISION, encode_csv_block
+from src.log_codec import DEFAULT_LEVEL, CompressionStats, encode_block
+from src.log_format import LAYOUT_BLOCKS, LAYOUT_INTERLEAVED, RECORD_DTYPE, RECORD_SIZE, pack_header, read_header
+from src.durability import Durability
+from src.log_index import INDEX_DTYPE, IndexCoalescer, index_entries, index_path, write_index_entries
+from src.log_recovery import recover_segment
+
+
+class PendingSamples:
+    """Samples received from the acquisition stream and not written yet."""
+
+    def __init__(self):
+        # blocks received since the last write
+        self.pending = []
+        self.pending_samples = 0
+        self.pending_since = None
+        # cursor: every sample is written exactly once, whatever the plot shows
+        self.last_seq = -1
+        self.last_written_t = -np.inf
+
+    def append(self, seq, t, y):
+        """Queue a block from the acquisition stream, blocks seen before are ignored."""
+        if seq <= self.last_seq:
+            return
+        self.last_seq = seq
+        self.pending.append((t, y))
+        self.pending_samples += len(t)
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+
+    def take_pending(self):
+        """Pending samples newer than the cursor, as two flat float64 arrays."""
+        if not self.pending:
+            return None, None
+        t = np.concatenate([np.asarray(block[0], dtype=np.float64).ravel() for block in self.pending])
+        y = np.concatenate([np.asarray(block[1], dtype=np.float64).ravel() for block in self.pending])
+        self.pending = []
+        self.pending_samples = 0
+        self.pending_since = None
+        keep = t > self.last_written_t
+        if not keep.all():
+            t, y = t[keep], y[keep]
+        if len(t) == 0:
+            return None, None
+        self.last_written_t = t[-1]
+        return t, y
+
+
+class DataLogger(PendingSamples):
+    def __init__(self, signal_name, directory, max_file_size, new_file, writer=None,
+                 csv_precision=DEFAULT_PRECISION, sample_rate=0.0, compression=None,
+                 compression_level=DEFAULT_LEVEL, value_encoding="delta", block_samples=4096, max_block_age=5.0,
+                 durability=None):
+        """With a writer (src.log_writer.LogWriter) the file work runs on the writer
+        thread and logg_csv/logg_binary only enqueue the pending samples.
+
+        Binary logs use the self-describing layout of src.log_format, every
+        segment gets a sidecar time index (src.log_index) for range queries.
+
+        compression ("zlib" or "lzma") stores binary logs as compressed blocks
+        (src.log_codec). Samples are then held back until block_samples are
+        pending or the oldest is max_block_age seconds old, tiny blocks hardly
+        compress.
+
+        The current file and its index stay open until the file is finished,
+        durability (src.durability.Durability) says when they are fsync'ed. An
+        existing file is recovered (torn tail cut off) before it is appended to.
+        Call close() when logging stops."""
+        self.writer = writer
+        self.durability = durability or Durability()
+        self.log_file = None
+        self.index_file = None
+        self.index_chunks = IndexCoalescer()  # index entries are merged until a chunk is full
+        self.compression = compression
+        self.compression_level = compression_level
+        self.value_encoding = value_encoding  # "none", "xor" or "delta"
+        self.block_samples = block_samples
+        self.max_block_age = max_block_age
+        self.compression_stats = CompressionStats()
+        self.csv_precision = csv_precision  # digits after the decimal point
+        self.sample_rate = sample_rate  # stored in the binary header, 0 when unknown
         self.signal_name = signal_name
         self.directory = directory
         self.max_file_size = max_file_size
@@ -15,6 +93,9 @@ class DataLogger:
         # giving the files index to avoid duplicates
         self.file_index = 1
         self.file_path = self.get_file_path()
+        self.current_size = None  # bytes in the current file, read from disk once per file
+
+        PendingSamples.__init__(self)
 
     def get_file_path(self):
         ext = "csv" if self.file_format == "csv" else "bin"
@@ -23,88 +104,171 @@ class DataLogger:
         else:
             return os.path.join(self.directory, f"{self.signal_name}.{ext}")
 
-    def logg_csv(self):
-        self.file_format = "csv"
-        if not self.curve:
-            print("No curve to log.")
-            return
+    def set_format(self, file_format):
+        if self.file_format != file_format:
+            self.file_format = file_format
+            self.file_path = self.get_file_path()
+            self.current_size = None
 
-        try:
-            x_data, y_data = self.curve.getData()
-            if x_data is None or y_data is None:
-                print("Curve data is empty.")
-                return
-        except AttributeError:
-            print(f" No such data is available in the curve for signal '{self.signal_name}'")
+    def holding_back(self):
+        """True while a compressed log waits for a bigger block."""
+        if not self.compression or self.file_format != "bin" or not self.pending:
+            return False
+        age = time.monotonic() - self.pending_since
+        return self.pending_samples < self.block_samples and age < self.max_block_age
+
+    def submit(self, write_func, force=False):
+        if not force and self.holding_back():
+            return
+        x_data, y_data = self.take_pending()
+        if x_data is None:
             return
+        if self.writer is not None:
+            self.writer.enqueue(write_func, x_data, y_data)
+        else:
+            write_func(x_data, y_data)
 
-        if not os.path.exists(self.directory):
-            os.makedirs(self.directory)
+    def logg_csv(self, force=False):
+        self.set_format("csv")
+        self.submit(self.write_csv, force)
+
+    def logg_binary(self, force=False):
+        """force writes a held back compressed block right away, e.g. when logging stops."""
+        self.set_format("bin")
+        self.submit(self.write_binary, force)
+
+    def write_csv(self, x_data, y_data):
+        # the whole block is formatted at once, the size comes from the bytes actually written
+        data, row_ends = encode_csv_block(x_data, y_data, self.csv_precision)
+        self.write_rows(data, row_ends, x_data, lambda: CSV_HEADER)
 
-        current_size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
-        # if not exits =write headert true
-        write_header = current_size == 0
-        with open(self.file_path, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            if write_header:
-                writer.writerow(["Time (s)", "Amplitude"])
-
-            for x, y in zip(x_data, y_data):
-                row = [x, y]
-                row_size = sum(len(str(val)) for val in row) + 2  # checking size
-
-                if current_size + row_size > self.max_file_size:  # checking if its inside the limits
-                    if self.new_file:
-                        self.file_index += 1  # increment for next file
-                        self.file_path = self.get_file_path()
-                        current_size = 0
-
-                        with open(self.file_path, 'a', newline='') as new_csvfile:
-                            new_writer = csv.writer(new_csvfile)
-                            new_writer.writerow(["Time (s)", "Amplitude"])
-                            new_writer.writerow(row)
-                        current_size += row_size
-                    else:
-                        print("File size exceeds max_file_size limit. Logging stopped")
-                else:
-                    writer.writerow(row)
-                    current_size += row_size
-
-    def logg_binary(self):
-        self.file_format = "bin"
-
-        if not self.curve:
-            print("No curve to log.")
+    def write_binary(self, x_data, y_data):
+        if self.compression:
+            self.write_compressed(x_data, y_data)
             return
+        records = np.empty(len(x_data), dtype=RECORD_DTYPE)
+        records["t"] = x_data
+        records["y"] = y_data
+        row_ends = np.arange(1, len(records) + 1, dtype=np.int64) * RECORD_SIZE
+        self.write_rows(records.tobytes(), row_ends, x_data,
+                        lambda: pack_header(self.signal_name, self.sample_rate, time.time(), LAYOUT_INTERLEAVED))
 
+    def write_compressed(self, x_data, y_data):
+        # every block is a row, so files rotate and the index points at whole blocks
+        started = time.thread_time()  # runs on the writer thread, count only its CPU time
+        blocks = [encode_block(x_data[i:i + self.block_samples], y_data[i:i + self.block_samples],
+                               self.compression, self.compression_level, self.value_encoding)
+                  for i in range(0, len(x_data), self.block_samples)]
+        cpu = time.thread_time() - started
+        data = b"".join(blocks)
+        self.compression_stats.add(x_data.nbytes + y_data.nbytes, len(data), cpu)
+        row_ends = np.cumsum([len(block) for block in blocks])
+        row_samples = np.minimum(np.arange(1, len(blocks) + 1) * self.block_samples, len(x_data))
+        self.write_rows(data, row_ends, x_data,
+                        lambda: pack_header(self.signal_name, self.sample_rate, time.time(), LAYOUT_BLOCKS),
+                        row_samples)
+
+    def can_append(self):
+        """False when the existing binary file holds another layout, e.g. raw records
+        while logging compressed, or an old log without a header."""
+        if self.file_format != "bin":
+            return True
+        expected = LAYOUT_BLOCKS if self.compression else LAYOUT_INTERLEAVED
         try:
-            x_data, y_data = self.curve.getData()
-            if x_data is None or y_data is None:
-                print("Curve data is empty.")
-                return
-        except AttributeError:
-            print(f"No such data is available in the curve for signal '{self.signal_name}'")
+            return read_header(self.file_path)["layout"] == expected
+        except ValueError:
+            return False
+
+    def open_files(self):
+        if self.log_file is None:
+            self.log_file = open(self.file_path, 'ab')
+            self.index_file = open(index_path(self.file_path), 'ab')
+            write_index_entries(self.index_file, self.file_path, np.empty(0, dtype=INDEX_DTYPE))  # the header
+            if self.writer is not None:
+                self.writer.track(self)
+        return self.log_file, self.index_file
+
+    def finish_file(self):
+        """Sync (if the policy wants it) and close the current file and its index."""
+        if self.log_file is None:
             return
+        write_index_entries(self.index_file, self.file_path, self.index_chunks.take())
+        if self.durability.sync_on_close():
+            self.durability.sync((self.log_file, self.index_file))
+        self.log_file.close()
+        self.index_file.close()
+        self.log_file = None
+        self.index_file = None
+        if self.writer is not None:
+            self.writer.untrack(self)
 
+    def close(self):
+        """Finish the current file once everything submitted so far is written."""
+        if self.writer is not None:
+            self.writer.call(self.finish_file)
+        else:
+            self.finish_file()
+
+    def write_rows(self, data, row_ends, t, make_header, row_samples=None, row_channels=None):
+        """Append encoded rows with one write per file, rotating at row boundaries.
+
+        row_ends holds the byte offset where each row ends, t the sample
+        timestamps and make_header returns the bytes every new file starts with.
+        A row is one sample unless row_samples gives the number of samples up
+        to the end of each row. Each write is indexed per run of rows of the
+        same channel (row_channels, all channel 0 when None), merged with the
+        writes before it into chunks of up to CHUNK_SECONDS (src.log_index).
+        """
+        if row_samples is None:
+            row_samples = np.arange(1, len(row_ends) + 1)
+        if row_channels is None:
+            row_channels = np.zeros(len(row_ends), dtype=np.int64)
         if not os.path.exists(self.directory):
             os.makedirs(self.directory)
 
-        record_size = struct.calcsize('dd')
-        current_size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
-
-        with open(self.file_path, 'ab') as binfile:
-            for x, y in zip(x_data, y_data):
-                if current_size + record_size > self.max_file_size:
-                    if self.new_file:
-                        self.file_index += 1
-                        self.file_path = self.get_file_path()
-                        current_size = 0
-                        with open(self.file_path, 'ab') as new_binfile:
-                            new_binfile.write(struct.pack('dd', x, y))
-                        current_size += record_size
-                    else:
-                        print("File size exceeds max_file_size limit. Binary logging stopped.")
+        start = 0  # offset of the first row not written yet
+        while start < len(data):
+            if self.current_size is None:
+                self.finish_file()
+                recover_segment(self.file_path)  # a crash may have left a torn row behind
+                self.current_size = os.path.getsize(self.file_path) if os.path.exists(self.file_path) else 0
+                if self.current_size and not self.can_append():
+                    if not self.new_file:
+                        print(f"{self.file_path} already holds another log. Logging stopped")
                         break
-                else:
-                    binfile.write(struct.pack('dd', x, y))
-                    current_size += record_size
+                    self.file_index += 1
+                    self.file_path = self.get_file_path()
+                    self.current_size = None
+                    continue
+            # if not exits =write headert true
+            header = make_header() if self.current_size == 0 else b""
+            room = self.max_file_size - self.current_size - len(header)
+            fit = int(np.searchsorted(row_ends, start + room, side="right"))
+            end = int(row_ends[fit - 1]) if fit > 0 else start
+            if end > start:
+                log_file, index_file = self.open_files()
+                log_file.write(header + data[start:end])
+                log_file.flush()  # hand it to the OS, fsync is up to the durability policy
+                first_row = int(np.searchsorted(row_ends, start, side="right"))
+                chunks = self.index_chunks.add(index_entries(
+                    row_ends, row_samples, row_channels, t, first_row, fit,
+                    self.current_size + len(header) - start))
+                if len(chunks):
+                    write_index_entries(index_file, self.file_path, chunks)
+                    index_file.flush()
+                self.current_size += len(header) + end - start
+                if self.durability.wrote(len(header) + end - start):
+                    self.durability.sync((log_file, index_file))
+                start = end
+            if start == len(data):
+                break
+
+            if not self.new_file:
+                print("File size exceeds max_file_size limit. Logging stopped")
+                break
+            if self.current_size == 0:
+                print("A single row is larger than max_file_size. Logging stopped")
+                break
+            self.file_index += 1  # increment for next file
+            self.file_path = self.get_file_path()
+            self.current_size = None
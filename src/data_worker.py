@@ -1,44 +1,104 @@
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
-import time
+
+import numpy as np
+
+from src.ring_buffer import RingBuffer
+from src.scheduler import CATCH_UP, DeadlineScheduler
 
 
 class DataWorker(QObject):
-    data_ready = pyqtSignal(object, object, object)  # t_list, y_list, y2_list (optional)
+    data_ready = pyqtSignal(object, object, object)  # t_array, y_array, y2_array (optional)
+    samples_ready = pyqtSignal(int, object, object)  # seq, new t samples, new y samples
     MAX_POINTS = 500  # limit the max poisnt
 
-    def __init__(self, dt=0.05, signal_func=None):
+    def __init__(self, dt=0.05, signal_func=None, emit_rate=None, max_points=None, delta=False,
+                 policy=CATCH_UP):
+        """dt is the sample period. emit_rate (Hz) sets how often a block is generated
+        and emitted, by default every sample is emitted on its own.
+
+        With delta=True only the new block is sent through samples_ready together
+        with a sequence number, instead of the whole window through data_ready.
+
+        policy decides what happens when the worker falls behind its deadlines,
+        see src.scheduler."""
         super().__init__()
         self.dt = dt
         self.signal_func = signal_func
         self.running = False
         self.t = 0
-        self.t_data = []
-        self.y_data = []
+        self.sample_index = 0
+        self.channel_time = 0.0  # seconds of acquisition this channel has been driven for
+        self.emit_rate = emit_rate if emit_rate else 1.0 / dt
+        # samples generated per wakeup, e.g. 10 kHz at 30 Hz emit -> 333 per block
+        self.samples_per_emit = max(1, int(round(1.0 / (dt * self.emit_rate))))
+        self.delta = delta
+        self.seq = 0
+        self.buffer = RingBuffer(max_points or self.MAX_POINTS)
+        self.scheduler = DeadlineScheduler(self.samples_per_emit * dt, policy=policy)
+
+    @property
+    def sample_rate(self):
+        return 1.0 / self.dt
+
+    def generate_block(self, n):
+        # one vectorized call for the whole block instead of one call per sample
+        t = (self.sample_index + np.arange(n)) * self.dt
+        y = self.signal_func(t)
+        self.sample_index += n
+        self.t = self.sample_index * self.dt
+        return t, y
+
+    def samples_until(self, channel_time):
+        return int(channel_time / self.dt + 1e-6)
+
+    def acquire(self, duration, skipped=0.0):
+        """Generate the samples falling into the next `duration` seconds of channel time.
+
+        `skipped` seconds (dropped deadlines) are jumped over without generating
+        anything. Returns (seq, t, y), or None when no sample is due yet.
+        """
+        if skipped:
+            self.channel_time += skipped
+            self.sample_index = max(self.sample_index, self.samples_until(self.channel_time))
+            self.t = self.sample_index * self.dt
+        self.channel_time += duration
+        n = self.samples_until(self.channel_time) - self.sample_index
+        if n <= 0:
+            return None
+        t, y = self.generate_block(n)
+        seq = self.seq
+        self.seq += 1
+        return seq, t, y
 
     @pyqtSlot()
     def start_work(self):
         self.running = True
-        # self.t = 0
-        # self.t_data = []
-        # self.y_data = []
+        self.scheduler.start()
+        period = self.scheduler.period
 
         while self.running:
             if not hasattr(self, 'data_ready'):
                 break  # Avoid using deleted object
 
-            y1 = self.signal_func(self.t)
+            # each block covers the period that just ended, so samples never lie in the future
+            periods = self.scheduler.wait()
+            # when deadlines were dropped the time axis jumps so it stays on the wall clock
+            block = self.acquire(period, skipped=(periods - 1) * period)
+            if block is None:
+                continue
 
-            self.t_data.append(self.t)
-            self.y_data.append(y1)
-            if len(self.t_data) > self.MAX_POINTS:
-                self.t_data = self.t_data[-self.MAX_POINTS:]
-                self.y_data = self.y_data[-self.MAX_POINTS:]
+            seq, t_block, y_block = block
             try:
-                self.data_ready.emit(self.t_data.copy(), self.y_data.copy(), None)
+                if self.delta:
+                    # fresh arrays every block, the receiver keeps its own window
+                    self.samples_ready.emit(seq, t_block, y_block)
+                else:
+                    self.buffer.extend(t_block, y_block)
+                    # the buffer is reused on the next tick, so the GUI thread gets its own copy
+                    t_data, y_data = self.buffer.snapshot()
+                    self.data_ready.emit(t_data, y_data, None)
             except RuntimeError:
                 break
-            self.t += self.dt
-            time.sleep(self.dt)
 
     def stop_work(self):
         self.running = False
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+def visible_slice(t, x_min, x_max):
+    """Index range of the samples inside [x_min, x_max], plus one neighbour on each
+    side so the line still runs to the edges of the view. t must be sorted."""
+    start = max(int(np.searchsorted(t, x_min, side="left")) - 1, 0)
+    stop = min(int(np.searchsorted(t, x_max, side="right")) + 1, len(t))
+    return start, stop
+
+
+def m4_decimate(t, y, columns):
+    """Reduce a series to the first, min, max and last sample of each pixel column.
+
+    Samples are assumed to be evenly spaced in time (fixed dt), so a column is a
+    fixed number of samples and the whole reduction is a reshape plus argmin/argmax.
+    Spikes survive because every column keeps its extremes.
+    """
+    n = len(y)
+    if columns <= 0 or n <= 4 * columns:
+        return t, y
+
+    per_column = -(-n // columns)  # ceil
+    full = (n // per_column) * per_column
+    starts = np.arange(0, full, per_column)
+    blocks = y[:full].reshape(-1, per_column)
+
+    idx = np.empty((len(starts), 4), dtype=np.intp)
+    idx[:, 0] = starts
+    idx[:, 1] = starts + np.argmin(blocks, axis=1)
+    idx[:, 2] = starts + np.argmax(blocks, axis=1)
+    idx[:, 3] = starts + per_column - 1
+    if full < n:  # last, shorter column
+        tail = y[full:]
+        idx = np.vstack([idx, [full, full + np.argmin(tail), full + np.argmax(tail), n - 1]])
+    idx.sort(axis=1)  # keep the four points of a column in time order
+    idx = idx.ravel()
+    return t[idx], y[idx]
+
+
+class Decimator:
+    """Caches the decimated series, it is only recomputed when the data, the
+    visible x range or the plot width changes."""
+
+    def __init__(self):
+        self.key = None
+        self.result = None
+
+    def process(self, t, y, x_range, width, version):
+        key = (version, float(x_range[0]), float(x_range[1]), int(width))
+        if key != self.key:
+            start, stop = visible_slice(t, x_range[0], x_range[1])
+            self.result = m4_decimate(t[start:stop], y[start:stop], int(width))
+            self.key = key
+        return self.result
+
+    def invalidate(self):
+        self.key = None
+        self.result = None
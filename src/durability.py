@@ -0,0 +1,66 @@
+import os
+import time
+
+# when a logger forces its writes to disk with fsync
+NO_SYNC = "none"  # leave it to the OS, a power loss can take the last seconds with it
+SYNC_INTERVAL = "interval"  # at most `interval` seconds of data at risk
+SYNC_BYTES = "bytes"  # at most `max_bytes` of data at risk
+SYNC_ROTATION = "rotation"  # only when a file is finished (rotated or closed)
+SYNC_POLICIES = (NO_SYNC, SYNC_INTERVAL, SYNC_BYTES, SYNC_ROTATION)
+
+
+class Durability:
+    """Group commit for a logger: writes go to the OS right away, fsync runs once
+    for all the writes since the last one when the policy says so.
+
+    Every policy except NO_SYNC also syncs a file when it is finished.
+    """
+
+    def __init__(self, policy=NO_SYNC, interval=1.0, max_bytes=1 << 20):
+        if policy not in SYNC_POLICIES:
+            raise ValueError(f"unknown durability policy '{policy}', expected one of {SYNC_POLICIES}")
+        self.policy = policy
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.unsynced_bytes = 0
+        self.last_sync = time.monotonic()
+        self.syncs = 0
+        self.sync_seconds = 0.0
+        self.max_sync_seconds = 0.0
+
+    def wrote(self, nbytes):
+        """Account for a write, True when the files should be synced now."""
+        self.unsynced_bytes += nbytes
+        if self.policy == SYNC_INTERVAL:
+            return time.monotonic() - self.last_sync >= self.interval
+        if self.policy == SYNC_BYTES:
+            return self.unsynced_bytes >= self.max_bytes
+        return False
+
+    def sync_on_close(self):
+        return self.policy != NO_SYNC and self.unsynced_bytes > 0
+
+    def sync(self, files):
+        """fsync the files in order, data before its index so the index never
+        points past what is on disk."""
+        started = time.perf_counter()
+        for f in files:
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+        elapsed = time.perf_counter() - started
+        self.syncs += 1
+        self.sync_seconds += elapsed
+        self.max_sync_seconds = max(self.max_sync_seconds, elapsed)
+        self.unsynced_bytes = 0
+        self.last_sync = time.monotonic()
+
+    def stats(self):
+        return {
+            "policy": self.policy,
+            "syncs": self.syncs,
+            "sync_seconds": self.sync_seconds,
+            "max_sync_seconds": self.max_sync_seconds,
+            "mean_sync_seconds": self.sync_seconds / self.syncs if self.syncs else 0.0,
+            "unsynced_bytes": self.unsynced_bytes,
+        }
@@ -0,0 +1,254 @@
+import ast
+import functools
+import re
+
+import numpy as np
+
+# what a math expression may use, anything else is rejected when it is parsed
+FUNCTIONS = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "exp": np.exp, "log": np.log, "log10": np.log10, "log2": np.log2, "sqrt": np.sqrt,
+    "abs": np.absolute, "sign": np.sign, "floor": np.floor, "ceil": np.ceil, "round": np.rint,
+}
+BINARY_FUNCTIONS = {
+    "min": np.minimum, "max": np.maximum, "atan2": np.arctan2, "hypot": np.hypot, "pow": np.power,
+}
+CONSTANTS = {"pi": np.pi, "e": np.e}
+OPERATORS = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide,
+    ast.Mod: np.remainder, ast.Pow: np.power,
+}
+# ufuncs that warn about values outside their domain, plans with them (or a division) silence numpy
+DOMAIN_UFUNCS = {np.sqrt, np.log, np.log10, np.log2, np.arcsin, np.arccos, np.power, np.remainder}
+UNARY_OPERATORS = {ast.USub: np.negative, ast.UAdd: None}
+FLOAT64 = np.dtype(np.float64)
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+class Plan:
+    """A parsed expression, compiled into a Python function of straight ufunc
+    calls that all write into given buffers (`out=`).
+
+    The function takes the input signals, the scratch buffers (`temps`), the
+    output buffer and a boolean mask for safe division. Scratch buffers are
+    reused as soon as their value has been consumed, so an expression needs
+    about as many as it is deep, not one per operation.
+    """
+
+    def __init__(self, text, inputs, temps, source, namespace, quiet):
+        self.text = text
+        self.inputs = inputs  # signal names, in argument order
+        self.temps = temps
+        self.source = source
+        self.quiet = quiet
+        exec(source, namespace)  # generated from the whitelisted syntax tree only
+        self.function = namespace["plan"]
+
+
+class _Compiler:
+    def __init__(self, aliases, constants):
+        self.aliases = aliases
+        self.constants = constants  # named values of this expression only, e.g. k of the presets
+        self.inputs = []
+        self.temps = 0
+        self.free = []
+        self.steps = []
+
+    # operands are ("in", index), ("tmp", index) or ("const", value)
+
+    def signal(self, name):
+        name = self.aliases.get(name, name)
+        if name not in self.inputs:
+            self.inputs.append(name)
+        return "in", self.inputs.index(name)
+
+    def temp(self, *operands):
+        # the scratch buffers of the operands are free again once this step ran,
+        # ufuncs are fine with the output being one of the inputs
+        for kind, index in operands:
+            if kind == "tmp":
+                self.free.append(index)
+        if self.free:
+            return "tmp", self.free.pop()
+        self.temps += 1
+        return "tmp", self.temps - 1
+
+    def emit(self, ufunc, *operands):
+        if all(kind == "const" for kind, _ in operands):
+            with np.errstate(all="ignore"):
+                if ufunc is None:
+                    a, b = operands[0][1], operands[1][1]
+                    return "const", float(a / b) if b != 0 else 0.0
+                return "const", float(ufunc(*[value for _, value in operands]))
+        out = self.temp(*operands)
+        self.steps.append((ufunc, operands, out))
+        return out
+
+    def visit(self, node):
+        if isinstance(node, ast.Expression):
+            return self.visit(node.body)
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, str):  # "Signal name" for names that are not identifiers
+                return self.signal(node.value)
+            if isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+                return "const", float(node.value)
+        if isinstance(node, ast.Name):
+            if node.id in self.constants:
+                return "const", self.constants[node.id]
+            if node.id in CONSTANTS:
+                return "const", CONSTANTS[node.id]
+            if node.id in FUNCTIONS or node.id in BINARY_FUNCTIONS:
+                raise ExpressionError(f"'{node.id}' is a function, call it like {node.id}(A)")
+            return self.signal(node.id)
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            left, right = self.visit(node.left), self.visit(node.right)
+            if isinstance(node.op, ast.Div):
+                if right[0] == "const" and right[1] != 0:
+                    return self.emit(np.multiply, left, ("const", 1.0 / right[1]))
+                return self.emit(None, left, right)
+            if isinstance(node.op, ast.Pow) and right in (("const", 2.0), ("const", 0.5)):
+                return self.emit(np.square if right[1] == 2.0 else np.sqrt, left)
+            return self.emit(OPERATORS[type(node.op)], left, right)
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            operand = self.visit(node.operand)
+            ufunc = UNARY_OPERATORS[type(node.op)]
+            return operand if ufunc is None else self.emit(ufunc, operand)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name in FUNCTIONS and len(node.args) == 1:
+                return self.emit(FUNCTIONS[name], self.visit(node.args[0]))
+            if name in BINARY_FUNCTIONS and len(node.args) == 2:
+                return self.emit(BINARY_FUNCTIONS[name], *[self.visit(arg) for arg in node.args])
+            if name in FUNCTIONS or name in BINARY_FUNCTIONS:
+                count = 1 if name in FUNCTIONS else 2
+                raise ExpressionError(f"{name}() takes {count} argument{'s' if count > 1 else ''}")
+            raise ExpressionError(f"unknown function '{name}'")
+        raise ExpressionError(f"'{ast.unparse(node)}' is not allowed in a math expression")
+
+    def plan(self, text, result):
+        if not self.inputs:
+            raise ExpressionError("the expression has to use at least one signal")
+        if result[0] == "in":
+            result = self.emit(np.positive, result)  # a plain signal, copied to the output
+        # the last step writes straight into the output buffer
+        ufunc, operands, _ = self.steps[-1]
+        self.steps[-1] = (ufunc, operands, ("out", 0))
+        used = [value for _, operands, out in self.steps for kind, value in operands + (out,) if kind == "tmp"]
+        temps = max(used) + 1 if used else 0
+
+        namespace = {"divide": np.divide, "copyto": np.copyto, "equal": np.equal}
+        constants = {}
+
+        def name(operand):
+            kind, value = operand
+            if kind == "const":
+                constants.setdefault(value, f"c{len(constants)}")
+                namespace[constants[value]] = value
+                return constants[value]
+            return "out" if kind == "out" else f"{kind[0]}{value}"
+
+        arguments = [f"i{i}" for i in range(len(self.inputs))] + [f"t{i}" for i in range(temps)]
+        lines = [f"def plan({', '.join(arguments + ['out', 'zero'])}):"]
+        for ufunc, operands, out in self.steps:
+            args = [name(operand) for operand in operands]
+            if ufunc is None:
+                # the mask first, the target may be the divisor
+                lines += [f"    equal({args[1]}, 0.0, out=zero)",
+                          f"    divide({args[0]}, {args[1]}, out={name(out)})",
+                          f"    copyto({name(out)}, 0.0, where=zero)"]
+            else:
+                namespace[ufunc.__name__] = ufunc
+                lines.append(f"    {ufunc.__name__}({', '.join(args)}, out={name(out)})")
+        quiet = any(ufunc is None or ufunc in DOMAIN_UFUNCS for ufunc, _, _ in self.steps)
+        return Plan(text, self.inputs, temps, "\n".join(lines) + "\n", namespace, quiet)
+
+
+# quoted signal names, left alone when ^ is turned into **
+_QUOTED = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+
+
+def calculator_powers(text):
+    """A ^ 2 means a power, like on a calculator, except inside "quoted names"."""
+    parts = _QUOTED.split(text)
+    parts[::2] = [part.replace("^", "**") for part in parts[::2]]
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(text, aliases, constants):
+    try:
+        tree = ast.parse(calculator_powers(text.strip()), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"syntax error in '{text}': {e.msg}") from None
+    compiler = _Compiler(dict(aliases), dict(constants))
+    return compiler.plan(text, compiler.visit(tree))
+
+
+def compile_expression(text, aliases=None, signals=None, constants=None):
+    """Parse a math expression into an Expression, e.g. "sin(A) + 2 * B".
+
+    Signals are referenced by name, "quoted" when the name is not an
+    identifier. aliases maps short names (A, B) to signal names, when
+    signals (the names that exist) is given unknown signals are an error.
+    constants maps names to numbers for this expression (k of the presets).
+    Plans are cached by text, every Expression gets its own buffers.
+    """
+    plan = _compile(text, tuple(sorted((aliases or {}).items())), tuple(sorted((constants or {}).items())))
+    if signals is not None:
+        missing = [name for name in plan.inputs if name not in signals]
+        if missing:
+            raise ExpressionError(f"unknown signal{'s' if len(missing) > 1 else ''}: {', '.join(missing)}")
+    return Expression(plan)
+
+
+class Expression:
+    """Evaluates a Plan into preallocated buffers, without temporary arrays.
+
+    Division is safe: x / 0 gives 0 rather than inf or nan.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.text = plan.text
+        self.inputs = plan.inputs
+        self.capacity = 0
+        self.n = -1
+        self._temps = None
+        self._out = None
+        self._zero = None
+        self._views = None
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+    def _buffers(self, n):
+        if n > self.capacity:
+            # grow with some headroom so a slowly growing window does not reallocate every time
+            self.capacity = max(n, int(self.capacity * 1.5))
+            self._temps = np.empty((self.plan.temps, self.capacity))
+            self._out = np.empty(self.capacity)
+            self._zero = np.empty(self.capacity, dtype=bool)
+        self.n = n
+        self._views = [temp[:n] for temp in self._temps] + [self._out[:n], self._zero[:n]]
+
+    def evaluate(self, arrays):
+        """Result for the input float arrays (in the order of self.inputs), cut to
+        the shortest one. The result is overwritten by the next call, copy it to keep it."""
+        if len(arrays) != len(self.inputs):
+            raise ValueError(f"expected {len(self.inputs)} input arrays, got {len(arrays)}")
+        n = min(map(len, arrays))
+        if n != self.n:
+            self._buffers(n)
+        inputs = [array if len(array) == n and array.dtype is FLOAT64 else np.asarray(array, dtype=np.float64)[:n]
+                  for array in arrays]
+        if self.plan.quiet:
+            with np.errstate(all="ignore"):
+                self.plan.function(*inputs, *self._views)
+        else:
+            self.plan.function(*inputs, *self._views)
+        return self._views[-2]
@@ -0,0 +1,220 @@
+import numpy as np
+
+# biquad kinds (RBJ audio EQ cookbook)
+LOWPASS = "lowpass"
+HIGHPASS = "highpass"
+NOTCH = "notch"
+BIQUAD_KINDS = (LOWPASS, HIGHPASS, NOTCH)
+BUTTERWORTH_Q = 1 / np.sqrt(2)
+SUB_BLOCK = 64  # samples the IIR filters evaluate with one matrix product
+
+
+class MovingAverage:
+    """Mean of the last `length` samples.
+
+    A running sum updated with the samples that enter and leave the window,
+    so a block costs O(block) whatever the length. The sum is recomputed from
+    the window once per `length` samples, rounding errors do not pile up.
+    """
+
+    def __init__(self, length):
+        if length < 1:
+            raise ValueError("the moving average length must be at least 1")
+        self.length = int(length)
+        self.reset()
+
+    def reset(self):
+        self.window = None  # the last `length` inputs, a ring starting at self.pos
+        self.pos = 0
+        self.total = 0.0
+        self.since_sync = 0
+
+    def process(self, t, y):
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) == 0:
+            return t, y
+        n, length = len(y), self.length
+        if self.window is None:
+            # starts settled on the first value, no ramp up from zero
+            self.window = np.full(length, y[0])
+            self.total = y[0] * length
+
+        # x[i - length] for every new x[i]: from the window, then from the block itself
+        leaving = np.empty(n)
+        from_window = min(n, length)
+        leaving[:from_window] = np.take(self.window, np.arange(self.pos, self.pos + from_window), mode="wrap")
+        if n > length:
+            leaving[length:] = y[:n - length]
+        sums = self.total + np.cumsum(y - leaving)
+
+        # the last `length` inputs go back into the ring
+        tail = y[-length:]
+        np.put(self.window, np.arange(self.pos, self.pos + len(tail)), tail, mode="wrap")
+        self.pos = (self.pos + len(tail)) % length
+        self.since_sync += n
+        if self.since_sync >= length:
+            self.total = self.window.sum()
+            self.since_sync = 0
+        else:
+            self.total = sums[-1]
+        return t, sums / length
+
+
+class IIRFilter:
+    """Direct form II transposed IIR filter, b and a as in scipy.signal.lfilter.
+
+    Evaluated in sub-blocks of SUB_BLOCK samples from its state space form:
+    each sub-block is one matrix product with the impulse response and the
+    initial state, only the state is carried from one sub-block to the next.
+    Same output as the sample by sample recursion, without a Python loop per
+    sample. Keep the order low (biquads), high order direct forms are not
+    numerically safe.
+    """
+
+    def __init__(self, b, a, sub_block=SUB_BLOCK):
+        b = np.asarray(b, dtype=np.float64)
+        a = np.asarray(a, dtype=np.float64)
+        if len(a) == 0 or a[0] == 0:
+            raise ValueError("a[0] must not be zero")
+        order = max(len(a), len(b)) - 1
+        b = np.pad(b, (0, order + 1 - len(b))) / a[0]
+        a = np.pad(a, (0, order + 1 - len(a))) / a[0]
+        self.b, self.a = b, a
+        self.order = order
+        # state space: s' = A s + B x, y = C s + D x, s is the transposed form's delay line
+        A = np.zeros((order, order))
+        A[:, 0] = -a[1:]
+        A[:-1, 1:] = np.eye(order - 1)
+        B = b[1:] - a[1:] * b[0]
+        self.A, self.B, self.D = A, B, b[0]
+
+        m = sub_block
+        powers = [np.eye(order)]
+        for _ in range(m):
+            powers.append(A @ powers[-1])
+        self.powers = powers  # A^k, k = 0..m
+        # impulse response h[0] = D, h[k] = C A^(k-1) B with C = [1, 0, ..]
+        h = np.array([self.D] + [powers[k - 1][0] @ B for k in range(1, m)])
+        rows = np.arange(m)
+        lags = rows[:, None] - rows[None, :]
+        self.response = np.where(lags >= 0, h[np.clip(lags, 0, None)], 0.0)  # T[k, j] = h[k - j]
+        self.observe = np.array([powers[k][0] for k in range(m)])  # C A^k, how the state shows in y[k]
+        self.inject = np.array([powers[m - 1 - j] @ B for j in range(m)]).T  # A^(m-1-j) B, x[j] into the end state
+        self.sub_block = m
+        self.reset()
+
+    def reset(self):
+        self.state = None
+
+    def steady_state(self, x0):
+        """State of a filter that has only ever seen x0."""
+        return np.linalg.solve(np.eye(self.order) - self.A, self.B * x0)
+
+    def process(self, t, y):
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) == 0:
+            return t, y
+        if self.order == 0:
+            return t, y * self.D
+        if self.state is None:
+            self.state = self.steady_state(y[0])
+
+        m = self.sub_block
+        full = len(y) // m * m
+        out = np.empty(len(y))
+        if full:
+            blocks = y[:full].reshape(-1, m)
+            zero_state = blocks @ self.response.T
+            injected = blocks @ self.inject.T
+            # only the state is chained, one sub-block at a time
+            starts = np.empty((len(blocks), self.order))
+            state = self.state
+            a_m = self.powers[m]
+            for i in range(len(blocks)):
+                starts[i] = state
+                state = a_m @ state + injected[i]
+            self.state = state
+            out[:full] = (zero_state + starts @ self.observe.T).ravel()
+
+        rest = len(y) - full
+        if rest:
+            x = y[full:]
+            out[full:] = self.response[:rest, :rest] @ x + self.observe[:rest] @ self.state
+            self.state = self.powers[rest] @ self.state + self.inject[:, m - rest:] @ x
+        return t, out
+
+
+class ExponentialMovingAverage(IIRFilter):
+    """y[n] = y[n-1] + alpha * (x[n] - y[n-1]), 0 < alpha <= 1, smaller is smoother."""
+
+    def __init__(self, alpha):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        super().__init__([alpha], [1.0, alpha - 1.0])
+
+
+class Biquad(IIRFilter):
+    """Second order low pass, high pass or notch at `cutoff` Hz for a signal sampled at `rate` Hz."""
+
+    def __init__(self, kind, cutoff, rate, q=BUTTERWORTH_Q):
+        if kind not in BIQUAD_KINDS:
+            raise ValueError(f"unknown biquad '{kind}', expected one of {BIQUAD_KINDS}")
+        if not 0 < cutoff < rate / 2:
+            raise ValueError(f"the cutoff must be between 0 and {rate / 2:g} Hz (half the sample rate)")
+        if q <= 0:
+            raise ValueError("q must be positive")
+        self.kind, self.cutoff, self.rate, self.q = kind, cutoff, rate, q
+        w0 = 2 * np.pi * cutoff / rate
+        cos_w0, alpha = np.cos(w0), np.sin(w0) / (2 * q)
+        if kind == LOWPASS:
+            b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        elif kind == HIGHPASS:
+            b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        else:
+            b = [1.0, -2 * cos_w0, 1.0]
+        super().__init__(b, [1 + alpha, -2 * cos_w0, 1 - alpha])
+
+
+def fir_lowpass(cutoff, rate, length=31):
+    """Windowed sinc low pass taps, odd length, unity gain at DC."""
+    if not 0 < cutoff < rate / 2:
+        raise ValueError(f"the cutoff must be between 0 and {rate / 2:g} Hz (half the sample rate)")
+    length = int(length) | 1
+    k = np.arange(length) - (length - 1) / 2
+    taps = np.sinc(2 * cutoff / rate * k) * np.blackman(length)
+    return taps / taps.sum()
+
+
+class FIRFilter:
+    """FIR filter with the last len(taps) - 1 inputs carried over, so a stream of
+    blocks gives the same output as one convolution of the whole signal.
+    Long blocks of long filters convolve by FFT."""
+
+    FFT_WORK = 1 << 16  # block * taps above which the FFT is cheaper
+
+    def __init__(self, taps):
+        self.taps = np.asarray(taps, dtype=np.float64)
+        if self.taps.ndim != 1 or len(self.taps) == 0:
+            raise ValueError("the taps must be a non empty 1d sequence")
+        self.reset()
+
+    def reset(self):
+        self.history = None
+
+    def process(self, t, y):
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) == 0:
+            return t, y
+        taps = self.taps
+        if self.history is None:
+            self.history = np.full(len(taps) - 1, y[0])
+        x = np.concatenate((self.history, y))
+        self.history = x[len(x) - (len(taps) - 1):]
+        if len(y) * len(taps) > self.FFT_WORK:
+            size = len(x) + len(taps) - 1
+            spectrum = np.fft.rfft(x, size) * np.fft.rfft(taps, size)
+            out = np.fft.irfft(spectrum, size)[len(taps) - 1:len(x)]
+        else:
+            out = np.convolve(x, taps, mode="valid")
+        return t, out
@@ -0,0 +1,108 @@
+import numpy as np
+
+from src.decimation import visible_slice
+from src.ring_buffer import RingBuffer
+
+
+def minmax_reduce(t, y, bucket):
+    """Keep the min and the max sample (in time order) of every full bucket.
+
+    Returns the reduced series and the samples of the last, incomplete bucket.
+    """
+    count = len(y) // bucket
+    full = count * bucket
+    if count == 0:
+        return t[:0], y[:0], t, y
+    blocks = y[:full].reshape(count, bucket)
+    starts = np.arange(0, full, bucket)
+    idx = np.stack([starts + np.argmin(blocks, axis=1), starts + np.argmax(blocks, axis=1)], axis=1)
+    idx.sort(axis=1)
+    idx = idx.ravel()
+    return t[idx], y[idx], t[full:], y[full:]
+
+
+class HistoryPyramid:
+    """Per channel history: a full rate window plus min/max levels.
+
+    Level k keeps one (min, max) pair per FACTORS[k] raw samples, each level in
+    its own fixed size RingBuffer, so memory is bounded however long the session
+    runs. With the defaults at 1 kHz the 1000x level spans a bit over an hour.
+    """
+    FACTORS = (10, 100, 1000)
+    LEVEL_POINTS = 8000  # points per level, two per bucket
+
+    def __init__(self, raw_capacity, level_capacity=LEVEL_POINTS, factors=FACTORS):
+        self.raw = RingBuffer(raw_capacity)
+        self.factors = factors
+        self.levels = [RingBuffer(level_capacity) for _ in factors]
+        # bucket size counted in points of the level below (levels hold two points per bucket)
+        self.buckets = []
+        previous = 1
+        for factor in factors:
+            step = factor // previous
+            self.buckets.append(step if previous == 1 else 2 * step)
+            previous = factor
+        empty = np.empty(0)
+        self.pending = [(empty, empty) for _ in factors]
+
+    def extend(self, t, y):
+        t = np.asarray(t, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        self.raw.extend(t, y)
+        # each level consumes what the level below produced, carrying incomplete buckets over
+        for k, level in enumerate(self.levels):
+            pending_t, pending_y = self.pending[k]
+            if len(pending_t):
+                t = np.concatenate([pending_t, t])
+                y = np.concatenate([pending_y, y])
+            t, y, rest_t, rest_y = minmax_reduce(t, y, self.buckets[k])
+            self.pending[k] = (rest_t, rest_y)
+            level.extend(t, y)
+            if not len(t):
+                break
+
+    def clear(self):
+        self.raw.clear()
+        for level in self.levels:
+            level.clear()
+        empty = np.empty(0)
+        self.pending = [(empty, empty) for _ in self.factors]
+
+    def covers(self, series, x_min):
+        # a series that never wrapped still holds everything since the start
+        if len(series) < series.capacity:
+            return True
+        t, _ = series.view()
+        return t[0] <= x_min
+
+    def select(self, x_min, x_max, width):
+        """Samples for the view [x_min, x_max], from the finest series that covers
+        the range without returning much more than two points per pixel."""
+        series = [self.raw] + self.levels
+        budget = max(2 * int(width), 1)
+        chosen = 0
+        for k, candidate in enumerate(series):
+            if not len(candidate):
+                break
+            chosen = k
+            t, _ = candidate.view()
+            start, stop = visible_slice(t, x_min, x_max)
+            if self.covers(candidate, x_min) and stop - start <= budget:
+                break
+
+        t, y = series[chosen].view()
+        start, stop = visible_slice(t, x_min, x_max)
+        pieces_t, pieces_y = [t[start:stop]], [y[start:stop]]
+        last = t[stop - 1] if stop > start else -np.inf
+        # coarse levels lag behind the newest data, finish the line with the finer levels
+        for finer in reversed(series[:chosen]):
+            ft, fy = finer.view()
+            begin = int(np.searchsorted(ft, last, side="right"))
+            end = visible_slice(ft, x_min, x_max)[1]
+            if end > begin:
+                pieces_t.append(ft[begin:end])
+                pieces_y.append(fy[begin:end])
+                last = ft[end - 1]
+        if len(pieces_t) == 1:
+            return pieces_t[0], pieces_y[0]
+        return np.concatenate(pieces_t), np.concatenate(pieces_y)
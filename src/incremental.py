@@ -0,0 +1,68 @@
+import numpy as np
+
+from src.alignment import LINEAR, sample_at
+
+
+class IncrementalExpression:
+    """Evaluates an Expression on the new samples its inputs push, rather than
+    on whole windows.
+
+    The first input sets the time stamps of the result, the other inputs are
+    sampled at them (src.alignment, linear interpolation or as-of). A time
+    stamp is computed once every other input has reached it, time stamps
+    outside the window all inputs cover are skipped. Only the samples that
+    can still be needed are kept, at most max_pending per input (a stalled
+    input must not make the others grow without bound).
+    """
+
+    def __init__(self, expression, input_ids, max_pending, join=LINEAR):
+        self.expression = expression
+        self.input_ids = list(input_ids)  # channel id of every expression input
+        self.max_pending = max_pending
+        self.join = join
+        self.clear()
+
+    def clear(self):
+        self.times = [np.empty(0) for _ in self.input_ids]
+        self.values = [np.empty(0) for _ in self.input_ids]
+
+    def push(self, channel_id, t, y):
+        """Queue new samples of a channel.
+
+        Returns (t, y) of the result samples they complete, None when there are
+        none yet. y is a new array, it can be kept.
+        """
+        if len(t) == 0:
+            return None
+        for index, input_id in enumerate(self.input_ids):
+            if input_id == channel_id:
+                self.times[index] = np.concatenate((self.times[index], t))[-self.max_pending:]
+                self.values[index] = np.concatenate((self.values[index], y))[-self.max_pending:]
+        if any(len(t) == 0 for t in self.times):
+            return None
+
+        # time stamps every other input has reached, an interpolation needs the sample after them
+        t_base = self.times[0]
+        reached = min((t[-1] for t in self.times[1:]), default=t_base[-1])
+        ready = int(np.searchsorted(t_base, reached, side="right"))
+        if ready == 0:
+            return None
+        t = t_base[:ready]
+        columns = [self.values[0][:ready]]
+        valid = np.ones(ready, dtype=bool)
+        for t_ref, y_ref in zip(self.times[1:], self.values[1:]):
+            values, inside = sample_at(t, t_ref, y_ref, self.join)
+            columns.append(values)
+            valid &= inside
+
+        # the others keep their last sample up to t[-1], the left neighbour of the next time stamps
+        self.times[0], self.values[0] = t_base[ready:], self.values[0][ready:]
+        for index in range(1, len(self.times)):
+            keep = max(int(np.searchsorted(self.times[index], t[-1], side="right")) - 1, 0)
+            self.times[index], self.values[index] = self.times[index][keep:], self.values[index][keep:]
+
+        if not valid.all():  # before the first sample of another input
+            t, columns = t[valid], [column[valid] for column in columns]
+            if len(t) == 0:
+                return None
+        return t, self.expression.evaluate(columns).copy()
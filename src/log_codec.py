@@ -0,0 +1,133 @@
+import lzma
+import struct
+import zlib
+
+import numpy as np
+
+# compressed binary logs are a sequence of self-contained blocks, so every block
+# can be decoded on its own and the sidecar index can still point at single chunks.
+# Inside a block the timestamps are stored as the delta of the delta of their bit
+# patterns (close to all zeros for evenly sampled data) and the values optionally
+# XOR'ed or delta'ed with the previous sample. Both columns are byte shuffled
+# (all first bytes, then all second bytes, ...) before zlib/lzma sees them.
+BLOCK_MAGIC = b"RTDB"
+CODECS = {"zlib": 1, "lzma": 2}
+VALUE_ENCODINGS = {"none": 0, "xor": 1, "delta": 2}
+DEFAULT_LEVEL = 6
+
+# magic, codec, value encoding, level, padding, sample count, payload bytes
+_BLOCK_HEADER = struct.Struct("<4sBBBxII")
+BLOCK_HEADER_SIZE = _BLOCK_HEADER.size
+
+
+def _compress(data, codec, level):
+    if codec == CODECS["zlib"]:
+        return zlib.compress(data, level)
+    return lzma.compress(data, preset=level)
+
+
+def _decompress(data, codec):
+    if codec == CODECS["zlib"]:
+        return zlib.decompress(data)
+    if codec == CODECS["lzma"]:
+        return lzma.decompress(data)
+    raise ValueError(f"unknown log block codec {codec}")
+
+
+def _shuffle(bits):
+    return bits.view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def _unshuffle(raw, n):
+    return np.frombuffer(raw, dtype=np.uint8).reshape(8, n).T.copy().view("<i8").ravel()
+
+
+def _encode_values(bits, encoding):
+    out = bits.copy()
+    if encoding == VALUE_ENCODINGS["xor"]:
+        out[1:] = bits[1:] ^ bits[:-1]
+    elif encoding == VALUE_ENCODINGS["delta"]:
+        out[1:] = bits[1:] - bits[:-1]  # int64 wraps around, which still decodes exactly
+    return out
+
+
+def _decode_values(bits, encoding):
+    if encoding == VALUE_ENCODINGS["xor"]:
+        return np.bitwise_xor.accumulate(bits)
+    if encoding == VALUE_ENCODINGS["delta"]:
+        return np.cumsum(bits, dtype=np.int64)
+    return bits
+
+
+def encode_block(t, y, codec="zlib", level=DEFAULT_LEVEL, values="delta"):
+    """One compressed block holding the samples t, y (lossless)."""
+    if codec not in CODECS:
+        raise ValueError(f"unknown compression '{codec}', expected one of {tuple(CODECS)}")
+    if values not in VALUE_ENCODINGS:
+        raise ValueError(f"unknown value encoding '{values}', expected one of {tuple(VALUE_ENCODINGS)}")
+    t_bits = np.ascontiguousarray(t, dtype="<f8").view("<i8")
+    y_bits = np.ascontiguousarray(y, dtype="<f8").view("<i8")
+    t_enc = _encode_values(_encode_values(t_bits, VALUE_ENCODINGS["delta"]), VALUE_ENCODINGS["delta"])
+    y_enc = _encode_values(y_bits, VALUE_ENCODINGS[values])
+    payload = _compress(_shuffle(t_enc) + _shuffle(y_enc), CODECS[codec], level)
+    header = _BLOCK_HEADER.pack(BLOCK_MAGIC, CODECS[codec], VALUE_ENCODINGS[values], level,
+                                len(t_bits), len(payload))
+    return header + payload
+
+
+def read_block_header(raw, offset=0):
+    """(sample count, payload bytes) of the block starting at offset."""
+    magic, _, _, _, count, nbytes = _BLOCK_HEADER.unpack_from(raw, offset)
+    if magic != BLOCK_MAGIC:
+        raise ValueError(f"not a compressed log block at offset {offset} (bad magic)")
+    return count, nbytes
+
+
+def decode_blocks(raw):
+    """t and y of all the complete blocks in raw, a torn block at the end is left out."""
+    t_parts, y_parts = [], []
+    offset = 0
+    while offset + BLOCK_HEADER_SIZE <= len(raw):
+        magic, codec, encoding, _, n, nbytes = _BLOCK_HEADER.unpack_from(raw, offset)
+        if magic != BLOCK_MAGIC:
+            raise ValueError(f"not a compressed log block at offset {offset} (bad magic)")
+        start = offset + BLOCK_HEADER_SIZE
+        if start + nbytes > len(raw):
+            break
+        data = _decompress(raw[start:start + nbytes], codec)
+        t_bits = _decode_values(_decode_values(_unshuffle(data[:8 * n], n), VALUE_ENCODINGS["delta"]),
+                                VALUE_ENCODINGS["delta"])
+        y_bits = _decode_values(_unshuffle(data[8 * n:], n), encoding)
+        t_parts.append(t_bits.view("<f8"))
+        y_parts.append(y_bits.view("<f8"))
+        offset = start + nbytes
+    if not t_parts:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(t_parts), np.concatenate(y_parts)
+
+
+class CompressionStats:
+    """Running totals for picking a codec and level: ratio and CPU time per MB."""
+
+    def __init__(self):
+        self.blocks = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.cpu_seconds = 0.0
+
+    def add(self, raw_bytes, stored_bytes, cpu_seconds):
+        self.blocks += 1
+        self.raw_bytes += raw_bytes
+        self.stored_bytes += stored_bytes
+        self.cpu_seconds += cpu_seconds
+
+    def report(self):
+        megabytes = self.raw_bytes / 1e6
+        return {
+            "blocks": self.blocks,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "ratio": self.raw_bytes / self.stored_bytes if self.stored_bytes else 0.0,
+            "cpu_seconds": self.cpu_seconds,
+            "cpu_ms_per_mb": 1e3 * self.cpu_seconds / megabytes if megabytes else 0.0,
+        }
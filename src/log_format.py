@@ -0,0 +1,122 @@
+import os
+import struct
+
+import numpy as np
+
+# binary log layout: a fixed size little endian header followed by interleaved
+# (t, y) float64 records, so the body can be opened directly with np.memmap
+MAGIC = b"RTDLOG\x00\x00"
+VERSION = 1
+HEADER_SIZE = 128
+LAYOUT_INTERLEAVED = 0
+LAYOUT_BLOCKS = 1  # compressed blocks of src.log_codec instead of raw records
+LAYOUT_CHANNELS = 2  # several channels in one file, as channel blocks (see below)
+RECORD_DTYPE = np.dtype([("t", "<f8"), ("y", "<f8")])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+NAME_SIZE = 64
+
+# magic, version, header size, layout, record dtype, sample rate (Hz), start time (unix s), channel name
+_HEADER_STRUCT = struct.Struct(f"<8sHHB8sdd{NAME_SIZE}s")
+
+
+def pack_header(channel_name, sample_rate=0.0, start_time=0.0, layout=LAYOUT_INTERLEAVED):
+    """Header for a new binary log, sample_rate 0 means unknown."""
+    name = channel_name.encode("utf-8")[:NAME_SIZE]
+    header = _HEADER_STRUCT.pack(MAGIC, VERSION, HEADER_SIZE, layout,
+                                 RECORD_DTYPE["t"].str.encode("ascii"), float(sample_rate),
+                                 float(start_time), name)
+    return header.ljust(HEADER_SIZE, b"\x00")
+
+
+def unpack_header(raw):
+    if len(raw) < _HEADER_STRUCT.size or raw[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a binary data log (bad magic)")
+    magic, version, header_size, layout, dtype, sample_rate, start_time, name = \
+        _HEADER_STRUCT.unpack_from(raw)
+    if version > VERSION:
+        raise ValueError(f"binary log version {version} is newer than supported ({VERSION})")
+    return {
+        "version": version,
+        "header_size": header_size,
+        "layout": layout,
+        "dtype": dtype.rstrip(b"\x00").decode("ascii"),
+        "sample_rate": sample_rate,
+        "start_time": start_time,
+        "channel_name": name.rstrip(b"\x00").decode("utf-8", errors="replace"),
+    }
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        return unpack_header(f.read(HEADER_SIZE))
+
+
+def open_binary_log(path):
+    """Header dict and a read only memmap of the records (fields 't' and 'y').
+
+    Nothing is loaded into memory, pages are read when the records are touched.
+    A torn record at the end of the file is left out.
+    """
+    header = read_header(path)
+    if header["layout"] != LAYOUT_INTERLEAVED:
+        kind = "multi channel" if header["layout"] == LAYOUT_CHANNELS else "compressed"
+        raise ValueError(f"{path} is a {kind} log, replay it with src.replay or read it with src.log_index.LogReader")
+    count = (os.path.getsize(path) - header["header_size"]) // RECORD_SIZE
+    if count <= 0:
+        return header, np.empty(0, dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=header["header_size"], shape=(count,))
+    return header, records
+
+
+# multi channel logs: after the file header every piece of data is a channel block,
+# a small header followed by its payload. Each file starts with one name block per
+# channel, so the files can be read without anything else.
+CHANNEL_MAGIC = b"RTDC"
+KIND_NAME = 0  # payload: sample rate (float64) and the utf-8 channel name
+KIND_RECORDS = 1  # payload: RECORD_DTYPE records
+KIND_COMPRESSED = 2  # payload: src.log_codec blocks
+
+# magic, channel, kind, padding, sample count, payload bytes
+_CHANNEL_BLOCK = struct.Struct("<4sHBxII")
+CHANNEL_BLOCK_SIZE = _CHANNEL_BLOCK.size
+_RATE = struct.Struct("<d")
+
+
+def pack_channel_block(channel, kind, count, payload):
+    return _CHANNEL_BLOCK.pack(CHANNEL_MAGIC, channel, kind, count, len(payload)) + payload
+
+
+def pack_channel_name(channel, name, sample_rate=0.0):
+    return pack_channel_block(channel, KIND_NAME, 0, _RATE.pack(float(sample_rate)) + name.encode("utf-8"))
+
+
+def read_channel_block_header(raw, offset=0):
+    """(channel, kind, sample count, payload bytes) of the channel block starting at offset."""
+    magic, channel, kind, count, nbytes = _CHANNEL_BLOCK.unpack_from(raw, offset)
+    if magic != CHANNEL_MAGIC:
+        raise ValueError(f"not a channel block at offset {offset} (bad magic)")
+    return channel, kind, count, nbytes
+
+
+def iter_channel_blocks(raw, offset=0):
+    """(channel, kind, count, payload start, block end) of every complete block in raw."""
+    while offset + CHANNEL_BLOCK_SIZE <= len(raw):
+        channel, kind, count, nbytes = read_channel_block_header(raw, offset)
+        start = offset + CHANNEL_BLOCK_SIZE
+        if start + nbytes > len(raw):
+            break  # torn at the end of the file
+        yield channel, kind, count, start, start + nbytes
+        offset = start + nbytes
+
+
+def read_channel_table(path):
+    """{channel: (name, sample_rate)} from the name blocks at the start of a multi channel log."""
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE + 64 * 1024)
+    table = {}
+    for channel, kind, _, start, end in iter_channel_blocks(raw, unpack_header(raw)["header_size"]):
+        if kind != KIND_NAME:
+            break
+        table[channel] = (raw[start + _RATE.size:end].decode("utf-8", errors="replace"),
+                          _RATE.unpack_from(raw, start)[0])
+    return table
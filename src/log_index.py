@@ -0,0 +1,557 @@
+import os
+import re
+import struct
+
+import numpy as np
+
+from src.csv_encoder import CSV_HEADER, MULTI_CSV_HEADER, strip_rows
+from src.log_codec import BLOCK_HEADER_SIZE, decode_blocks, read_block_header
+from src.log_format import (CHANNEL_BLOCK_SIZE, KIND_COMPRESSED, KIND_NAME, KIND_RECORDS, LAYOUT_BLOCKS,
+                            LAYOUT_CHANNELS, LAYOUT_INTERLEAVED, RECORD_DTYPE, RECORD_SIZE, iter_channel_blocks,
+                            read_channel_block_header, read_channel_table, read_header)
+
+# every data segment (name.csv, name_2.bin, ...) gets a sidecar "<segment>.idx":
+# a small header followed by one fixed size entry per chunk, a chunk being the
+# rows of up to CHUNK_SECONDS of writes (IndexCoalescer). Entries are in time
+# order, so a time range maps to a run of chunks with two binary searches and
+# only those bytes are read.
+INDEX_MAGIC = b"RTDIDX\x00\x00"
+INDEX_VERSION = 2  # indices of other versions are rebuilt
+INDEX_SUFFIX = ".idx"
+FORMAT_CSV = 0
+FORMAT_BINARY = 1
+INDEX_DTYPE = np.dtype([("t_first", "<f8"), ("t_last", "<f8"), ("offset", "<u8"),
+                        ("nbytes", "<u8"), ("count", "<u8"), ("channel", "<u4")])
+
+# magic, version, data format, padding
+_INDEX_HEADER = struct.Struct("<8sHB5x")
+INDEX_HEADER_SIZE = _INDEX_HEADER.size
+
+REINDEX_ROWS = 100_000  # rows per chunk when indexing a segment written without an index
+READ_SIZE = 4 << 20  # bytes read at a time when indexing a segment
+CHUNK_SECONDS = 10.0  # time span of a chunk, at most
+CHUNK_SAMPLES = 100_000  # samples of a chunk, at most
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def segment_format(path):
+    return FORMAT_BINARY if path.endswith(".bin") else FORMAT_CSV
+
+
+def write_index_entries(f, path, entries):
+    """Record chunks (an INDEX_DTYPE array) of the data file `path` in its sidecar
+    index, open for appending as f."""
+    if f.tell() == 0:
+        f.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, segment_format(path)))
+    f.write(entries.tobytes())
+
+
+def append_index_entries(path, entries):
+    with open(index_path(path), 'ab') as f:
+        write_index_entries(f, path, entries)
+
+
+def index_entries(row_ends, row_samples, row_channels, t, first_row, end_row, shift):
+    """Entries for the rows first_row:end_row of an encoded block, one per run of
+    rows of the same channel.
+
+    row_ends, row_samples (samples up to the end of each row), row_channels and
+    t cover the whole block, shift maps block byte offsets to file offsets.
+    """
+    rows = np.arange(first_row, end_row)
+    channels = row_channels[rows]
+    run_starts = rows[np.flatnonzero(np.r_[True, channels[1:] != channels[:-1]])]
+    run_ends = np.r_[run_starts[1:], end_row]
+    byte_starts = np.where(run_starts > 0, row_ends[run_starts - 1], 0)
+    byte_ends = row_ends[run_ends - 1]
+    sample_starts = np.where(run_starts > 0, row_samples[run_starts - 1], 0)
+    sample_ends = row_samples[run_ends - 1]
+
+    entries = np.empty(len(run_starts), dtype=INDEX_DTYPE)
+    entries["t_first"] = t[sample_starts]
+    entries["t_last"] = t[sample_ends - 1]
+    entries["offset"] = byte_starts + shift
+    entries["nbytes"] = byte_ends - byte_starts
+    entries["count"] = sample_ends - sample_starts
+    entries["channel"] = row_channels[run_starts]
+    return entries
+
+
+class IndexCoalescer:
+    """Merges the index entries of consecutive writes to a file into one entry
+    per channel, until a chunk spans `seconds` or holds `max_samples`.
+
+    In a multi channel log a merged entry runs from the channel's first block
+    to its last one, the blocks of the other channels in between included
+    (decode_chunks skips them). The entries of all channels are handed out
+    together, so the index always ends where a write ended.
+    """
+
+    def __init__(self, seconds=CHUNK_SECONDS, max_samples=CHUNK_SAMPLES):
+        self.seconds = seconds
+        self.max_samples = max_samples
+        self.pending = {}  # channel -> merged entry (an INDEX_DTYPE array of one)
+
+    def add(self, entries):
+        """Merge the entries of one write, returns the chunks that are complete
+        (all the pending ones once any is full, usually none)."""
+        full = False
+        for k in range(len(entries)):
+            entry = entries[k:k + 1]
+            channel = int(entry["channel"][0])
+            merged = self.pending.get(channel)
+            if merged is None:
+                merged = self.pending[channel] = entry.copy()
+            else:
+                merged["t_first"] = np.minimum(merged["t_first"], entry["t_first"])
+                merged["t_last"] = np.maximum(merged["t_last"], entry["t_last"])
+                merged["nbytes"] = entry["offset"] + entry["nbytes"] - merged["offset"]
+                merged["count"] += entry["count"]
+            full = full or merged["count"][0] >= self.max_samples or \
+                merged["t_last"][0] - merged["t_first"][0] >= self.seconds
+        return self.take() if full else np.empty(0, dtype=INDEX_DTYPE)
+
+    def take(self):
+        """The pending chunks, e.g. when the file is finished. They are ordered by
+        where they end, so an index torn part way through them ends before the
+        data and recovery (src.log_recovery) notices."""
+        if not self.pending:
+            return np.empty(0, dtype=INDEX_DTYPE)
+        entries = np.concatenate(list(self.pending.values()))
+        self.pending = {}
+        return entries[np.argsort(entries["offset"] + entries["nbytes"], kind="stable")]
+
+
+def index_version(path):
+    """Version of the sidecar index of `path`, None when there is no valid one."""
+    idx = index_path(path)
+    if not os.path.exists(idx):
+        return None
+    with open(idx, 'rb') as f:
+        raw = f.read(INDEX_HEADER_SIZE)
+    if len(raw) < INDEX_HEADER_SIZE or raw[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        return None
+    return _INDEX_HEADER.unpack(raw)[1]
+
+
+def read_index(path):
+    """Chunk entries of the data file `path`, None when it has no index (or one
+    of an older version)."""
+    idx = index_path(path)
+    if not os.path.exists(idx):
+        return None
+    with open(idx, 'rb') as f:
+        raw = f.read()
+    if len(raw) < INDEX_HEADER_SIZE or raw[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        raise ValueError(f"{idx} is not a log index (bad magic)")
+    _, version, _ = _INDEX_HEADER.unpack_from(raw)
+    if version > INDEX_VERSION:
+        raise ValueError(f"log index version {version} is newer than supported ({INDEX_VERSION})")
+    if version < INDEX_VERSION:
+        return None
+    count = (len(raw) - INDEX_HEADER_SIZE) // INDEX_DTYPE.itemsize  # a torn last entry is left out
+    return np.frombuffer(raw, dtype=INDEX_DTYPE, count=count, offset=INDEX_HEADER_SIZE)
+
+
+def parse_csv_rows(data):
+    """t and y columns of "t,y\\n" rows."""
+    values = np.fromstring(data.decode("ascii").replace("\n", ","), dtype=np.float64, sep=",")
+    values = values[:len(values) // 2 * 2]
+    return values[0::2], values[1::2]
+
+
+def segment_layout(path):
+    """LAYOUT_* of a data segment, csv files are either single (LAYOUT_INTERLEAVED)
+    or multi channel (LAYOUT_CHANNELS)."""
+    if segment_format(path) == FORMAT_BINARY:
+        return read_header(path)["layout"]
+    with open(path, 'rb') as f:
+        head = f.read(len(MULTI_CSV_HEADER))
+    return LAYOUT_CHANNELS if head == MULTI_CSV_HEADER else LAYOUT_INTERLEAVED
+
+
+def decode_channel_blocks(raw):
+    """t and y of the data blocks in a run of channel blocks of the channel of the
+    first one, blocks of other channels in between are skipped."""
+    t_parts, y_parts = [], []
+    first = None
+    for channel, kind, _, start, end in iter_channel_blocks(raw):
+        first = channel if first is None else first
+        if channel != first:
+            continue
+        if kind == KIND_RECORDS:
+            records = np.frombuffer(raw[start:end], dtype=RECORD_DTYPE)
+            t_parts.append(records["t"])
+            y_parts.append(records["y"])
+        elif kind == KIND_COMPRESSED:
+            t, y = decode_blocks(raw[start:end])
+            t_parts.append(t)
+            y_parts.append(y)
+    if not t_parts:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(t_parts), np.concatenate(y_parts)
+
+
+def select_rows(data, prefix):
+    """The rows of data that start with prefix."""
+    chars = np.frombuffer(data, dtype=np.uint8)
+    row_ends = np.flatnonzero(chars == ord("\n")) + 1
+    row_starts = np.r_[0, row_ends[:-1]]
+    match = np.ones(len(row_starts), dtype=bool)
+    for k, char in enumerate(prefix):
+        match &= chars[np.minimum(row_starts + k, len(chars) - 1)] == char
+    if match.all():
+        return data
+    return chars[np.repeat(match, row_ends - row_starts)].tobytes()
+
+
+def decode_chunks(data, file_format, layout):
+    """t and y of consecutive chunks of one channel read from a segment, the
+    channel of the first row or block."""
+    if file_format == FORMAT_CSV:
+        if layout == LAYOUT_CHANNELS:
+            prefix = data[:data.index(b",") + 1]
+            data = strip_rows(select_rows(data, prefix), len(prefix))  # drop the channel name column
+        return parse_csv_rows(data)
+    if layout == LAYOUT_BLOCKS:
+        return decode_blocks(data)
+    if layout == LAYOUT_CHANNELS:
+        return decode_channel_blocks(data)
+    records = np.frombuffer(data, dtype=RECORD_DTYPE, count=len(data) // RECORD_SIZE)
+    return records["t"].copy(), records["y"].copy()
+
+
+def rebuild_index(path, rows_per_chunk=REINDEX_ROWS):
+    """Scan a segment written without an index once and write its sidecar index."""
+    if os.path.exists(index_path(path)):
+        os.remove(index_path(path))
+    index_tail(path, None, rows_per_chunk)
+    return read_index(path)
+
+
+def iter_data_blocks(raw, layout):
+    """(channel, sample count, start, end) of every complete data block in raw,
+    compressed blocks (LAYOUT_BLOCKS) or channel blocks without the name blocks."""
+    if layout == LAYOUT_CHANNELS:
+        for channel, kind, count, start, end in iter_channel_blocks(raw):
+            if kind != KIND_NAME:
+                yield channel, count, start - CHANNEL_BLOCK_SIZE, end
+        return
+    position = 0
+    while position + BLOCK_HEADER_SIZE <= len(raw):
+        count, nbytes = read_block_header(raw, position)
+        end = position + BLOCK_HEADER_SIZE + nbytes
+        if end > len(raw):
+            break
+        yield 0, count, position, end
+        position = end
+
+
+def index_records(data, rows_per_chunk, final):
+    """Entries of raw records, one per rows_per_chunk rows, and the bytes they
+    cover. Unless final the rows of an incomplete chunk are left for later."""
+    rows = len(data) // RECORD_SIZE
+    if not final:
+        rows = rows // rows_per_chunk * rows_per_chunk
+    t = np.frombuffer(data, dtype=RECORD_DTYPE, count=rows)["t"]
+    starts = np.arange(0, rows, rows_per_chunk)
+    ends = np.minimum(starts + rows_per_chunk, rows)
+    entries = np.zeros(len(starts), dtype=INDEX_DTYPE)
+    entries["t_first"] = t[starts]
+    entries["t_last"] = t[ends - 1]
+    entries["offset"] = starts * RECORD_SIZE
+    entries["nbytes"] = (ends - starts) * RECORD_SIZE
+    entries["count"] = ends - starts
+    return entries, rows * RECORD_SIZE
+
+
+def index_blocks(data, layout):
+    """Entries of the complete compressed or channel blocks in data, one per
+    block, each one decoded for its time range."""
+    entries, used = [], 0
+    for channel, count, start, end in iter_data_blocks(data, layout):
+        t, _ = decode_chunks(data[start:end], FORMAT_BINARY, layout)
+        entries.append((t[0], t[-1], start, end - start, count, channel))
+        used = end
+    return np.array(entries, dtype=INDEX_DTYPE), used
+
+
+def index_csv_rows(data, layout, numbers, rows_per_chunk):
+    """Entries of the complete csv rows in data, one per run of rows of a channel
+    and every rows_per_chunk rows. numbers maps the channel names of a multi
+    channel csv to their numbers, in the order the names show up in."""
+    used = data.rfind(b"\n") + 1
+    if used == 0:
+        return np.empty(0, dtype=INDEX_DTYPE), 0
+    data = data[:used]
+    row_ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n")) + 1
+    if layout == LAYOUT_CHANNELS:
+        columns = [line.split(b",", 1) for line in data.split(b"\n")[:-1]]
+        channels = np.array([numbers.setdefault(name, len(numbers)) for name, _ in columns], dtype=np.int64)
+        t, _ = parse_csv_rows(b"".join(rest + b"\n" for _, rest in columns))
+    else:
+        channels = np.zeros(len(row_ends), dtype=np.int64)
+        t, _ = parse_csv_rows(data)
+    runs = channels * (len(t) // rows_per_chunk + 1) + np.arange(len(t)) // rows_per_chunk
+    entries = index_entries(row_ends, np.arange(1, len(t) + 1), runs, t, 0, len(t), 0)
+    if len(entries):
+        entries["channel"] = channels[np.cumsum(entries["count"]) - entries["count"]]
+    return entries, used
+
+
+def index_tail(path, offset=None, rows_per_chunk=REINDEX_ROWS):
+    """Append index entries for the data from byte `offset` (a row or block
+    boundary, None for the start of the data) to the end of the segment.
+
+    The segment is read READ_SIZE bytes at a time and the chunks are merged
+    like while logging. Multi channel csv numbers its channels by the order the
+    names show up in, so it can only be indexed from the start.
+    """
+    layout = segment_layout(path)
+    binary = segment_format(path) == FORMAT_BINARY
+    if not binary and layout == LAYOUT_CHANNELS and offset is not None:
+        raise ValueError("multi channel csv logs can only be indexed from the start")
+    coalescer = IndexCoalescer(max_samples=rows_per_chunk)
+    numbers = {}
+    chunks = []
+    with open(path, 'rb') as f:
+        if offset is None and binary:
+            offset = read_header(path)["header_size"]
+        elif offset is None:
+            header = MULTI_CSV_HEADER if layout == LAYOUT_CHANNELS else CSV_HEADER
+            offset = len(header) if f.read(len(header)) == header else 0
+        f.seek(offset)
+        rest = b""
+        while True:
+            more = f.read(READ_SIZE)
+            data = rest + more
+            if not binary:
+                entries, used = index_csv_rows(data, layout, numbers, rows_per_chunk)
+            elif layout == LAYOUT_INTERLEAVED:
+                entries, used = index_records(data, rows_per_chunk, final=not more)
+            else:
+                entries, used = index_blocks(data, layout)
+            entries["offset"] += offset
+            chunks.extend(coalescer.add(entries[k:k + 1]) for k in range(len(entries)))
+            offset += used
+            rest = data[used:]
+            if not more:
+                break  # what is left is a torn row or block
+    entries = np.concatenate(chunks + [coalescer.take()])
+    if len(entries):
+        append_index_entries(path, entries)
+
+
+def log_channels(path):
+    """{channel number: (name, sample rate)} of a log segment, a single channel
+    log has channel 0 named after its signal."""
+    header = read_header(path) if segment_format(path) == FORMAT_BINARY else None
+    if header is not None and header["layout"] == LAYOUT_CHANNELS:
+        return read_channel_table(path)
+    if header is not None:
+        return {0: (header["channel_name"], header["sample_rate"])}
+    if segment_layout(path) == LAYOUT_CHANNELS:
+        raise ValueError(f"{path}: read multi channel csv logs with LogReader")
+    return {0: (os.path.splitext(os.path.basename(path))[0], 0.0)}
+
+
+def iter_chunk_blocks(f, entry, layout):
+    """(sample count, start, end) of every data block of the channel of an index
+    entry of a compressed or multi channel segment, open as f.
+
+    Only the block headers are read on the way, the payloads of the other
+    channels are skipped. f.read(end - start) from start is one block for
+    decode_chunks.
+    """
+    position = int(entry["offset"])
+    end = position + int(entry["nbytes"])
+    while position < end:
+        f.seek(position)
+        if layout == LAYOUT_CHANNELS:
+            channel, kind, count, nbytes = read_channel_block_header(f.read(CHANNEL_BLOCK_SIZE))
+            block_end = position + CHANNEL_BLOCK_SIZE + nbytes
+            if channel == entry["channel"] and kind != KIND_NAME:
+                yield count, position, block_end
+        else:
+            count, nbytes = read_block_header(f.read(BLOCK_HEADER_SIZE))
+            block_end = position + BLOCK_HEADER_SIZE + nbytes
+            yield count, position, block_end
+        position = block_end
+
+
+def find_segments(directory, signal_name, file_format=None):
+    """Data segments logged for a signal, in rotation order.
+
+    file_format is "csv", "bin" or None for both.
+    """
+    pattern = re.compile(re.escape(signal_name) + r"(?:_(\d+))?\.(csv|bin)$")
+    segments = []
+    for name in os.listdir(directory):
+        match = pattern.fullmatch(name)
+        if match and (file_format is None or match.group(2) == file_format):
+            segments.append((int(match.group(1) or 0), name))
+    return [os.path.join(directory, name) for _, name in sorted(segments)]
+
+
+class LogReader:
+    """Time range queries over all the rotated segments of one logged signal, or
+    of one channel of a multi channel log (src.multi_logger).
+
+    The sidecar indices are loaded once (a few bytes per chunk), a query binary
+    searches them and reads only the chunks overlapping the range, with one
+    read per segment.
+    """
+
+    def __init__(self, directory, signal_name, file_format=None):
+        self.directory = directory
+        self.signal_name = signal_name
+        self.file_format = file_format
+        self.indices = {}  # segment path -> (index file size, entries)
+        self.layouts = {}  # segment path -> LAYOUT_*
+        self.tables = {}  # segment path -> {channel number in that file: name}
+        self.refresh()
+
+    def refresh(self):
+        """Pick up new segments and chunks, e.g. while the signal is still being logged."""
+        self.segments = find_segments(self.directory, self.signal_name, self.file_format)
+        self.channel_names = {}  # name -> channel number in self.entries
+        entries, owners = [], []
+        for number, path in enumerate(self.segments):
+            idx = index_path(path)
+            size = os.path.getsize(idx) if os.path.exists(idx) else None
+            cached = self.indices.get(path)
+            if cached is None or cached[0] != size:
+                try:
+                    index = read_index(path) if size is not None else None
+                    if index is None:
+                        index = rebuild_index(path)
+                except ValueError as e:
+                    print(f"[ERROR] Skipping log segment {path}: {e}")
+                    index = None
+                if index is None:  # nothing logged in this segment yet
+                    index = np.empty(0, dtype=INDEX_DTYPE)
+                cached = (os.path.getsize(idx) if os.path.exists(idx) else None, index)
+                self.indices[path] = cached
+            # channel numbers are per file, match them up by name
+            index = cached[1].copy()
+            table = self.segment_channels(path, index)
+            for local in np.unique(index["channel"]):
+                name = table[int(local)]
+                index["channel"][cached[1]["channel"] == local] = \
+                    self.channel_names.setdefault(name, len(self.channel_names))
+            entries.append(index)
+            owners.append(np.full(len(index), number, dtype=np.int64))
+
+        entries = np.concatenate(entries) if entries else np.empty(0, dtype=INDEX_DTYPE)
+        owners = np.concatenate(owners) if owners else np.empty(0, dtype=np.int64)
+        # csv and bin segments of the same signal may interleave, keep the chunks in time order
+        order = np.argsort(entries["t_first"], kind="stable")
+        self.entries = entries[order]
+        self.owners = owners[order]
+        self.views = {}
+
+    def segment_channels(self, path, entries):
+        """{channel number: name} of one segment, a single channel log has just its signal name."""
+        table = self.tables.setdefault(path, {})
+        missing = [int(channel) for channel in np.unique(entries["channel"]) if int(channel) not in table]
+        if not missing:
+            return table
+        if self.layout(path) != LAYOUT_CHANNELS:
+            table[0] = self.signal_name
+        elif segment_format(path) == FORMAT_BINARY:
+            table.update((channel, name) for channel, (name, _) in read_channel_table(path).items())
+        else:
+            # csv rows start with the name, peek at the first row of the channel
+            for channel in missing:
+                entry = entries[entries["channel"] == channel][0]
+                with open(path, 'rb') as f:
+                    f.seek(int(entry["offset"]))
+                    row = f.read(int(min(entry["nbytes"], 4096)))
+                table[channel] = row[:row.index(b",")].decode("utf-8", errors="replace")
+        return table
+
+    def view(self, channel):
+        """Entries, owners and reach of one channel, reach being the running max
+        of t_last, which is sorted even when chunks overlap."""
+        if channel not in self.views:
+            mine = self.entries["channel"] == channel
+            entries = self.entries[mine]
+            reach = np.maximum.accumulate(entries["t_last"]) if len(entries) else np.empty(0)
+            self.views[channel] = (entries, self.owners[mine], reach)
+        return self.views[channel]
+
+    def channels(self):
+        """{name: channel number} of the channels with logged data."""
+        return self.channel_names
+
+    def channel_number(self, channel):
+        if channel is None:
+            numbers = np.unique(self.entries["channel"])
+            if len(numbers) > 1:
+                raise ValueError(f"log holds channels {sorted(self.channels())}, pick one")
+            return int(numbers[0]) if len(numbers) else 0
+        if isinstance(channel, str):
+            if channel not in self.channels():
+                raise ValueError(f"no channel '{channel}' in the log, it has {sorted(self.channels())}")
+            return self.channels()[channel]
+        return int(channel)
+
+    def layout(self, path):
+        if path not in self.layouts:
+            self.layouts[path] = segment_layout(path)
+        return self.layouts[path]
+
+    def time_range(self, channel=None):
+        entries, _, reach = self.view(self.channel_number(channel))
+        if len(entries) == 0:
+            return None
+        return float(entries["t_first"][0]), float(reach[-1])
+
+    def chunks(self, t_start, t_end, channel=None):
+        """Entries and owning segments of the chunks overlapping [t_start, t_end]."""
+        entries, owners, reach = self.view(self.channel_number(channel))
+        first = int(np.searchsorted(reach, t_start, side="left"))
+        last = max(first, int(np.searchsorted(entries["t_first"], t_end, side="right")))
+        return entries[first:last], owners[first:last]
+
+    def read(self, t_start, t_end, channel=None):
+        """All samples with t_start <= t <= t_end as two float64 arrays.
+
+        channel is a name or number, only needed for multi channel logs.
+        """
+        entries, owners = self.chunks(t_start, t_end, channel)
+        t_parts, y_parts = [], []
+        for number in np.unique(owners):
+            t, y = self.read_chunks(self.segments[number], entries[owners == number])
+            t_parts.append(t)
+            y_parts.append(y)
+        if not t_parts:
+            return np.empty(0), np.empty(0)
+
+        t = np.concatenate(t_parts)
+        y = np.concatenate(y_parts)
+        if len(t_parts) > 1 and np.any(np.diff(t) < 0):
+            order = np.argsort(t, kind="stable")
+            t, y = t[order], y[order]
+        keep = slice(np.searchsorted(t, t_start, side="left"), np.searchsorted(t, t_end, side="right"))
+        return t[keep], y[keep]
+
+    def read_chunks(self, path, entries):
+        # one read spanning the chunks, then each run of back to back chunks is decoded
+        start = int(entries["offset"].min())
+        end = int((entries["offset"] + entries["nbytes"]).max())
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        offsets = entries["offset"].astype(np.int64) - start
+        ends = offsets + entries["nbytes"].astype(np.int64)
+        breaks = np.flatnonzero(offsets[1:] != ends[:-1]) + 1
+        t_parts, y_parts = [], []
+        for first, last in zip(np.r_[0, breaks], np.r_[breaks, len(entries)]):
+            t, y = decode_chunks(data[offsets[first]:ends[last - 1]], segment_format(path), self.layout(path))
+            t_parts.append(t)
+            y_parts.append(y)
+        return np.concatenate(t_parts), np.concatenate(y_parts)
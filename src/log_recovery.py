@@ -0,0 +1,127 @@
+import os
+import struct
+
+import numpy as np
+
+from src.csv_encoder import CSV_HEADER, MULTI_CSV_HEADER
+from src.log_codec import BLOCK_HEADER_SIZE
+from src.log_format import CHANNEL_BLOCK_SIZE, LAYOUT_BLOCKS, LAYOUT_CHANNELS, MAGIC, RECORD_SIZE, read_header
+from src.log_index import (FORMAT_BINARY, INDEX_DTYPE, INDEX_HEADER_SIZE, INDEX_VERSION, find_segments, index_path,
+                           index_tail, index_version, read_index, rebuild_index, segment_format, segment_layout)
+
+# both block headers end with the payload size (uint32), see src.log_codec and src.log_format
+_PAYLOAD_SIZE = struct.Struct("<I")
+TAIL_SCAN = 64 * 1024
+
+
+def is_log(path):
+    """True for files this app logged, a torn header included. Anything else is never touched."""
+    with open(path, 'rb') as f:
+        head = f.read(len(MULTI_CSV_HEADER))
+    if segment_format(path) == FORMAT_BINARY:
+        starts = (MAGIC,)
+    else:
+        starts = (CSV_HEADER, MULTI_CSV_HEADER)
+    return any(head[:len(start)] == start[:len(head)] for start in starts)
+
+
+def last_complete_block(f, offset, size, header_size):
+    """End of the last complete block from offset on, walking the block headers."""
+    while offset + header_size <= size:
+        f.seek(offset + header_size - _PAYLOAD_SIZE.size)
+        end = offset + header_size + _PAYLOAD_SIZE.unpack(f.read(_PAYLOAD_SIZE.size))[0]
+        if end > size:
+            break
+        offset = end
+    return offset
+
+
+def last_complete_row(f, size):
+    """End of the last full csv row, scanning backwards from the end of the file."""
+    end = size
+    while end > 0:
+        start = max(0, end - TAIL_SCAN)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return 0
+
+
+def valid_size(path, indexed_end=0):
+    """Bytes at the start of a data segment that hold complete rows or blocks.
+
+    Blocks are only walked from indexed_end, where the index says the data ends.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if segment_format(path) != FORMAT_BINARY:
+            return last_complete_row(f, size)
+        try:
+            header = read_header(path)
+        except ValueError:
+            return 0  # the header itself is torn
+        start = max(header["header_size"], min(indexed_end, size))
+        if header["layout"] == LAYOUT_BLOCKS:
+            return last_complete_block(f, start, size, BLOCK_HEADER_SIZE)
+        if header["layout"] == LAYOUT_CHANNELS:
+            return last_complete_block(f, start, size, CHANNEL_BLOCK_SIZE)
+        return start + (size - start) // RECORD_SIZE * RECORD_SIZE
+
+
+def recover_segment(path):
+    """Cut a torn record, row or block off the end of a data segment, e.g. after a
+    crash or power loss, and make its sidecar index match the data again.
+
+    Returns the number of bytes cut off.
+    """
+    if not os.path.exists(path) or not is_log(path):
+        return 0
+    entries = read_index(path) if index_version(path) == INDEX_VERSION else None
+    size = os.path.getsize(path)
+    # the last indexed chunk that is still entirely in the file
+    ends = entries["offset"] + entries["nbytes"] if entries is not None else np.empty(0)
+    indexed_end = int(ends[ends <= size].max(initial=0))
+    valid = valid_size(path, indexed_end)
+    if valid < size:
+        with open(path, 'r+b') as f:
+            f.truncate(valid)
+        print(f"[WARNING] Cut a torn tail of {size - valid} bytes off {path}")
+
+    idx = index_path(path)
+    if valid == 0:
+        if os.path.exists(idx):
+            os.remove(idx)
+        return size - valid
+    # keep the index entries inside the data and index what they miss (the data made
+    # it to disk, its index entry did not). The chunks of a multi channel log overlap,
+    # only a complete index of one can be trusted
+    keep = int(np.searchsorted(np.maximum.accumulate(ends), valid, side="right"))
+    if keep == 0 or (segment_layout(path) == LAYOUT_CHANNELS and (valid > ends.max() or keep < len(ends))):
+        rebuild_index(path)
+        return size - valid
+    idx_size = INDEX_HEADER_SIZE + keep * INDEX_DTYPE.itemsize
+    if os.path.getsize(idx) != idx_size:  # stale entries or a torn one
+        with open(idx, 'r+b') as f:
+            f.truncate(idx_size)
+    if valid > ends[keep - 1]:
+        index_tail(path, int(ends[keep - 1]))
+    return size - valid
+
+
+def recover_log(directory, signal_name):
+    """recover_segment on the segments of one log (name.csv, name_2.bin, ...),
+    {path: bytes cut off} of the damaged ones.
+
+    Other logs in the directory are left alone, recovering them can mean
+    rebuilding the index of a multi GB file.
+    """
+    damaged = {}
+    if not os.path.isdir(directory):
+        return damaged
+    for path in find_segments(directory, signal_name):
+        cut = recover_segment(path)
+        if cut:
+            damaged[path] = cut
+    return damaged
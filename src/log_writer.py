@@ -0,0 +1,230 @@
+import collections
+import pickle
+import tempfile
+import threading
+import time
+
+import numpy as np
+from PyQt5.QtCore import QObject, QThread, QCoreApplication, pyqtSlot
+
+# what enqueue() does when the queue is full
+BLOCK = "block"  # wait for the writer to make room
+DROP_OLDEST = "drop_oldest"  # discard the oldest queued block, never a call()
+SPILL = "spill"  # park blocks in a temporary file until the queue drains
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, SPILL)
+
+
+class SpillFile:
+    """FIFO of jobs whose sample arrays are pickled to an anonymous temporary file.
+
+    The write functions stay in memory, pickling a bound method would copy its logger.
+    """
+
+    def __init__(self):
+        self.file = None
+        self.read_pos = 0
+        self.count = 0
+        self.funcs = collections.deque()
+
+    def push(self, job):
+        if self.file is None:
+            self.file = tempfile.TemporaryFile()
+        self.file.seek(0, 2)
+        pickle.dump(job[1:], self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.funcs.append(job[0])
+        self.count += 1
+
+    def pop(self):
+        self.file.seek(self.read_pos)
+        job = (self.funcs.popleft(),) + pickle.load(self.file)
+        self.read_pos = self.file.tell()
+        self.count -= 1
+        if self.count == 0:  # fully drained, start over at the beginning
+            self.file.seek(0)
+            self.file.truncate()
+            self.read_pos = 0
+        return job
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class LogWriterWorker(QObject):
+    """Runs the writer loop inside the writer thread."""
+
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    @pyqtSlot()
+    def start_work(self):
+        self.writer.run()
+
+
+class LogWriter(QObject):
+    """Writes sample blocks to disk on its own thread.
+
+    The GUI thread only calls enqueue(), which puts (write_func, t, y) on a
+    bounded queue, and call() for file work that has to happen in order with
+    the writes (finishing or rotating a file, recovery). One writer is shared
+    by all the loggers.
+    """
+
+    def __init__(self, max_queued_blocks=256, overflow=BLOCK):
+        super().__init__()
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}")
+        self.max_queued_blocks = max_queued_blocks
+        self.overflow = overflow
+        self.queue = collections.deque()
+        self.spill = SpillFile()
+        self.condition = threading.Condition()
+        self.running = False
+        self.busy = False
+        self.open_loggers = set()  # loggers holding files open, finished on stop()
+
+        self.thread = QThread()
+        self.worker = LogWriterWorker(self)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.start_work)
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.queued_bytes = 0
+        self.max_queued_bytes = 0
+        self.blocks_written = 0
+        self.bytes_written = 0  # sample payload, not file bytes
+        self.dropped_blocks = 0
+        self.spilled_blocks = 0
+        self.last_latency = 0.0  # seconds from enqueue() until the block was written
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def start(self):
+        if not self.thread.isRunning():
+            self.running = True
+            self.thread.start()
+
+    def enqueue(self, write_func, t, y, control=False):
+        """Queue write_func(t, y). control jobs (see call()) are never dropped."""
+        self.start()
+        job = (write_func, t, y, time.perf_counter(), control)
+        size = t.nbytes + y.nbytes
+        with self.condition:
+            if len(self.queue) >= self.max_queued_blocks or self.spill.count:
+                if self.overflow == BLOCK:
+                    while len(self.queue) >= self.max_queued_blocks and self.running:
+                        self.condition.wait()
+                elif self.overflow == DROP_OLDEST:
+                    if not control:
+                        self.drop_oldest_block()
+                else:
+                    # once something is spilled newer blocks follow it, so the order is kept
+                    self.spill.push(job)
+                    self.spilled_blocks += 1
+                    self.queued_bytes += size
+                    self.max_queued_bytes = max(self.max_queued_bytes, self.queued_bytes)
+                    self.condition.notify_all()
+                    return
+            self.queue.append(job)
+            self.queued_bytes += size
+            self.max_queued_bytes = max(self.max_queued_bytes, self.queued_bytes)
+            self.condition.notify_all()
+
+    def drop_oldest_block(self):
+        # only sample blocks, losing a finish_file or a rotation would leave files broken.
+        # with nothing but calls queued the queue just grows past its bound for a while
+        for index, old in enumerate(self.queue):
+            if not old[4]:
+                del self.queue[index]
+                self.queued_bytes -= old[1].nbytes + old[2].nbytes
+                self.dropped_blocks += 1
+                return
+
+    def call(self, func):
+        """Run func() on the writer thread after everything queued so far."""
+        empty = np.empty(0)
+        self.enqueue(lambda t, y: func(), empty, empty, control=True)
+
+    def track(self, logger):
+        with self.condition:
+            self.open_loggers.add(logger)
+
+    def untrack(self, logger):
+        with self.condition:
+            self.open_loggers.discard(logger)
+
+    def next_job(self):
+        with self.condition:
+            while not self.queue and not self.spill.count:
+                if not self.running:
+                    return None
+                self.condition.wait()
+            job = self.queue.popleft() if self.queue else self.spill.pop()
+            self.queued_bytes -= job[1].nbytes + job[2].nbytes
+            self.busy = True
+            self.condition.notify_all()  # room for a blocked producer
+            return job
+
+    def run(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                break
+            write_func, t, y, queued_at, _ = job
+            try:
+                write_func(t, y)
+            except Exception as e:
+                # one bad block must not kill the writer thread, flush() would wait on it forever
+                print(f"[ERROR] Writing log block failed: {type(e).__name__}: {e}")
+            finally:
+                latency = time.perf_counter() - queued_at
+                with self.condition:
+                    self.busy = False
+                    self.blocks_written += 1
+                    self.bytes_written += t.nbytes + y.nbytes
+                    self.last_latency = latency
+                    self.max_latency = max(self.max_latency, latency)
+                    self.total_latency += latency
+                    self.condition.notify_all()
+
+    def flush(self):
+        """Wait until everything queued so far has been written."""
+        with self.condition:
+            while (self.queue or self.spill.count or self.busy) and self.thread.isRunning():
+                self.condition.wait(0.1)
+
+    def stop(self):
+        # the worker drains the queue before it leaves its loop
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread.isRunning():
+            self.thread.quit()
+            self.thread.wait()
+        self.spill.close()
+        # the writer thread is done, close what the loggers left open from here
+        for logger in list(self.open_loggers):
+            logger.finish_file()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "queued_blocks": len(self.queue) + self.spill.count,
+                "queued_bytes": self.queued_bytes,
+                "max_queued_bytes": self.max_queued_bytes,
+                "blocks_written": self.blocks_written,
+                "bytes_written": self.bytes_written,
+                "dropped_blocks": self.dropped_blocks,
+                "spilled_blocks": self.spilled_blocks,
+                "last_latency": self.last_latency,
+                "max_latency": self.max_latency,
+                "mean_latency": self.total_latency / self.blocks_written if self.blocks_written else 0.0,
+            }
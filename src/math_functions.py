@@ -1,4 +1,7 @@
+import re
+
 from graph_plotting_functionalities.plotting import *
+from src.expression import compile_expression
 
 
 # Signal name to function mapping
@@ -16,20 +19,25 @@ def get_signal_name(name):
     return signal_map.get(name, None)
 
 
-# Operation mapping with optional constant support
-operation_map = {
-    "A + B": lambda A, B, c: A + B,
-    "A - B": lambda A, B, c: A - B,
-    "A * B": lambda A, B, c: A * B,
-    "A / B": lambda A, B, c: np.divide(A, B, out=np.zeros_like(A), where=B != 0),
-    "sin(A)": lambda A, B, c: np.sin(A),
-    "cos(B)": lambda A, B, c: np.cos(B),
-    "sin(A) + 2*B": lambda A, B, c: np.sin(A) + 2 * B,
-    "A + k": lambda A, B, c: A + c,
-    "B * k": lambda A, B, c: B * c,
-    "A ^ 2": lambda A, B, c: A ** 2,
-    "A + B + k": lambda A, B, c: A + B + c
-}
+# Preset operations of the math dialog, expressions over A, B and the constant k
+PRESET_OPERATIONS = [
+    "A + B", "A - B", "A * B", "A / B", "sin(A)", "cos(B)", "sin(A) + 2*B",
+    "A + k", "B * k", "A ^ 2", "A + B + k",
+]
+
+
+def preset_expression(operation, input1, input2, constant=None):
+    """Compile one of the PRESET_OPERATIONS for two signals.
+
+    k is the constant (1 when there is none). Presets without k are scaled by
+    the constant when there is one, like the math graphs always did.
+    """
+    constant = str(constant).strip() if constant is not None else ""
+    value = float(constant) if constant else 1.0  # ValueError for anything that is not a number
+    text = operation
+    if constant and not re.search(r"\bk\b", operation):
+        text = f"({operation}) * k"
+    return compile_expression(text, {"A": input1, "B": input2}, constants={"k": value})
 
 
 # Expression computation function
@@ -41,16 +49,10 @@ def compute_expression(t, inputA, inputB, operation, constant=1.0):
         print("Invalid signal name(s):", inputA, inputB)
         return None
 
-    A = signalA(t)
-    B = signalB(t)
-
-    if operation not in operation_map:
-        print(f"Invalid operation: {operation}")
-        return None
-
     try:
-        result = operation_map[operation](A, B, constant)
-        return t, result
-    except Exception as e:
+        expression = preset_expression(operation, inputA, inputB, constant)
+        arrays = {inputA: signalA(t), inputB: signalB(t)}
+        return t, expression.evaluate([arrays[name] for name in expression.inputs]).copy()
+    except ValueError as e:  # ExpressionError included
         print(f"Error computing expression: {e}")
         return None
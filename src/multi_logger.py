@@ -0,0 +1,170 @@
+import functools
+import os
+import time
+
+import numpy as np
+
+from src.csv_encoder import MULTI_CSV_HEADER, encode_csv_block, prefix_rows
+from src.data_logger import DataLogger, PendingSamples
+from src.log_codec import encode_block
+from src.log_format import (KIND_COMPRESSED, KIND_RECORDS, LAYOUT_CHANNELS, RECORD_DTYPE, pack_channel_block,
+                            pack_channel_name, pack_header)
+
+
+class LogChannel(PendingSamples):
+    """One channel of a MultiChannelLogger, graphs append to it like to a DataLogger."""
+
+    def __init__(self, channel_id, name, sample_rate=0.0):
+        super().__init__()
+        self.channel_id = channel_id
+        self.name = name
+        self.sample_rate = sample_rate  # what the file header states, changed on the writer thread
+        self.new_rate = sample_rate  # the rate the graph logs at now
+
+
+class MultiChannelLogger(DataLogger):
+    """Logs several channels into one file (rotated like a DataLogger).
+
+    Every flush takes the pending samples of all channels and hands them to the
+    writer as a single job, so there is one file write per flush whatever the
+    number of channels. CSV files get a channel name column,
+    binary files hold one channel block per channel and flush (src.log_format).
+    The sidecar index has one entry per channel and chunk of flushes.
+    """
+
+    def __init__(self, name, directory, max_file_size, new_file, writer=None, **kwargs):
+        super().__init__(name, directory, max_file_size, new_file, writer=writer, **kwargs)
+        self.channels = []
+        self.started = False
+
+    def add_channel(self, name, sample_rate=0.0):
+        """Every file describes its channels up front, a channel added after the
+        first flush starts the next file (name_2, ...) once what is queued is written."""
+        name = name.replace(",", " ").replace("\n", " ")
+        taken = {channel.name for channel in self.channels}
+        unique = name
+        number = 2
+        while unique in taken:
+            unique = f"{name}_{number}"
+            number += 1
+        channel = LogChannel(len(self.channels), unique, sample_rate)
+        self.channels.append(channel)
+        if self.started:
+            if self.writer is not None:
+                self.writer.call(self.next_file)
+            else:
+                self.next_file()
+        return channel
+
+    def set_channel_rate(self, channel, sample_rate):
+        """A channel's output rate changed, e.g. it is resampled to another common
+        rate. Binary files state the rates up front, so what is pending is written
+        at the old rate and the next file (name_2, ...) starts with the new one."""
+        if sample_rate == channel.new_rate:
+            return
+        channel.new_rate = sample_rate
+        if not self.started:
+            channel.sample_rate = sample_rate
+            return
+        self.logg(force=True)
+
+        def change():
+            # on the writer thread, the header of the next file is written there
+            if self.file_format == "bin":
+                self.next_file()
+            channel.sample_rate = sample_rate
+        if self.writer is not None:
+            self.writer.call(change)
+        else:
+            change()
+
+    def next_file(self):
+        if not self.current_size:
+            return  # the file has no header yet, it will list the new channel
+        self.finish_file()
+        self.file_index += 1
+        self.file_path = self.get_file_path()
+        self.current_size = None
+
+    def get_file_path(self):
+        # numbered from the second file on, also when not rotating on size
+        if self.new_file or self.file_index == 1:
+            return super().get_file_path()
+        ext = "csv" if self.file_format == "csv" else "bin"
+        return os.path.join(self.directory, f"{self.signal_name}_{self.file_index}.{ext}")
+
+    def holding_back(self):
+        if not self.compression or self.file_format != "bin":
+            return False
+        pending = [channel for channel in self.channels if channel.pending]
+        if not pending:
+            return False
+        age = time.monotonic() - min(channel.pending_since for channel in pending)
+        return max(channel.pending_samples for channel in pending) < self.block_samples and age < self.max_block_age
+
+    def logg(self, force=False):
+        """Flush all channels at once, force skips holding back compressed blocks."""
+        if not force and self.holding_back():
+            return
+        self.started = True
+        ids, parts = [], []
+        for channel in self.channels:
+            t, y = channel.take_pending()
+            if t is not None:
+                ids.append(channel.channel_id)
+                parts.append((t, y))
+        if not parts:
+            return
+        counts = np.array([len(t) for t, _ in parts])
+        t = np.concatenate([t for t, _ in parts])
+        y = np.concatenate([y for _, y in parts])
+        write = self.write_channels_csv if self.file_format == "csv" else self.write_channels_binary
+        write_func = functools.partial(write, np.array(ids), counts)
+        if self.writer is not None:
+            self.writer.enqueue(write_func, t, y)
+        else:
+            write_func(t, y)
+
+    def logg_csv(self, force=False):
+        self.set_format("csv")
+        self.logg(force)
+
+    def logg_binary(self, force=False):
+        self.set_format("bin")
+        self.logg(force)
+
+    def write_channels_csv(self, ids, counts, t, y):
+        # all channels are encoded at once, rows stay grouped per channel so each
+        # channel is one run in the index
+        data, row_ends = encode_csv_block(t, y, self.csv_precision)
+        prefixes = [(self.channels[channel_id].name + ",").encode("utf-8") for channel_id in ids]
+        data, row_ends = prefix_rows(data, row_ends, prefixes, counts)
+        self.write_rows(data, row_ends, t, lambda: MULTI_CSV_HEADER, row_channels=np.repeat(ids, counts))
+
+    def write_channels_binary(self, ids, counts, t, y):
+        started = time.thread_time()
+        blocks = []
+        for channel_id, start, end in zip(ids, np.cumsum(counts) - counts, np.cumsum(counts)):
+            if self.compression:
+                payload = encode_block(t[start:end], y[start:end], self.compression,
+                                       self.compression_level, self.value_encoding)
+                blocks.append(pack_channel_block(channel_id, KIND_COMPRESSED, end - start, payload))
+            else:
+                records = np.empty(end - start, dtype=RECORD_DTYPE)
+                records["t"] = t[start:end]
+                records["y"] = y[start:end]
+                blocks.append(pack_channel_block(channel_id, KIND_RECORDS, end - start, records.tobytes()))
+        data = b"".join(blocks)
+        if self.compression:
+            self.compression_stats.add(t.nbytes + y.nbytes, len(data), time.thread_time() - started)
+        # one channel block per row
+        self.write_rows(data, np.cumsum([len(block) for block in blocks]), t, self.binary_header,
+                        row_samples=np.cumsum(counts), row_channels=ids)
+
+    def binary_header(self):
+        return pack_header(self.signal_name, 0.0, time.time(), LAYOUT_CHANNELS) + b"".join(
+            pack_channel_name(channel.channel_id, channel.name, channel.sample_rate) for channel in self.channels)
+
+    def can_append(self):
+        # the channel table of an earlier session would not match, always start a fresh file
+        return False
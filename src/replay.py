@@ -0,0 +1,249 @@
+import collections
+
+import numpy as np
+from PyQt5.QtCore import QObject, QThread, QCoreApplication, pyqtSignal, pyqtSlot
+
+from src.log_format import LAYOUT_INTERLEAVED, open_binary_log, read_header
+from src.log_index import (FORMAT_BINARY, decode_chunks, iter_chunk_blocks, log_channels, read_index,
+                           rebuild_index)
+from src.scheduler import DROP, DeadlineScheduler
+
+MAX_SPEED = 0  # replay as fast as the GUI can take it
+SPEEDS = {"1x": 1.0, "10x": 10.0, "100x": 100.0, "Max": MAX_SPEED}
+
+
+def find_index(t, timestamp, sample_rate=0.0):
+    """Index of the first sample at or after `timestamp` in the sorted array t.
+
+    With a known sample rate the position is computed directly (O(1)) and only
+    checked against its neighbour, otherwise it is a binary search (O(log n)).
+    On a memmap either way touches just a few pages.
+    """
+    n = len(t)
+    if n == 0:
+        return 0
+    if sample_rate > 0:
+        guess = int(np.ceil((timestamp - t[0]) * sample_rate - 1e-9))
+        if guess <= 0 and timestamp <= t[0]:
+            return 0
+        if 0 < guess < n and t[guess - 1] < timestamp <= t[guess]:
+            return guess
+    return int(np.searchsorted(t, timestamp, side="left"))
+
+
+class MappedChannel:
+    """The samples of a raw single channel log, memory mapped."""
+
+    def __init__(self, path):
+        self.header, records = open_binary_log(path)
+        # column views of the memmap, nothing is read until a block is sliced out
+        self.t = records["t"]
+        self.y = records["y"]
+
+    def __len__(self):
+        return len(self.t)
+
+    def time(self, index):
+        return float(self.t[index])
+
+    def find(self, timestamp, side="left"):
+        """Index of the first sample at (side "left") or after timestamp."""
+        if side == "left":
+            return find_index(self.t, timestamp, self.header["sample_rate"])
+        return int(np.searchsorted(self.t, timestamp, side=side))
+
+    def read(self, start, end):
+        # np.array copies just this block out of the memmap
+        return np.array(self.t[start:end]), np.array(self.y[start:end])
+
+
+class ChunkedChannel:
+    """One channel of a compressed or multi channel log, decoded a chunk (an
+    index entry) at a time as the replay gets to it.
+
+    A chunk is decoded block by block, reading only the blocks of the channel,
+    and only the last KEEP chunks are kept, the current one and the next.
+    """
+    KEEP = 2
+
+    def __init__(self, path, channel):
+        self.path = path
+        self.layout = read_header(path)["layout"]
+        entries = read_index(path)
+        if entries is None:
+            entries = rebuild_index(path)
+        self.entries = entries[entries["channel"] == channel]
+        # number of the first sample of every chunk, and of the one past the end
+        self.starts = np.r_[0, np.cumsum(self.entries["count"], dtype=np.int64)]
+        self.chunks = collections.OrderedDict()  # chunk number -> (t, y)
+        self.decoded_blocks = 0
+
+    def __len__(self):
+        return int(self.starts[-1])
+
+    def chunk(self, number):
+        if number in self.chunks:
+            self.chunks.move_to_end(number)
+            return self.chunks[number]
+        t_parts, y_parts = [], []
+        with open(self.path, 'rb') as f:
+            for _, start, end in iter_chunk_blocks(f, self.entries[number], self.layout):
+                f.seek(start)
+                t, y = decode_chunks(f.read(end - start), FORMAT_BINARY, self.layout)
+                t_parts.append(t)
+                y_parts.append(y)
+                self.decoded_blocks += 1
+        t = np.concatenate(t_parts) if t_parts else np.empty(0)
+        y = np.concatenate(y_parts) if y_parts else np.empty(0)
+        self.chunks[number] = (t, y)
+        while len(self.chunks) > self.KEEP:
+            self.chunks.popitem(last=False)
+        return t, y
+
+    def resident_samples(self):
+        return sum(len(t) for t, _ in self.chunks.values())
+
+    def time(self, index):
+        number = int(np.searchsorted(self.starts, index, side="right")) - 1
+        return float(self.chunk(number)[0][index - self.starts[number]])
+
+    def find(self, timestamp, side="left"):
+        """Index of the first sample at (side "left") or after timestamp, the
+        index picks the chunk, only that one is decoded."""
+        number = int(np.searchsorted(self.entries["t_last"], timestamp, side=side))
+        if number >= len(self.entries):
+            return len(self)
+        t, _ = self.chunk(number)
+        return int(self.starts[number]) + int(np.searchsorted(t, timestamp, side=side))
+
+    def read(self, start, end):
+        t_parts, y_parts = [], []
+        number = int(np.searchsorted(self.starts, start, side="right")) - 1
+        while start < end:
+            t, y = self.chunk(number)
+            first = start - int(self.starts[number])
+            last = min(end, int(self.starts[number + 1])) - int(self.starts[number])
+            t_parts.append(t[first:last].copy())
+            y_parts.append(y[first:last].copy())
+            start = int(self.starts[number + 1])
+            number += 1
+        if not t_parts:
+            return np.empty(0), np.empty(0)
+        return np.concatenate(t_parts), np.concatenate(y_parts)
+
+
+class ReplayWorker(QObject):
+    """Streams a channel of a binary log back as (seq, t, y) blocks, like a delta mode DataWorker.
+
+    Raw single channel logs are memory mapped, compressed and multi channel
+    logs are decoded a chunk at a time (ChunkedChannel), so a log of any size
+    replays in little memory.
+    """
+    samples_ready = pyqtSignal(int, object, object)  # seq, t block, y block
+    finished = pyqtSignal()
+    MAX_BLOCK = 100_000  # samples per tick at max speed
+
+    def __init__(self, path, speed=1.0, emit_rate=30, channel=0):
+        super().__init__()
+        header = read_header(path)
+        if header["layout"] == LAYOUT_INTERLEAVED:
+            self.samples = MappedChannel(path)
+            self.header = self.samples.header
+        else:
+            channels = log_channels(path)
+            if channel not in channels:
+                raise ValueError(f"{path} has no channel {channel}")
+            name, sample_rate = channels[channel]
+            self.header = dict(header, channel_name=name, sample_rate=sample_rate)
+            self.samples = ChunkedChannel(path, channel)
+        self.speed = speed
+        self.position = 0
+        self.seq = 0
+        self.running = False
+        self.seek_to = None  # set from the GUI thread, applied on the next tick
+        self.scheduler = DeadlineScheduler(1.0 / emit_rate, policy=DROP)
+
+    def seek(self, timestamp):
+        self.seek_to = timestamp
+
+    @pyqtSlot()
+    def start_work(self):
+        self.running = True
+        self.scheduler.start()
+        period = self.scheduler.period
+        cursor = self.samples.time(self.position) if self.position < len(self.samples) else 0.0
+
+        while self.running:
+            if self.seek_to is not None:
+                self.position = self.samples.find(self.seek_to)
+                cursor = self.seek_to
+                self.seek_to = None
+            count = len(self.samples)
+            if self.position >= count:
+                self.running = False
+                self.finished.emit()
+                break
+
+            periods = self.scheduler.wait()
+            if self.speed == MAX_SPEED:
+                end = min(self.position + self.MAX_BLOCK, count)
+                cursor = self.samples.time(end - 1)  # so a later switch to a fixed speed continues from here
+            else:
+                # log time advances speed times faster than the wall clock
+                cursor += self.speed * period * periods
+                end = self.samples.find(cursor, side="right")
+            if end <= self.position:
+                continue
+
+            t_block, y_block = self.samples.read(self.position, end)
+            self.position = end
+            try:
+                self.samples_ready.emit(self.seq, t_block, y_block)
+            except RuntimeError:
+                break
+            self.seq += 1
+
+    def stop_work(self):
+        self.running = False
+
+
+class ReplayEngine(QObject):
+    """Owns the thread replaying one log file into a callback on the GUI thread."""
+
+    def __init__(self, path, on_samples, speed=1.0, emit_rate=30, channel=0):
+        super().__init__()
+        self.path = path
+        self.thread = QThread()
+        self.worker = ReplayWorker(path, speed=speed, emit_rate=emit_rate, channel=channel)
+        self.worker.moveToThread(self.thread)
+        self.worker.samples_ready.connect(on_samples)
+        self.worker.finished.connect(self.thread.quit)
+        self.thread.started.connect(self.worker.start_work)
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    @property
+    def header(self):
+        return self.worker.header
+
+    def start(self):
+        if not self.thread.isRunning():
+            self.thread.start()
+
+    def stop(self):
+        self.worker.stop_work()
+        if self.thread.isRunning():
+            self.thread.quit()
+            self.thread.wait()
+
+    def seek(self, timestamp):
+        self.worker.seek(timestamp)
+
+    def rewind(self):
+        if len(self.worker.samples):
+            self.worker.seek(self.worker.samples.time(0))
+
+    def set_speed(self, speed):
+        self.worker.speed = speed
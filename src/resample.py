@@ -0,0 +1,132 @@
+import numpy as np
+
+from src.alignment import ASOF, LINEAR as LINEAR_JOIN, sample_at
+
+# resampling methods
+DECIMATE = "decimate"  # every n-th sample, no filter (aliases whatever is above the new Nyquist)
+HOLD = "hold"  # zero-order hold onto the output grid, the last sample at or before each time
+LINEAR = "linear"  # linear interpolation onto the output grid
+POLYPHASE = "polyphase"  # anti-aliasing low pass, only evaluated at the kept samples
+METHODS = (DECIMATE, HOLD, LINEAR, POLYPHASE)
+TAPS_PER_PHASE = 16  # filter length per unit of decimation factor, longer is sharper and slower
+
+
+def lowpass_taps(factor, taps_per_phase=TAPS_PER_PHASE):
+    """Windowed sinc low pass for decimating by an integer factor: cut off at the
+    new Nyquist frequency, unity gain at DC, odd length so the delay is a whole
+    number of samples."""
+    n = factor * taps_per_phase + 1
+    k = np.arange(n) - (n - 1) / 2
+    taps = np.sinc(k / factor) * np.blackman(n)
+    return taps / taps.sum()
+
+
+def on_grid(t, rate):
+    return abs(t * rate - round(t * rate)) < 1e-6
+
+
+class Resampler:
+    """Streaming resampler stage: process() takes the blocks of a source and
+    returns the resampled blocks, carrying the state it needs across them.
+
+    HOLD, LINEAR and POLYPHASE put the samples on a common time base, the
+    multiples of 1 / rate_out, so channels resampled to the same rate line up
+    sample for sample. DECIMATE and POLYPHASE need the input rate (rate_in),
+    DECIMATE only takes every n-th sample so rate_in must be n times rate_out.
+    POLYPHASE decimates by the integer part of rate_in / rate_out with a
+    linear phase FIR, whose delay is taken off the time stamps, and finishes
+    with LINEAR when the ratio is not a whole number (or the source is not on
+    the grid). For rate_out above rate_in it is LINEAR.
+    """
+
+    def __init__(self, rate_out, method=POLYPHASE, rate_in=None, taps_per_phase=TAPS_PER_PHASE):
+        if method not in METHODS:
+            raise ValueError(f"unknown resampling method '{method}', expected one of {METHODS}")
+        if rate_out <= 0:
+            raise ValueError("the output rate must be positive")
+        if method in (DECIMATE, POLYPHASE) and not rate_in:
+            raise ValueError(f"{method} needs the input rate")
+        self.rate_out = float(rate_out)
+        self.rate_in = float(rate_in) if rate_in else None
+        self.method = method
+        self.factor = max(1, int(self.rate_in / self.rate_out + 1e-9)) if self.rate_in else 1
+        if method == DECIMATE and abs(self.rate_in / self.rate_out - self.factor) > 1e-6 * self.factor:
+            # every n-th sample only gives rate_out when n = rate_in / rate_out is a whole number
+            raise ValueError(f"{DECIMATE} needs rate_in / rate_out to be a whole number, "
+                             f"not {self.rate_in:g} / {self.rate_out:g}")
+        if method == POLYPHASE and self.factor == 1:
+            self.method = LINEAR  # nothing to filter out when the rate does not go down
+        self.taps = lowpass_taps(self.factor, taps_per_phase) if self.method == POLYPHASE else None
+        self.reset()
+
+    def reset(self):
+        self.last = None  # HOLD / LINEAR: the last input sample, left neighbour of the next grid time
+        self.next_k = None  # HOLD / LINEAR: the next output time is next_k / rate_out
+        self.skip = 0  # DECIMATE / POLYPHASE: input samples before the next kept one
+        self.history = None  # POLYPHASE: the last len(taps) - 1 input values
+        self.follow = None  # POLYPHASE: LINEAR onto the grid, when the kept samples are not on it
+        self.started = False
+
+    def process(self, t, y):
+        t = np.asarray(t, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(t) == 0:
+            return t, y
+        if self.method == DECIMATE:
+            return self._decimate(t, y)
+        if self.method == POLYPHASE:
+            return self._polyphase(t, y)
+        return self._grid(t, y)
+
+    def _decimate(self, t, y):
+        keep = np.arange(self.skip, len(t), self.factor)
+        self.skip = (keep[-1] + self.factor - len(t)) if len(keep) else self.skip - len(t)
+        return t[keep], y[keep]
+
+    def _grid(self, t, y):
+        if self.last is not None:
+            t = np.concatenate(([self.last[0]], t))
+            y = np.concatenate(([self.last[1]], y))
+        if self.next_k is None:
+            self.next_k = int(np.ceil(t[0] * self.rate_out - 1e-6))
+        # grid times up to the last sample, the ones after it wait for the next block
+        end = int(np.floor(t[-1] * self.rate_out + 1e-6))
+        self.last = (t[-1], y[-1])
+        if end < self.next_k:
+            return t[:0], y[:0]
+        grid = np.arange(self.next_k, end + 1) / self.rate_out
+        self.next_k = end + 1
+        values, _ = sample_at(grid, t, y, ASOF if self.method == HOLD else LINEAR_JOIN)
+        return grid, values
+
+    def _polyphase(self, t, y):
+        taps = self.taps
+        delay = (len(taps) - 1) / 2 / self.rate_in
+        if not self.started:
+            self.started = True
+            # the filter starts on a history of the first value, so there is no start up ramp
+            self.history = np.full(len(taps) - 1, y[0])
+            # keep the samples that land on the output grid once the delay is taken off,
+            # starting with the first grid time the source covers
+            k = np.ceil(t[0] * self.rate_out - 1e-6)
+            self.skip = int(round((k / self.rate_out + delay - t[0]) * self.rate_in))
+            if not on_grid(t[0] + self.skip / self.rate_in - delay, self.rate_out) \
+                    or not on_grid(self.factor / self.rate_in, self.rate_out):
+                self.skip = int(round(delay * self.rate_in))
+                self.follow = Resampler(self.rate_out, LINEAR)
+
+        x = np.concatenate((self.history, y))
+        start = len(self.history) + self.skip
+        keep = np.arange(self.skip, len(t), self.factor)
+        self.skip = (keep[-1] + self.factor - len(t)) if len(keep) else self.skip - len(t)
+        self.history = x[len(x) - (len(taps) - 1):]
+        if len(keep) == 0:
+            return t[:0], y[:0]
+        # one row per kept sample, the filter is only evaluated where an output is needed.
+        # the taps are symmetric, no need to reverse them
+        windows = np.lib.stride_tricks.sliding_window_view(x, len(taps))[start - (len(taps) - 1)::self.factor]
+        values = windows[:len(keep)] @ taps
+        times = t[keep] - delay
+        if self.follow is not None:
+            return self.follow.process(times, values)
+        return times, values
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed capacity float64 buffer of (time, value) samples.
+
+    Every sample is written twice (at i and at i + capacity) so the newest
+    `size` samples always form one contiguous slice and can be read without
+    unwrapping or copying.
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("capacity must be a positive number of samples")
+        self.capacity = int(capacity)
+        self._data = np.zeros((2, 2 * self.capacity), dtype=np.float64)
+        self._head = 0  # next write position, always in [0, capacity)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, t, y):
+        i = self._head
+        self._data[0, i] = self._data[0, i + self.capacity] = t
+        self._data[1, i] = self._data[1, i + self.capacity] = y
+        self._head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def extend(self, t, y):
+        t = np.asarray(t, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if t.shape != y.shape:
+            raise ValueError(f"shape mismatch: t.shape = {t.shape}, y.shape = {y.shape}")
+        n = len(t)
+        if n == 0:
+            return
+        if n > self.capacity:  # only the newest samples survive anyway
+            t, y, n = t[-self.capacity:], y[-self.capacity:], self.capacity
+
+        head, cap = self._head, self.capacity
+        first = min(n, cap - head)
+        rest = n - first
+        for offset in (0, cap):
+            self._data[0, head + offset:head + offset + first] = t[:first]
+            self._data[1, head + offset:head + offset + first] = y[:first]
+            if rest:
+                self._data[0, offset:offset + rest] = t[first:]
+                self._data[1, offset:offset + rest] = y[first:]
+
+        self._head = (head + n) % cap
+        self.size = min(self.size + n, cap)
+
+    def view(self):
+        """Contiguous (t, y) views, oldest sample first.
+
+        The views share memory with the buffer and are overwritten by later
+        appends, use snapshot() when the data leaves the owning thread.
+        """
+        start = (self._head - self.size) % self.capacity
+        window = self._data[:, start:start + self.size]
+        return window[0], window[1]
+
+    def snapshot(self):
+        t, y = self.view()
+        return t.copy(), y.copy()
+
+    def clear(self):
+        self._head = 0
+        self.size = 0
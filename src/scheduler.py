@@ -0,0 +1,75 @@
+import time
+
+CATCH_UP = "catch_up"  # run late ticks back to back until the schedule is met again
+DROP = "drop"  # skip the deadlines that were missed and resume on the next one
+POLICIES = (CATCH_UP, DROP)
+
+
+class DeadlineScheduler:
+    """Ticks on absolute deadlines of a monotonic clock.
+
+    Deadlines are start + k * period, so time spent generating and emitting
+    a block does not push later ticks back, and the lateness of every tick
+    is recorded as jitter.
+    """
+
+    def __init__(self, period, policy=CATCH_UP, clock=time.perf_counter):
+        if period <= 0:
+            raise ValueError("period must be positive")
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy '{policy}', expected one of {POLICIES}")
+        self.period = period
+        self.policy = policy
+        self.clock = clock
+        self.next_deadline = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.overruns = 0  # ticks that started more than one period late
+        self.dropped = 0  # deadlines skipped under the drop policy
+        self.last_jitter = 0.0
+        self.max_jitter = 0.0
+        self.total_jitter = 0.0
+
+    def start(self):
+        self.next_deadline = self.clock() + self.period
+
+    def wait(self):
+        """Block until the next deadline.
+
+        Returns how many periods this tick accounts for: 1 normally, more when
+        the drop policy skipped missed deadlines.
+        """
+        if self.next_deadline is None:
+            self.start()
+
+        delay = self.next_deadline - self.clock()
+        if delay > 0:
+            time.sleep(delay)
+        lateness = max(0.0, self.clock() - self.next_deadline)
+
+        self.ticks += 1
+        self.last_jitter = lateness
+        self.max_jitter = max(self.max_jitter, lateness)
+        self.total_jitter += lateness
+
+        periods = 1
+        if lateness >= self.period:
+            self.overruns += 1
+            if self.policy == DROP:
+                missed = int(lateness // self.period)
+                self.dropped += missed
+                periods += missed
+        self.next_deadline += periods * self.period
+        return periods
+
+    def stats(self):
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "dropped": self.dropped,
+            "last_jitter": self.last_jitter,
+            "max_jitter": self.max_jitter,
+            "mean_jitter": self.total_jitter / self.ticks if self.ticks else 0.0,
+        }
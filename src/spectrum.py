@@ -0,0 +1,69 @@
+from functools import lru_cache
+
+import numpy as np
+
+FFT_SIZES = (256, 512, 1024, 2048, 4096)
+FLOOR_DB = -120.0  # level of a bin with nothing in it
+
+
+@lru_cache(maxsize=None)
+def analysis_window(size):
+    """Hann window scaled so a full scale sine of amplitude 1 reads 0 dB, shared
+    by every STFT of that size (read only)."""
+    window = np.hanning(size)
+    window *= 2.0 / window.sum()
+    window.flags.writeable = False
+    return window
+
+
+class StreamingSTFT:
+    """Short time Fourier transform of a sample stream, one frame every `hop`
+    samples over the last `size`.
+
+    push() only transforms the frames the new samples complete, all of them
+    with one rfft over a strided view of the pending samples; the samples a
+    later frame still needs are carried over. Levels are in dB.
+    """
+
+    def __init__(self, size, rate, hop=None):
+        if size < 2 or size & (size - 1):
+            raise ValueError("the FFT size must be a power of two")
+        if rate <= 0:
+            raise ValueError("the sample rate must be positive")
+        self.size = size
+        self.rate = float(rate)
+        self.hop = hop or size // 4
+        self.window = analysis_window(size)
+        self.frequencies = np.fft.rfftfreq(size, 1.0 / rate)
+        self.clear()
+
+    def clear(self):
+        self.pending_t = np.empty(0)
+        self.pending_y = np.empty(0)
+
+    @property
+    def bins(self):
+        return self.size // 2 + 1
+
+    def push(self, t, y):
+        """Returns (times, levels) of the completed frames, levels has one row of
+        `bins` dB values per frame, times are the frame centres. None when the
+        samples complete no frame yet."""
+        t = np.concatenate((self.pending_t, t))
+        y = np.concatenate((self.pending_y, y))
+        count = (len(y) - self.size) // self.hop + 1 if len(y) >= self.size else 0
+        if count <= 0:
+            self.pending_t, self.pending_y = t, y
+            return None
+
+        frames = np.lib.stride_tricks.sliding_window_view(y, self.size)[:count * self.hop:self.hop]
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        levels = np.abs(spectrum)
+        np.maximum(levels, 10 ** (FLOOR_DB / 20), out=levels)
+        np.log10(levels, out=levels)
+        levels *= 20
+        times = t[np.arange(count) * self.hop + self.size // 2]
+
+        # the next frame starts count * hop samples in
+        self.pending_t, self.pending_y = t[count * self.hop:], y[count * self.hop:]
+        return times, levels
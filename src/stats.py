@@ -0,0 +1,148 @@
+from collections import deque
+
+import numpy as np
+
+WINDOW = 500  # samples of the window min/max, the display window
+RESERVOIR_SIZE = 2048  # samples kept for the percentiles, rank error around 1 / sqrt(size)
+PERCENTILES = (5, 50, 95)
+
+
+class MonotonicDeque:
+    """Minimum of the last `length` samples: a deque of (index, value) with the
+    values strictly increasing, the front is the minimum.
+
+    A block is first reduced with NumPy to its suffix minima, the only samples
+    that can still become the minimum, so the Python work per block is the
+    candidates plus the pops, O(1) amortized per sample. For the maximum push
+    negated values.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.items = deque()
+        self.next_index = 0
+
+    def clear(self):
+        self.items.clear()
+        self.next_index = 0
+
+    def push(self, y):
+        n = len(y)
+        if n == 0:
+            return
+        # y[i] is a candidate when everything after it in the block is larger
+        later = np.minimum.accumulate(y[::-1])[::-1]
+        candidate = np.empty(n, dtype=bool)
+        candidate[:-1] = y[:-1] < later[1:]
+        candidate[-1] = True
+        index = np.flatnonzero(candidate)
+        values = y[index]
+
+        items = self.items
+        first = values[0]
+        while items and items[-1][1] >= first:
+            items.pop()
+        items.extend(zip((index + self.next_index).tolist(), values.tolist()))
+        self.next_index += n
+        oldest = self.next_index - self.length
+        while items[0][0] < oldest:
+            items.popleft()
+
+    def front(self):
+        return self.items[0][1] if self.items else None
+
+
+class StreamingStats:
+    """Statistics of everything a channel received this session, updated per
+    block in O(block):
+
+    count, mean and variance (Welford, merged block by block), RMS, session
+    min/max, min/max over the last `window` samples (monotonic deques) and
+    approximate percentiles from a uniform reservoir sample of fixed size.
+    Samples that are not finite are not counted.
+    """
+
+    def __init__(self, window=WINDOW, reservoir_size=RESERVOIR_SIZE, seed=None):
+        self.window_min = MonotonicDeque(window)
+        self.window_max = MonotonicDeque(window)
+        self.reservoir = np.empty(reservoir_size)
+        self.rng = np.random.default_rng(seed)
+        self.version = 0  # bumped by every change, keys the percentile cache and the panel
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.minimum = None
+        self.maximum = None
+        self.window_min.clear()
+        self.window_max.clear()
+        self.filled = 0  # samples in the reservoir
+        self.version += 1
+        self.cache = None
+
+    def push(self, y):
+        y = np.asarray(y, dtype=np.float64)
+        if len(y) and not np.isfinite(y).all():
+            y = y[np.isfinite(y)]
+        n = len(y)
+        if n == 0:
+            return
+        # merge the block's mean and M2 into the running ones (Chan et al.)
+        block_mean = y.mean()
+        deviation = y - block_mean
+        block_m2 = float(np.dot(deviation, deviation))
+        total = self.count + n
+        delta = block_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += block_m2 + delta * delta * self.count * n / total
+
+        low, high = float(y.min()), float(y.max())
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+        self.window_min.push(y)
+        self.window_max.push(-y)
+        self.sample(y)
+        self.count = total
+        self.version += 1
+
+    def sample(self, y):
+        # reservoir sampling (algorithm R), sample k of the stream is kept with probability size / (k + 1)
+        size = len(self.reservoir)
+        room = min(size - self.filled, len(y))
+        self.reservoir[self.filled:self.filled + room] = y[:room]
+        self.filled += room
+        rest = y[room:]
+        if len(rest) == 0:
+            return
+        seen = self.count + room + np.arange(1, len(rest) + 1)
+        keep = self.rng.random(len(rest)) * seen < size
+        slots = self.rng.integers(0, size, int(keep.sum()))
+        self.reservoir[slots] = rest[keep]
+
+    @property
+    def variance(self):
+        # of the samples seen (population), not an estimate of a larger one
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    @property
+    def rms(self):
+        return float(np.sqrt(self.variance + self.mean * self.mean))
+
+    def window_extremes(self):
+        high = self.window_max.front()
+        return self.window_min.front(), (None if high is None else -high)
+
+    def percentiles(self, q=PERCENTILES):
+        """Approximate percentiles of the whole session, None before any sample."""
+        if self.filled == 0:
+            return None
+        key = (self.version, tuple(q))
+        if self.cache is None or self.cache[0] != key:
+            self.cache = (key, np.percentile(self.reservoir[:self.filled], q))
+        return self.cache[1]
@@ -0,0 +1,30 @@
+import threading
+
+import numpy as np
+
+from src.log_writer import DROP_OLDEST, LogWriter
+
+
+def test_drop_oldest_keeps_calls():
+    writer = LogWriter(max_queued_blocks=4, overflow=DROP_OLDEST)
+    busy, release = threading.Event(), threading.Event()
+    written, called = [], []
+    try:
+        # the first job holds the writer thread so the queue fills up behind it
+        writer.enqueue(lambda t, y: busy.set() or release.wait(5), np.empty(0), np.empty(0))
+        assert busy.wait(5)
+        writer.call(lambda: called.append("finish_file"))
+        for k in range(20):
+            writer.enqueue(lambda t, y: written.append(int(t[0])), np.array([float(k)]), np.zeros(1))
+        writer.call(lambda: called.append("next_file"))
+        release.set()
+        writer.flush()
+    finally:
+        release.set()
+        writer.stop()
+
+    assert called == ["finish_file", "next_file"]
+    assert writer.stats()["dropped_blocks"] > 0
+    # the newest blocks made it, in order
+    assert written == sorted(written) and written[-1] == 19
+    assert len(written) + writer.stats()["dropped_blocks"] == 20
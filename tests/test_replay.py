@@ -0,0 +1,75 @@
+import numpy as np
+
+from src.multi_logger import MultiChannelLogger
+from src.replay import MAX_SPEED, ReplayWorker
+
+RATE = 1000.0
+SECONDS = 120
+FLUSH = 1000  # samples per channel and flush, one block each
+
+
+def write_log(directory, compression):
+    logger = MultiChannelLogger("all", directory, 1 << 34, new_file=False, compression=compression)
+    channels = [logger.add_channel(name, RATE) for name in ("a", "b")]
+    for tick in range(SECONDS * int(RATE) // FLUSH):
+        t = (tick * FLUSH + np.arange(FLUSH)) / RATE
+        channels[0].append(tick, t, np.sin(t))
+        channels[1].append(tick, t, np.cos(t))
+        logger.logg_binary(force=True)
+    logger.close()
+    return logger.file_path
+
+
+def replay(path, channel, stop_after=None):
+    """Runs the worker on this thread, returns it, the blocks it emitted and the
+    most samples it held decoded at once."""
+    worker = ReplayWorker(path, speed=MAX_SPEED, emit_rate=1000, channel=channel)
+    worker.MAX_BLOCK = 2000
+    blocks, resident = [], []
+
+    def on_samples(seq, t, y):
+        blocks.append((t, y))
+        resident.append(worker.samples.resident_samples())
+        if stop_after is not None and len(blocks) >= stop_after:
+            worker.stop_work()
+
+    worker.samples_ready.connect(on_samples)
+    worker.start_work()
+    return worker, blocks, max(resident)
+
+
+def test_compressed_replay_decodes_a_chunk_at_a_time(tmp_path):
+    path = write_log(str(tmp_path), "zlib")
+    worker, blocks, resident = replay(path, 1)
+
+    t = np.concatenate([t for t, _ in blocks])
+    y = np.concatenate([y for _, y in blocks])
+    assert len(t) == SECONDS * RATE
+    np.testing.assert_array_equal(y, np.cos(t))
+    assert np.all(np.diff(t) > 0)
+    # never more than the current and the next chunk
+    assert resident <= 2 * worker.samples.entries["count"].max() < len(t)
+    assert worker.samples.decoded_blocks == SECONDS * RATE // FLUSH
+
+
+def test_partial_replay_decodes_only_the_blocks_it_reached(tmp_path):
+    path = write_log(str(tmp_path), "zlib")
+    worker, blocks, _ = replay(path, 0, stop_after=3)
+
+    assert sum(len(t) for t, _ in blocks) == 3 * worker.MAX_BLOCK
+    # the blocks of the first chunk, those of the other channel are skipped
+    assert len(worker.samples.entries) > 10
+    assert worker.samples.decoded_blocks == worker.samples.entries["count"][0] // FLUSH
+
+
+def test_raw_multi_channel_replay_and_seek(tmp_path):
+    path = write_log(str(tmp_path), None)
+    worker = ReplayWorker(path, channel=0)
+    samples = worker.samples
+    assert len(samples) == SECONDS * RATE
+    index = samples.find(95.0005)
+    assert samples.time(index) == 95.001
+    t, y = samples.read(index, index + 3)
+    np.testing.assert_array_equal(t, [95.001, 95.002, 95.003])
+    np.testing.assert_array_equal(y, np.sin(t))
+    assert samples.resident_samples() <= 2 * samples.entries["count"].max()
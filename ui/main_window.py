@@ -1,17 +1,30 @@
 # === main_window.py ===
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QPushButton,
-    QHBoxLayout, QLabel, QComboBox, QLineEdit, QMessageBox, QFileDialog, QCheckBox, QDialog
+    QHBoxLayout, QLabel, QComboBox, QLineEdit, QMessageBox, QFileDialog, QCheckBox, QDialog,
+    QInputDialog
 )
 from PyQt5.QtCore import Qt, QThread, QEvent
 import numpy as np
 import pyqtgraph as pg
 from src.Math_Dialog import MathDialog
+from src.Filter_Dialog import FilterDialog
 from src.data_worker import DataWorker
 from src.math_functions import compute_expression
+from src.durability import NO_SYNC, SYNC_BYTES, SYNC_INTERVAL, SYNC_ROTATION, Durability
+from src.log_index import log_channels
+from src.replay import SPEEDS
+from src.spectrum import FFT_SIZES
+from src.resample import DECIMATE, HOLD, LINEAR, POLYPHASE
 from graph_plotting_functionalities.Graph_Layout import Generate_Graph
 from graph_plotting_functionalities.graph_widget import create_button_row
 
+# choices of the sample rate combos, in Hz
+SOURCE_RATES = {"20 Hz": 20.0, "100 Hz": 100.0, "1 kHz": 1000.0, "10 kHz": 10_000.0, "100 kHz": 100_000.0}
+COMMON_RATES = {"Source rate (no resampling)": None, "10 Hz": 10.0, "20 Hz": 20.0, "50 Hz": 50.0,
+                "100 Hz": 100.0, "1 kHz": 1000.0}
+RESAMPLE_METHODS = {"Anti-aliased (polyphase)": POLYPHASE, "Linear": LINEAR, "Hold": HOLD, "Decimate": DECIMATE}
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -68,6 +81,44 @@ class MainWindow(QMainWindow):
 
         control_layout.addWidget(self.math_controls)
 
+        # per channel filters, before display, logging and math
+        self.filter_controls = QPushButton("Signal Filters")
+        self.filter_controls.setToolTip("Smooth or filter a signal (moving average, EMA, biquad, FIR)")
+        self.filter_controls.clicked.connect(self.open_filter_dialog)
+        control_layout.addWidget(self.filter_controls)
+
+        # frequency domain view of a channel
+        self.spectrum_btn = QPushButton("Spectrum View")
+        self.spectrum_btn.setToolTip("Add a live spectrum and spectrogram of a signal")
+        self.spectrum_btn.clicked.connect(self.open_spectrum_dialog)
+        control_layout.addWidget(self.spectrum_btn)
+
+        # replay of logged binary files
+        control_layout.addWidget(QLabel("Replay Speed:"))
+        self.replay_speed_combo = QComboBox()
+        self.replay_speed_combo.addItems(list(SPEEDS.keys()))
+        control_layout.addWidget(self.replay_speed_combo)
+        self.replay_btn = QPushButton("Replay Log File")
+        self.replay_btn.setToolTip("Play a logged binary file back as a new graph")
+        self.replay_btn.clicked.connect(self.open_replay_file)
+        control_layout.addWidget(self.replay_btn)
+
+        # sample rates: of the graphs Set creates, and the common time base they are resampled to
+        control_layout.addWidget(QLabel("Source Rate (new graphs):"))
+        self.source_rate_combo = QComboBox()
+        self.source_rate_combo.addItems(list(SOURCE_RATES.keys()))
+        self.source_rate_combo.currentTextChanged.connect(self.on_source_rate_changed)
+        control_layout.addWidget(self.source_rate_combo)
+        control_layout.addWidget(QLabel("Common Time Base:"))
+        self.common_rate_combo = QComboBox()
+        self.common_rate_combo.addItems(list(COMMON_RATES.keys()))
+        self.common_rate_combo.currentTextChanged.connect(self.on_common_rate_changed)
+        control_layout.addWidget(self.common_rate_combo)
+        self.resample_combo = QComboBox()
+        self.resample_combo.addItems(list(RESAMPLE_METHODS.keys()))
+        self.resample_combo.currentTextChanged.connect(self.on_common_rate_changed)
+        control_layout.addWidget(self.resample_combo)
+
         # Global Buttons
         control_layout.addWidget(QLabel("Playback Controls"))
         button_groups = [
@@ -93,7 +144,7 @@ class MainWindow(QMainWindow):
         # File Format
         control_layout.addWidget(QLabel("File Format:"))
         self.logger_combo_box = QComboBox()
-        self.logger_combo_box.addItems(["Select format", "CSV", "Binary"])
+        self.logger_combo_box.addItems(["Select format", "CSV", "Binary", "Binary (zlib)", "Binary (lzma)"])
         control_layout.addWidget(self.logger_combo_box)
 
         # File Size
@@ -105,6 +156,12 @@ class MainWindow(QMainWindow):
         self.new_file.addItems(["Stop when file size exceed the limit", "Create a new file after limit is exceeded"])
         control_layout.addWidget(self.new_file)
 
+        # how often the log files are forced to disk
+        control_layout.addWidget(QLabel("Durability:"))
+        self.durability_combo = QComboBox()
+        self.durability_combo.addItems(["No sync", "Sync every 1 s", "Sync every 1 MB", "Sync on rotation"])
+        control_layout.addWidget(self.durability_combo)
+
         # Destination selection
         control_layout.addWidget(QLabel("Select Destination:"))
         self.destination = QLineEdit()
@@ -190,7 +247,14 @@ class MainWindow(QMainWindow):
             "100MB": 100 * 1024 * 1024,
         }
         max_size = size_map.get(size, 1 * 1024 * 1024)  # default is 1mb
-        self.generate_graph_widget.start_logging_all(log_format, destination, max_size, create_new_file)
+        durability_map = {
+            "No sync": Durability(NO_SYNC),
+            "Sync every 1 s": Durability(SYNC_INTERVAL, interval=1.0),
+            "Sync every 1 MB": Durability(SYNC_BYTES, max_bytes=1024 * 1024),
+            "Sync on rotation": Durability(SYNC_ROTATION),
+        }
+        durability = durability_map[self.durability_combo.currentText()]
+        self.generate_graph_widget.start_logging_all(log_format, destination, max_size, create_new_file, durability)
 
     def on_stop_logging(self):
         self.start_log_btn.setEnabled(True)
@@ -272,6 +336,26 @@ class MainWindow(QMainWindow):
             self.destination.setText(folder)
             self.destination.setToolTip(f"Selected: {folder}")
 
+    def open_replay_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Select a binary log", "", "Binary logs (*.bin)")
+        if not path:
+            return
+        try:
+            channels = log_channels(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to read log: {str(e)}")
+            return
+        channel = next(iter(channels), 0)
+        if len(channels) > 1:
+            # a multi channel log, one graph per replayed channel
+            names = [f"{number}: {name}" for number, (name, _) in channels.items()]
+            name, ok = QInputDialog.getItem(self, "Replay Log File", "Channel:", names, 0, False)
+            if not ok:
+                return
+            channel = list(channels)[names.index(name)]
+        speed = SPEEDS[self.replay_speed_combo.currentText()]
+        self.generate_graph_widget.add_replay_plot(path, speed, channel)
+
     def zoom_in(self):
         zoom_mode = self.zoom_combo_box.currentText()
         for graph in self.generate_graph_widget.graphs:
@@ -298,6 +382,13 @@ class MainWindow(QMainWindow):
             self.user_input1.addItem(name)
             self.user_input2.addItem(name)
 
+    def on_source_rate_changed(self, text):
+        self.generate_graph_widget.source_rate = SOURCE_RATES[text]
+
+    def on_common_rate_changed(self, _):
+        self.generate_graph_widget.set_common_rate(COMMON_RATES[self.common_rate_combo.currentText()],
+                                                   RESAMPLE_METHODS[self.resample_combo.currentText()])
+
     def open_math_dialog(self):
         dialog = MathDialog(self)
         if dialog.exec_() == QDialog.Accepted:
@@ -308,9 +399,34 @@ class MainWindow(QMainWindow):
                     input2=result["input2"],
                     operation=result["operation"],
                     constant=result["constant"],
-                    expression=result["expression"]
+                    expression=result["expression"],
+                    compiled=result["compiled"],
+                    input_ids=result["input_ids"],
+                    join=result["join"]
                 )
 
+    def open_filter_dialog(self):
+        dialog = FilterDialog(self)
+        if dialog.exec_() == QDialog.Accepted:
+            result = dialog.get_result()
+            if result:
+                graph = self.generate_graph_widget.channels.get(result["channel_id"])
+                graph.set_filters(result["filters"])
+
+    def open_spectrum_dialog(self):
+        labels = self.generate_graph_widget.channels.labels()
+        if not labels:
+            QMessageBox.warning(self, "Warning", "Please set up the graphs first.")
+            return
+        name, ok = QInputDialog.getItem(self, "Spectrum View", "Signal:", labels, 0, False)
+        if not ok:
+            return
+        sizes = [str(size) for size in FFT_SIZES]
+        size, ok = QInputDialog.getItem(self, "Spectrum View", "FFT size (samples):", sizes,
+                                        sizes.index("1024"), False)
+        if ok:
+            self.generate_graph_widget.add_spectrum_plot(name, int(size))
+
     def update_visibility_checkboxes(self):
 
         for i in reversed(range(self.check_box_layout.count())):